@@ -0,0 +1,115 @@
+import os
+import asyncio
+from contextlib import contextmanager, asynccontextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Optional, Callable
+
+# Set per HTTP request by main.py's middleware, so call sites need not pass the caller along
+_session: ContextVar[str] = ContextVar("admission_session", default="anonymous")
+
+
+@contextmanager
+def session_scope(session: str):
+    token = _session.set(session)
+    try:
+        yield
+    finally:
+        _session.reset(token)
+
+
+class AdmissionRejected(Exception):
+    """Too many model-backed requests; the caller should retry after retry_after seconds"""
+
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AdmissionControl:
+    """Bounds model-backed requests, globally and per session.
+
+    Up to max_active requests run at once (LLM_ADMISSION_ACTIVE) and up
+    to max_queue more wait for a slot (LLM_ADMISSION_QUEUE). One session
+    may have at most per_session requests running or waiting
+    (LLM_SESSION_LIMIT). A request beyond those limits is rejected
+    immediately instead of being queued. A request that waits longer
+    than queue_timeout seconds (LLM_QUEUE_TIMEOUT) is rejected too. Used
+    from the serving event loop only.
+    """
+
+    def __init__(self, max_active: Optional[int] = None, max_queue: Optional[int] = None,
+                 per_session: Optional[int] = None, queue_timeout: Optional[float] = None, retry_after: int = 5):
+        self.max_active = max(1, max_active or int(os.getenv("LLM_ADMISSION_ACTIVE", "8")))
+        self.max_queue = max(0, max_queue if max_queue is not None else int(os.getenv("LLM_ADMISSION_QUEUE", "32")))
+        self.per_session = max(1, per_session or int(os.getenv("LLM_SESSION_LIMIT", "3")))
+        self.queue_timeout = queue_timeout or float(os.getenv("LLM_QUEUE_TIMEOUT", "30"))
+        self.retry_after = retry_after
+        self._slots: Optional[asyncio.Semaphore] = None  # created in the serving event loop
+        self._active = 0
+        self._waiting = 0
+        self._sessions: Dict[str, int] = {}  # session -> requests running or waiting
+        self.stats = {"admitted": 0, "rejected_session": 0, "rejected_queue": 0, "timed_out": 0}
+
+    def _leave(self, session: str):
+        self._sessions[session] -= 1
+        if not self._sessions[session]:
+            del self._sessions[session]
+
+    async def acquire(self, session: Optional[str] = None) -> Callable[[], None]:
+        """Wait for a slot and return the function that gives it back; raises AdmissionRejected"""
+        session = session or _session.get()
+        if self._sessions.get(session, 0) >= self.per_session:
+            self.stats["rejected_session"] += 1
+            raise AdmissionRejected(f"Too many AI requests in progress for this session (limit {self.per_session})",
+                                    self.retry_after)
+        if self._active + self._waiting >= self.max_active + self.max_queue:
+            self.stats["rejected_queue"] += 1
+            raise AdmissionRejected("AI request queue is full, please retry shortly", self.retry_after)
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_active)
+        self._sessions[session] = self._sessions.get(session, 0) + 1
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._leave(session)
+            self.stats["timed_out"] += 1
+            raise AdmissionRejected("Timed out waiting for an AI request slot", self.retry_after)
+        except BaseException:
+            self._leave(session)
+            raise
+        finally:
+            self._waiting -= 1
+        self._active += 1
+        self.stats["admitted"] += 1
+
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                self._active -= 1
+                self._slots.release()
+                self._leave(session)
+        return release
+
+    @asynccontextmanager
+    async def slot(self, session: Optional[str] = None):
+        release = await self.acquire(session)
+        try:
+            yield
+        finally:
+            release()
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "active": self._active,
+            "waiting": self._waiting,
+            "sessions": len(self._sessions),
+            "max_active": self.max_active,
+            "max_queue": self.max_queue,
+            "per_session": self.per_session,
+        }
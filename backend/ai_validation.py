@@ -0,0 +1,183 @@
+import os
+import re
+import json
+import time
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+
+from llm_cache import ResponseCache, cache_key
+from prompt_context import estimate_tokens, compact
+
+SYSTEM_PROMPT = "You are a data validation expert. Return only a JSON array of verdicts."
+# Fallback when the model answers in prose: "3: INVALID - reason"
+VERDICT_LINE = re.compile(r"^[^\w\n]*(\d+)[^\w\n]+(VALID|INVALID)\b[^\w\n]*(.*)$", re.IGNORECASE | re.MULTILINE)
+PROMPT_OVERHEAD_TOKENS = 250
+
+
+def row_hash(row: Dict[str, Any]) -> str:
+    return cache_key("row", compact(dict(sorted(row.items()))))
+
+
+def pack(rows: List[Tuple[int, Dict[str, Any]]], budget: int, max_rows: int) -> List[List[Tuple[int, str]]]:
+    """Split (number, row) pairs into batches of compact lines that fit budget tokens each"""
+    batches, batch, used = [], [], 0
+    for number, row in rows:
+        line = f"{number}\t{compact(row)}"
+        cost = estimate_tokens(line) + 1
+        if batch and (used + cost > budget or len(batch) >= max_rows):
+            batches.append(batch)
+            batch, used = [], 0
+        batch.append((number, line))
+        used += cost
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def batch_prompt(lines: List[str]) -> str:
+    rows = "\n".join(lines)
+    return f"""
+Validate each data entry below for correctness and completeness. Each line is "<number><TAB><entry JSON>".
+Entries are clients (ClientID), workers (WorkerID) or tasks (TaskID).
+
+Check for:
+1. Required fields based on entry type (Client/Worker/Task)
+2. Valid data types and formats
+3. Logical consistency
+
+Entries:
+{rows}
+
+Return a JSON array with one object per entry: [{{"n": <number>, "valid": true | false, "reason": "<brief reason when invalid>"}}]
+"""
+
+
+def parse_verdicts(text: str, expected: List[int]) -> Dict[int, Dict[str, Any]]:
+    """Verdicts by entry number; entries the answer does not cover are left out"""
+    wanted = set(expected)
+    verdicts: Dict[int, Dict[str, Any]] = {}
+    text = (text or "").strip()
+    start, end = text.find("["), text.rfind("]")
+    items: List[Any] = []
+    if start != -1 and end > start:
+        try:
+            items = json.loads(text[start:end + 1])
+        except ValueError:
+            items = []
+    for item in items if isinstance(items, list) else []:
+        if not isinstance(item, dict):
+            continue
+        try:
+            number = int(item.get("n", item.get("number", item.get("index"))))
+        except (TypeError, ValueError):
+            continue
+        valid = item.get("valid")
+        if isinstance(valid, str):
+            valid = valid.strip().lower() in ("true", "valid", "yes")
+        if number in wanted and isinstance(valid, bool):
+            verdicts[number] = {"valid": valid, "reason": str(item.get("reason") or "")}
+    if not verdicts:
+        for match in VERDICT_LINE.finditer(text):
+            number = int(match.group(1))
+            if number in wanted and number not in verdicts:
+                verdicts[number] = {"valid": match.group(2).upper() == "VALID", "reason": match.group(3).strip()}
+    return verdicts
+
+
+class BatchValidator:
+    """Model validation of many rows at once.
+
+    Rows are packed as compact JSON lines into requests of at most
+    batch_tokens tokens (LLM_VALIDATION_BATCH_TOKENS), and batches run on
+    a bounded thread pool (the agent's in-flight cap still applies).
+    Verdicts are cached by row content, so unchanged rows are never sent
+    twice. Entries missing from an answer are retried once in smaller
+    batches; what is still missing comes back with valid None.
+    """
+
+    def __init__(self, agent, cache: Optional[ResponseCache] = None, batch_tokens: Optional[int] = None,
+                 max_rows: int = 100, max_workers: Optional[int] = None):
+        self.agent = agent
+        self.cache = cache if cache is not None else verdict_cache()
+        self.batch_tokens = batch_tokens or int(os.getenv("LLM_VALIDATION_BATCH_TOKENS", "3000"))
+        self.max_rows = max_rows
+        self.max_workers = max_workers or agent.settings.max_in_flight
+
+    def _key(self, row: Dict[str, Any]) -> str:
+        return cache_key("verdict", self.agent.model_name, row_hash(row))
+
+    def _ask(self, batch: List[Tuple[int, str]]) -> Dict[int, Dict[str, Any]]:
+        numbers = [number for number, _ in batch]
+        try:
+            answer = self.agent.chat_completion(system_prompt=SYSTEM_PROMPT,
+                                                user_prompt=batch_prompt([line for _, line in batch]))
+        except Exception as e:
+            print(f"AI batch validation error: {e}")
+            return {}
+        return parse_verdicts(answer, numbers)
+
+    def _ask_all(self, batches: List[List[Tuple[int, str]]]) -> List[Dict[int, Dict[str, Any]]]:
+        """Ask about every batch on the pool; each runs in its own copy of the caller's context,
+        so bypass_cache() around validate() reaches the model calls"""
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches))) as pool:
+            futures = [pool.submit(contextvars.copy_context().run, self._ask, batch) for batch in batches]
+            return [future.result() for future in futures]
+
+    def validate(self, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """One verdict per row, in order: {"valid": bool | None, "reason", "source": "cache" | "model" | None}"""
+        started = time.perf_counter()
+        verdicts: List[Optional[Dict[str, Any]]] = [None] * len(rows)
+        keys = [self._key(row) for row in rows]
+        pending: Dict[str, List[int]] = {}  # identical rows are asked about once
+        for i, key in enumerate(keys):
+            cached = self.cache.get(key) if key not in pending else None
+            if cached is not None:
+                verdicts[i] = {**json.loads(cached), "source": "cache"}
+            else:
+                pending.setdefault(key, []).append(i)
+
+        groups = list(pending.values())
+        todo = [(n, rows[positions[0]]) for n, positions in enumerate(groups)]
+        batches = pack(todo, max(1, self.batch_tokens - PROMPT_OVERHEAD_TOKENS), self.max_rows)
+        answers: Dict[int, Dict[str, Any]] = {}
+        requests = 0
+        if batches:
+            for result in self._ask_all(batches):
+                answers.update(result)
+            requests = len(batches)
+            missing = [entry for batch in batches for entry in batch if entry[0] not in answers]
+            if missing:
+                retries = pack([(n, rows[groups[n][0]]) for n, _ in missing],
+                               max(1, self.batch_tokens - PROMPT_OVERHEAD_TOKENS), max(1, self.max_rows // 4))
+                for result in self._ask_all(retries):
+                    answers.update(result)
+                requests += len(retries)
+
+        for n, (key, positions) in enumerate(pending.items()):
+            answer = answers.get(n)
+            if answer is not None:
+                self.cache.put(key, json.dumps(answer))
+            verdict = {**answer, "source": "model"} if answer else {"valid": None, "reason": "No verdict from model", "source": None}
+            for i in positions:
+                verdicts[i] = verdict
+        return {
+            "verdicts": verdicts,
+            "requests": requests,
+            "cached": sum(1 for v in verdicts if v["source"] == "cache"),
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }
+
+
+_verdicts: Optional[ResponseCache] = None
+
+
+def verdict_cache() -> ResponseCache:
+    """Row verdicts kept apart from prompt responses, so a large validation run does not evict them"""
+    global _verdicts
+    if _verdicts is None:
+        _verdicts = ResponseCache(
+            max_entries=int(os.getenv("LLM_VERDICT_CACHE_SIZE", "50000")),
+            ttl=float(os.getenv("LLM_CACHE_TTL", "3600")),
+        )
+    return _verdicts
@@ -33,6 +33,7 @@ with st.sidebar:
             dm.clients = clients_df.to_dict(orient="records")
             dm.workers = workers_df.to_dict(orient="records")
             dm.tasks = tasks_df.to_dict(orient="records")
+            dm.mark_data_changed()
             st.success("All files loaded successfully!")
         else:
             st.error("Please upload all three files before loading.")
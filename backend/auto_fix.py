@@ -0,0 +1,424 @@
+import json
+import numpy as np
+import pandas as pd
+from collections import Counter, namedtuple
+from typing import List, Dict, Any, Callable
+
+from skill_cover import SkillCover
+from skill_index import SkillIndex
+
+# One structured change-log entry; field is None for whole-row removals
+FixChange = namedtuple("FixChange", ["entity", "id", "field", "old", "new", "fix_code"])
+
+ID_FIELDS = {"client": "ClientID", "worker": "WorkerID", "task": "TaskID"}
+TABLES = {"client": "clients", "worker": "workers", "task": "tasks"}
+# Exact types, as Series.map(type).isin compares them by equality; np.float64 is a float subclass
+NUMBER_TYPES = (int, float, bool, np.float64)
+
+class ColumnFixer:
+    """A declarative fix for one column: fn(column, ctx) takes the column as an object Series and returns the corrected one"""
+
+    def __init__(self, field: str, fix_code: str, fn: Callable[[pd.Series, "FixContext"], pd.Series], only_if_present: bool = True):
+        self.field = field
+        self.fix_code = fix_code
+        self.fn = fn
+        self.only_if_present = only_if_present
+
+
+class FixContext:
+    """Cross-table facts gathered while the pipeline runs"""
+
+    def __init__(self):
+        self.raw_required_skills: set = set()
+        self.available_skills: set = set()
+        self.skill_index: SkillIndex = SkillIndex()
+        self.task_ids: set = set()
+        self.removed_task_ids: set = set()
+
+
+def split_list(value: Any) -> List[str]:
+    if isinstance(value, str):
+        return [s.strip() for s in value.split(",") if s.strip()]
+    return []
+
+
+def _is_number(column: pd.Series) -> np.ndarray:
+    # bool is an int subclass, and the row-wise fixes treated it as a number too
+    return column.map(type).isin(NUMBER_TYPES).to_numpy()
+
+
+def _is_str(column: pd.Series) -> np.ndarray:
+    return (column.map(type) == str).to_numpy()
+
+
+def by_value(fn: Callable[[Any, FixContext], Any], types: tuple = (str,)) -> Callable[[pd.Series, FixContext], pd.Series]:
+    """Lift a per-value fix to a column fix that runs once per distinct value of the given types"""
+    def fix(column: pd.Series, ctx: FixContext) -> pd.Series:
+        mask = column.map(type).isin(types).to_numpy()
+        if not mask.any():
+            return column
+        selected = column[mask]
+        fixed = {value: fn(value, ctx) for value in selected.unique()}
+        out = column.copy()
+        out[mask] = selected.map(fixed)
+        return out
+    return fix
+
+
+# --------- Column fix functions ---------
+def default_if_empty(default: Any) -> Callable[[pd.Series, FixContext], pd.Series]:
+    # astype(bool) is the truthiness of each value: None, "", 0 and False are empty, NaN is not
+    return lambda column, ctx: column.where(column.astype(bool), default)
+
+
+def _clamp_below(limit: float, value: Any) -> Callable[[pd.Series, FixContext], pd.Series]:
+    def fix(column: pd.Series, ctx: FixContext) -> pd.Series:
+        numbers = _is_number(column)
+        below = numbers & (pd.to_numeric(column.where(numbers), errors="coerce").to_numpy(dtype=float) < limit)
+        return column.mask(below, value)
+    return fix
+
+
+def clamp_priority(column: pd.Series, ctx: FixContext) -> pd.Series:
+    numbers = _is_number(column)
+    values = pd.to_numeric(column.where(numbers), errors="coerce").to_numpy(dtype=float)
+    return column.mask(numbers & (values < 1), 1).mask(numbers & (values > 5), 5)
+
+
+clamp_duration = _clamp_below(1, 1)
+clamp_max_concurrent = _clamp_below(0, 1)
+
+
+def clean_skills(column: pd.Series, ctx: FixContext) -> pd.Series:
+    """Comma lists without blank entries or whitespace around the commas, as split_list would rejoin them"""
+    strings = _is_str(column)
+    if not strings.any():
+        return column
+    cleaned = (column[strings].str.replace(r"^[\s,]+|[\s,]+$", "", regex=True)
+               .str.replace(r"\s*,[\s,]*", ",", regex=True))
+    out = column.copy()
+    out[strings] = cleaned
+    return out
+
+
+def resolve_unknown_skills(value: str, ctx: FixContext) -> str:
+    req = split_list(value)
+    resolved = []
+    for skill in req:
+        if skill not in ctx.available_skills:
+            skill = ctx.skill_index.nearest(skill) or skill
+        if skill not in resolved:
+            resolved.append(skill)
+    if resolved != req:
+        return ",".join(resolved)
+    return value
+
+
+def drop_unknown_skills(value: str, ctx: FixContext) -> str:
+    req = split_list(value)
+    valid = [s for s in req if s in ctx.available_skills]
+    if valid and len(valid) != len(req):
+        return ",".join(valid)
+    return value
+
+
+def drop_removed_task_ids(value: Any, ctx: FixContext) -> Any:
+    """Drop references to the TaskIDs of removed duplicate rows"""
+    if not value:
+        return value
+    task_ids = split_list(str(value))
+    valid = [t for t in task_ids if t not in ctx.removed_task_ids]
+    if len(valid) != len(task_ids):
+        return ",".join(valid)
+    return value
+
+
+def repair_attributes_json(value: str, ctx: FixContext) -> str:
+    if not value or value == "{}":
+        return value
+    try:
+        json.loads(value)
+        return value
+    except json.JSONDecodeError:
+        pass
+    try:
+        fixed = value.replace("'", '"')
+        json.loads(fixed)
+        return fixed
+    except Exception:
+        return "{}"
+
+
+def repair_available_slots(value: str, ctx: FixContext) -> str:
+    if not value:
+        return value
+    try:
+        json.loads(value)
+        return value
+    except json.JSONDecodeError:
+        pass
+    try:
+        parsed = json.loads(value.replace("abc", "0").replace("'", '"'))
+        cleaned = [int(x) if isinstance(x, (int, float, str)) and str(x).isdigit() else 1 for x in parsed]
+        return json.dumps(cleaned)
+    except Exception:
+        return "[1, 1, 1]"
+
+
+def normalize_phases(value: str, ctx: FixContext) -> str:
+    if not value or value.startswith("["):
+        return value
+    if value.isdigit():
+        return f"[{value}]"
+    parts = value.split("-")
+    if len(parts) == 2 and all(p.strip().isdigit() for p in parts):
+        start, end = map(int, parts)
+        return json.dumps(list(range(start, end + 1)))
+    return "[1]"
+
+
+# Fixers run in declaration order, each over a whole column of its table
+FIXERS: Dict[str, List[ColumnFixer]] = {
+    "worker": [
+        ColumnFixer("Skills", "skills_cleaned", clean_skills),
+        ColumnFixer("WorkerGroup", "default_worker_group", default_if_empty("default"), only_if_present=False),
+        ColumnFixer("QualificationLevel", "default_qualification", default_if_empty(1), only_if_present=False),
+        ColumnFixer("AvailableSlots", "slots_repaired", by_value(repair_available_slots)),
+    ],
+    "task": [
+        ColumnFixer("Duration", "duration_clamped", clamp_duration),
+        ColumnFixer("MaxConcurrent", "max_concurrent_clamped", clamp_max_concurrent),
+        ColumnFixer("RequiredSkills", "unknown_skills_resolved", by_value(resolve_unknown_skills)),
+        ColumnFixer("RequiredSkills", "unknown_skills_removed", by_value(drop_unknown_skills)),
+        ColumnFixer("Category", "default_category", default_if_empty("general"), only_if_present=False),
+        ColumnFixer("PreferredPhases", "default_phases", default_if_empty("1"), only_if_present=False),
+        ColumnFixer("MaxConcurrent", "default_max_concurrent", default_if_empty(1), only_if_present=False),
+        ColumnFixer("PreferredPhases", "phases_normalized", by_value(normalize_phases)),
+    ],
+    "client": [
+        ColumnFixer("RequestedTaskIDs", "removed_tasks_dropped", by_value(drop_removed_task_ids, (str, int, float))),
+        ColumnFixer("PriorityLevel", "priority_clamped", clamp_priority),
+        ColumnFixer("GroupTag", "default_group_tag", default_if_empty("default"), only_if_present=False),
+        ColumnFixer("AttributesJSON", "default_attributes", default_if_empty("{}"), only_if_present=False),
+        ColumnFixer("AttributesJSON", "attributes_repaired", by_value(repair_attributes_json)),
+    ],
+}
+
+
+class AutoFixPipeline:
+    """Runs FIXERS over clients, workers and tasks with one fixing pass per table"""
+
+    def __init__(self, clients: List[Dict[str, Any]], workers: List[Dict[str, Any]], tasks: List[Dict[str, Any]]):
+        self.clients = clients
+        self.workers = workers
+        self.tasks = tasks
+        self.ctx = FixContext()
+        self.changes: List[FixChange] = []
+        self._change_rows: List[tuple] = []  # (row, field existed) per change, for patch paths
+        self.skill_cover: SkillCover = None
+
+    def _log(self, change: FixChange, row: Dict[str, Any], existed: bool = True):
+        self.changes.append(change)
+        self._change_rows.append((row, existed))
+
+    def _fix_table(self, entity: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Run the entity's fixers column by column; returns each row's field updates without applying them"""
+        n = len(rows)
+        ids = [row.get(ID_FIELDS[entity]) for row in rows]
+        columns: Dict[str, pd.Series] = {}
+        present: Dict[str, np.ndarray] = {}  # field exists in the row or was set by an earlier fixer
+        touched: Dict[str, np.ndarray] = {}
+        found = []  # (position, fixer order, change)
+        for order, fixer in enumerate(FIXERS[entity]):
+            field = fixer.field
+            if field not in columns:
+                columns[field] = pd.Series([row.get(field) for row in rows], dtype=object)
+                present[field] = np.fromiter((field in row for row in rows), dtype=bool, count=n)
+                touched[field] = np.zeros(n, dtype=bool)
+            target = present[field] if fixer.only_if_present else np.ones(n, dtype=bool)
+            if not target.any():
+                continue
+            before = columns[field][target]
+            after = fixer.fn(before, self.ctx)
+            old, new = before.to_numpy(), after.to_numpy()
+            same = (old == new) | (pd.isna(before).to_numpy() & pd.isna(after).to_numpy())
+            if same.all():
+                continue
+            positions = np.flatnonzero(target)[~same]
+            for pos, old_value, new_value in zip(positions.tolist(), old[~same], new[~same]):
+                found.append((pos, order, FixChange(entity, ids[pos], field, old_value, new_value, fixer.fix_code),
+                              bool(present[field][pos])))
+            columns[field].iloc[positions] = new[~same]
+            present[field][positions] = True
+            touched[field][positions] = True
+
+        # Logged row by row, in fixer order within a row, as an earlier change is the next one's old value
+        for pos, _, change, existed in sorted(found, key=lambda item: item[:2]):
+            self._log(change, rows[pos], existed)
+        updates: List[Dict[str, Any]] = [{} for _ in rows]
+        for field, mask in touched.items():
+            values = columns[field].to_numpy()
+            for pos in np.flatnonzero(mask).tolist():
+                updates[pos][field] = values[pos]
+        return updates
+
+    def _dedupe(self, entity: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        seen = set()
+        kept = []
+        id_field = ID_FIELDS[entity]
+        for row in rows:
+            row_id = row.get(id_field)
+            if row_id and row_id not in seen:
+                seen.add(row_id)
+                kept.append(row)
+            elif row_id:
+                self._log(FixChange(entity, row_id, None, None, None, "duplicate_removed"), row)
+        return kept
+
+    def _dedupe_workers(self) -> List[Dict[str, Any]]:
+        # Among duplicate WorkerIDs keep the row covering the most required skills
+        best: Dict[Any, Dict[str, Any]] = {}
+        best_key: Dict[Any, tuple] = {}
+        order = []
+        for worker in self.workers:
+            worker_id = worker.get("WorkerID")
+            if not worker_id:
+                continue
+            skills = set(split_list(worker.get("Skills", "")))
+            key = (len(self.ctx.raw_required_skills & skills), len(skills))
+            if worker_id not in best:
+                order.append(worker_id)
+                best[worker_id], best_key[worker_id] = worker, key
+            else:
+                removed = worker
+                if key > best_key[worker_id]:
+                    removed = best[worker_id]
+                    best[worker_id], best_key[worker_id] = worker, key
+                self._log(FixChange("worker", worker_id, None, None, None, "duplicate_removed"), removed)
+        return [best[w] for w in order]
+
+    def run(self, dry_run: bool = False) -> Dict[str, List[Dict[str, Any]]]:
+        """Compute every fix; unless dry_run, apply them to the row dicts in place"""
+        pending: List[tuple] = []  # (row, updates)
+
+        tasks = self._dedupe("task", self.tasks)
+        self.ctx.task_ids = {t.get("TaskID") for t in tasks}
+        self.ctx.removed_task_ids = {c.id for c in self.changes if c.entity == "task" and c.fix_code == "duplicate_removed"}
+        for task in tasks:
+            self.ctx.raw_required_skills.update(split_list(task.get("RequiredSkills", "")))
+
+        workers = self._dedupe_workers()
+        for worker, updates in zip(workers, self._fix_table("worker", workers)):
+            skills = split_list(updates.get("Skills", worker.get("Skills", "")))
+            self.ctx.available_skills.update(skills)
+            pending.append((worker, updates))
+        self.ctx.skill_index = SkillIndex(sorted(self.ctx.available_skills))
+
+        pending.extend(zip(tasks, self._fix_table("task", tasks)))
+
+        clients = self._dedupe("client", self.clients)
+        pending.extend(zip(clients, self._fix_table("client", clients)))
+
+        # Coverage: required skills nobody has after the fixes above go to as few workers as possible
+        effective = {id(row): updates for row, updates in pending}
+        final_required = [
+            split_list(effective[id(task)].get("RequiredSkills", task.get("RequiredSkills", ""))) for task in tasks
+        ]
+        missing = {s for skills in final_required for s in skills} - self.ctx.available_skills
+        if missing:
+            current_skills = {
+                w.get("WorkerID"): split_list(effective[id(w)].get("Skills", w.get("Skills", ""))) for w in workers
+            }
+            self.skill_cover = SkillCover(workers, current_skills, final_required, missing)
+            by_id = {w.get("WorkerID"): w for w in workers}
+            for worker_id, added in self.skill_cover.assignments.items():
+                worker = by_id[worker_id]
+                updates = effective[id(worker)]
+                current = updates.get("Skills", worker.get("Skills", ""))
+                new = ",".join(split_list(current) + added)
+                updates["Skills"] = new
+                self._log(FixChange("worker", worker_id, "Skills", current, new, "missing_skills_added"), worker, "Skills" in worker or "Skills" in updates)
+
+        if not dry_run:
+            for row, updates in pending:
+                row.update(updates)
+        return {"clients": clients, "workers": workers, "tasks": tasks}
+
+    def summary(self) -> Dict[str, Any]:
+        by_fix = Counter(c.fix_code for c in self.changes)
+        by_entity = Counter(c.entity for c in self.changes)
+        summary = {
+            "total_changes": len(self.changes),
+            "by_fix": dict(sorted(by_fix.items())),
+            "by_entity": dict(sorted(by_entity.items())),
+        }
+        if self.skill_cover is not None:
+            summary["skill_coverage"] = self.skill_cover.to_dict()
+        return summary
+
+    def to_patch(self) -> List[Dict[str, Any]]:
+        """The change log as JSON-Patch-style operations addressed by position in the input tables"""
+        positions = {}
+        for entity, rows in (("client", self.clients), ("worker", self.workers), ("task", self.tasks)):
+            for i, row in enumerate(rows):
+                positions[id(row)] = i
+        ops = []
+        for change, (row, existed) in zip(self.changes, self._change_rows):
+            path = f"/{TABLES[change.entity]}/{positions[id(row)]}"
+            if change.field is None:
+                ops.append({"op": "remove", "path": path, "id": change.id, "fix_code": change.fix_code})
+            else:
+                ops.append({
+                    "op": "replace" if existed else "add",
+                    "path": f"{path}/{change.field}",
+                    "id": change.id,
+                    "old": change.old,
+                    "value": change.new,
+                    "fix_code": change.fix_code,
+                })
+        return ops
+
+
+def apply_patch(tables: Dict[str, List[Dict[str, Any]]], ops: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Apply an accepted subset of a fix patch in place.
+
+    Each op is checked against the row ID at its position and, for field
+    ops, the expected old value; mismatching ops are skipped, not forced.
+    Removals run last, from the highest position down, so positions stay valid.
+    """
+    applied = 0
+    skipped = []
+    removals: Dict[str, List[tuple]] = {}
+    entity_of = {table: entity for entity, table in TABLES.items()}
+
+    for op in ops:
+        parts = str(op.get("path", "")).strip("/").split("/")
+        table = parts[0] if parts else ""
+        rows = tables.get(table)
+        if rows is None or len(parts) < 2 or not parts[1].isdigit():
+            skipped.append({"op": op, "reason": "invalid path"})
+            continue
+        pos = int(parts[1])
+        if pos >= len(rows) or rows[pos].get(ID_FIELDS[entity_of[table]]) != op.get("id"):
+            skipped.append({"op": op, "reason": "row moved or missing"})
+            continue
+        row = rows[pos]
+
+        if op.get("op") == "remove" and len(parts) == 2:
+            removals.setdefault(table, []).append((pos, op))
+        elif op.get("op") in ("replace", "add") and len(parts) == 3:
+            field = parts[2]
+            if row.get(field) != op.get("old"):
+                skipped.append({"op": op, "reason": "value changed since dry-run"})
+                continue
+            row[field] = op.get("value")
+            applied += 1
+        else:
+            skipped.append({"op": op, "reason": "unsupported op"})
+
+    for table, items in removals.items():
+        for pos, op in sorted(items, key=lambda item: item[0], reverse=True):
+            del tables[table][pos]
+            applied += 1
+
+    return {"applied": applied, "skipped": skipped}
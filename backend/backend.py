@@ -1,13 +1,36 @@
 import os
+import copy
 import json
+import hashlib
+import functools
+import threading
 import pandas as pd
-from typing import List, Dict, Any, Optional
-from azure.ai.inference import ChatCompletionsClient
-from azure.ai.inference.models import SystemMessage, UserMessage
-from azure.core.credentials import AzureKeyCredential
+from typing import List, Dict, Any, Optional, Union, Iterator, Iterable, Tuple
 from dotenv import load_dotenv
 from datetime import datetime
 import time
+from rule_planner import RulePlan
+from column_store import ColumnStore
+from rule_preview import preview_rules
+from corun_groups import CoRunGroups
+from auto_fix import AutoFixPipeline, apply_patch, ID_FIELDS, TABLES
+from skill_index import SkillIndex
+from scheduler import SchedulingProblem, GreedyScheduler, normalize_weights
+from milp_scheduler import MILPScheduler, solver_limits
+from scenarios import evaluate_scenarios
+from capacity import CapacityReport
+from client_scores import ClientScorer
+from join_view import EligibilityJoin
+from llm_client import GPTAgent, DatasetAgent, shared_agent
+from llm_cache import bypass_cache, cache_key
+from query_planner import planner_prompt, parse_spec, validate_spec, spec_key, execute_spec, RESULT_KEYS
+from text_index import TextIndex, row_key
+from vector_index import VectorIndex
+from prompt_context import DatasetSummary
+from ai_validation import BatchValidator
+from modify_ops import validate_ops, plan_ops, modify_prompt
+from rule_mining import mine_rules, phrasing_prompt, apply_phrasing, phrase_rule
+from json_stream import JSONStream
 
 load_dotenv()
 
@@ -57,6 +80,23 @@ class AIDataValidator:
             parts.append(f"{key}: {val}")
         return " | ".join(parts)
 
+    def _parse_phases(self, val: Any) -> List[int]:
+        # Accepts "[1,2]", "1-3", "2" or a list
+        if isinstance(val, str):
+            try:
+                if val.startswith("["):
+                    return json.loads(val)
+                elif "-" in val:
+                    start, end = map(int, val.split("-"))
+                    return list(range(start, end + 1))
+                else:
+                    return [int(val)]
+            except Exception:
+                return []
+        elif isinstance(val, list):
+            return val
+        return []
+
     def _get_required_columns_for_row(self, row: Dict[str, Any]) -> List[str]:
         if "ClientID" in row:
             return self.required_columns_client
@@ -67,7 +107,8 @@ class AIDataValidator:
         else:
             return []
 
-    def validate_data(self, data: List[Dict[str, Any]]) -> List[ValidationError]:
+    def validate_data(self, data: List[Dict[str, Any]], corun_components: List[List[str]] = None,
+                      join: Optional[EligibilityJoin] = None) -> List[ValidationError]:
         errors = []
 
         # Sets for duplicate checks
@@ -123,111 +164,24 @@ class AIDataValidator:
                     ))
                 task_ids.add(row["TaskID"])
 
-            # c. Malformed lists
-            if "AvailableSlots" in row:
-                try:
-                    slots = row.get("AvailableSlots", [])
-                    if isinstance(slots, str):
-                        slots = json.loads(slots)
-                    if not all(isinstance(x, int) for x in slots):
-                        errors.append(ValidationError(
-                            "malformed_list",
-                            "AvailableSlots contains non-integer values",
-                            {"row": row}
-                        ))
-                except Exception:
-                    errors.append(ValidationError(
-                        "malformed_list",
-                        "Invalid AvailableSlots format",
-                        {"row": row}
-                    ))
-
-            # d. Out-of-range values
-            if "PriorityLevel" in row:
-                if row["PriorityLevel"] < 1 or row["PriorityLevel"] > 5:
-                    errors.append(ValidationError(
-                        "out_of_range",
-                        "PriorityLevel must be between 1 and 5",
-                        {"value": row["PriorityLevel"]}
-                    ))
-
-            if "Duration" in row:
-                if row["Duration"] < 1:
-                    errors.append(ValidationError(
-                        "out_of_range",
-                        "Duration must be at least 1",
-                        {"value": row["Duration"]}
-                    ))
-
-            # e. Broken JSON in AttributesJSON (clients)
-            if "AttributesJSON" in row:
-                try:
-                    attr_json = row.get("AttributesJSON", {})
-                    if isinstance(attr_json, str):
-                        attr_json = json.loads(attr_json)
-                    if not isinstance(attr_json, dict):
-                        errors.append(ValidationError(
-                            "invalid_json",
-                            "AttributesJSON must be a valid JSON object",
-                            {"row": row}
-                        ))
-                except Exception:
-                    errors.append(ValidationError(
-                        "invalid_json",
-                        "Invalid AttributesJSON format",
-                        {"row": row}
-                    ))
+            # c-e. Malformed lists, out-of-range values, broken AttributesJSON
+            errors.extend(self._field_errors(row))
 
             # f. Track phase durations for saturation checks
             phases = []
             if "Phase" in row:
                 phases = [row["Phase"]]
             elif "PreferredPhases" in row:
-                val = row["PreferredPhases"]
-                if isinstance(val, str):
-                    try:
-                        if val.startswith("["):
-                            phases = json.loads(val)
-                        elif "-" in val:
-                            start, end = map(int, val.split("-"))
-                            phases = list(range(start, end + 1))
-                        else:
-                            phases = [int(val)]
-                    except Exception:
-                        phases = []
-                elif isinstance(val, list):
-                    phases = val
+                phases = self._parse_phases(row["PreferredPhases"])
             for phase in phases:
                 phase_durations[phase] = phase_durations.get(phase, 0) + row.get("Duration", 0)
 
             # g. Track worker skills & required skills
             if "WorkerID" in row:
-                skills_raw = row.get("Skills", "")
-                skills_list = []
-                try:
-                    if isinstance(skills_raw, str):
-                        skills_list = [s.strip() for s in skills_raw.split(",")]
-                    elif isinstance(skills_raw, list):
-                        skills_list = [str(s).strip() for s in skills_raw]
-                    else:
-                        skills_list = []
-                except Exception:
-                    skills_list = []
-                worker_skills[row["WorkerID"]] = set(skills_list)
+                worker_skills[row["WorkerID"]] = set(self._skill_list(row.get("Skills", "")))
             
             if "RequiredSkills" in row:
-                req_raw = row.get("RequiredSkills", "")
-                req_list = []
-                try:
-                    if isinstance(req_raw, str):
-                        req_list = [s.strip() for s in req_raw.split(",")]
-                    elif isinstance(req_raw, list):
-                        req_list = [str(s).strip() for s in req_raw]
-                    else:
-                        req_list = []
-                except Exception:
-                    req_list = []
-                for sk in req_list:
+                for sk in self._skill_list(row.get("RequiredSkills", "")):
                     required_skills.add(sk)
 
             # h. CoRunGroups for circular dependency (optional, if present)
@@ -237,17 +191,7 @@ class AIDataValidator:
         # i. Unknown references - check RequestedTaskIDs in clients
         all_task_ids = task_ids
         for row in data:
-            if "RequestedTaskIDs" in row:
-                requested = row["RequestedTaskIDs"]
-                if isinstance(requested, str):
-                    requested = [x.strip() for x in requested.split(",")]
-                unknown = set(requested) - all_task_ids
-                if unknown:
-                    errors.append(ValidationError(
-                        "unknown_reference",
-                        f"RequestedTaskIDs refer unknown tasks: {unknown}",
-                        {"row": row}
-                    ))
+            errors.extend(self._reference_errors(row, all_task_ids))
 
         # j. Circular co-run groups detection
         def find_cycle(graph, start, visited=None, path=None):
@@ -274,21 +218,18 @@ class AIDataValidator:
                     {"task": t_id}
                 ))
 
+        # j2. Co-run components must share at least one preferred phase
+        if corun_components:
+            task_phases = {
+                row["TaskID"]: set(self._parse_phases(row.get("PreferredPhases", "")))
+                for row in data if "TaskID" in row
+            }
+            for component in corun_components:
+                errors.extend(self._corun_phase_errors(component, task_phases))
+
         # k. Worker load vs slots check
         for row in data:
-            if "AvailableSlots" in row and "MaxLoadPerPhase" in row:
-                slots = row["AvailableSlots"]
-                if isinstance(slots, str):
-                    try:
-                        slots = json.loads(slots)
-                    except Exception:
-                        slots = []
-                if len(slots) < row["MaxLoadPerPhase"]:
-                    errors.append(ValidationError(
-                        "overloaded_worker",
-                        f"Worker {row.get('WorkerID', 'unknown')} has fewer available slots than MaxLoadPerPhase",
-                        {"row": row}
-                    ))
+            errors.extend(self._load_errors(row))
 
         # l. Phase slot saturation check
         for phase, dur in phase_durations.items():
@@ -298,20 +239,7 @@ class AIDataValidator:
                 if "Phase" in row:
                     row_phases = [row["Phase"]]
                 elif "PreferredPhases" in row:
-                    val = row["PreferredPhases"]
-                    if isinstance(val, str):
-                        try:
-                            if val.startswith("["):
-                                row_phases = json.loads(val)
-                            elif "-" in val:
-                                start, end = map(int, val.split("-"))
-                                row_phases = list(range(start, end + 1))
-                            else:
-                                row_phases = [int(val)]
-                        except Exception:
-                            row_phases = []
-                    elif isinstance(val, list):
-                        row_phases = val
+                    row_phases = self._parse_phases(row["PreferredPhases"])
                 if phase in row_phases:
                     slots = row.get("AvailableSlots", [])
                     if isinstance(slots, str):
@@ -328,123 +256,348 @@ class AIDataValidator:
                 ))
 
         # m. Skill coverage check
+        errors.extend(self._coverage_errors(required_skills, worker_skills))
+
+        # n. MaxConcurrent feasibility
+        # The join counts the first row per WorkerID, drops blank skill names and ignores list-valued
+        # Skills, while worker_skills above keeps the last complete row. Any of those differences falls
+        # back to rescanning, so an empty RequiredSkills string still needs a skill nobody has.
+        duplicate_workers = any(e.error_type == "duplicate_id" and "WorkerID" in e.message for e in errors)
+        eligible_counts = self._join_counts(data, worker_skills, join, duplicate_workers)
+        for row in data:
+            errors.extend(self._concurrency_errors(row, worker_skills, join, eligible_counts))
+
+        # o. Requested tasks that no worker can serve
+        if join is not None:
+            errors.extend(self._unservable_errors(join.unservable_requests()))
+
+        return errors
+
+    def validate_touched(self, clients: List[Dict[str, Any]], workers: List[Dict[str, Any]], tasks: List[Dict[str, Any]],
+                         touched: Dict[str, set], old_skills: Iterable[str] = (),
+                         corun_components: List[List[str]] = None,
+                         join: Optional[EligibilityJoin] = None) -> List[ValidationError]:
+        """The validate_data findings that editing fields of the touched rows in place can change.
+
+        touched maps "clients", "workers" and "tasks" to edited IDs;
+        old_skills are the Skills edited workers had before the edit.
+        Edited rows get the per-row checks, and edited clients and clients
+        requesting an edited task have their RequestedTaskIDs resolved.
+        Affected tasks (edited ones, plus tasks needing a skill an edited
+        worker had or has) get the skill coverage, MaxConcurrent and co-run
+        phase checks, and requests for them are checked against the join.
+        Edits never change IDs, so the duplicate and co-run cycle checks are
+        left to validate_data, as is the dataset-wide phase saturation check.
+        """
+        errors = []
+
+        def complete(row):
+            return all(col in row for col in self._get_required_columns_for_row(row))
+
+        worker_rows = [row for row in workers if "WorkerID" in row and complete(row)]
+        task_rows = [row for row in tasks if complete(row)]
+        worker_skills = {row["WorkerID"]: set(self._skill_list(row.get("Skills", ""))) for row in worker_rows}
+        task_ids = {row["TaskID"] for row in task_rows if "TaskID" in row}
+
+        for rows, table, id_field in ((clients, "clients", "ClientID"), (workers, "workers", "WorkerID"),
+                                      (tasks, "tasks", "TaskID")):
+            ids = touched.get(table, set())
+            for row in (rows if ids else ()):
+                if row.get(id_field) not in ids:
+                    continue
+                missing_cols = [col for col in self._get_required_columns_for_row(row) if col not in row]
+                if missing_cols:
+                    errors.append(ValidationError(
+                        "missing_columns",
+                        f"Missing required columns: {', '.join(missing_cols)}",
+                        {"row": row}
+                    ))
+                else:
+                    errors.extend(self._field_errors(row))
+                errors.extend(self._reference_errors(row, task_ids))
+                errors.extend(self._load_errors(row))
+
+        # Filling in a missing column of a task makes its ID known to the clients requesting it
+        edited_tasks = touched.get("tasks", set())
+        for row in (clients if edited_tasks else ()):
+            if (row.get("ClientID") not in touched.get("clients", ())
+                    and edited_tasks.intersection(self._skill_list(row.get("RequestedTaskIDs")))):
+                errors.extend(self._reference_errors(row, task_ids))
+
+        changed_skills = set(old_skills)
+        for row in worker_rows:
+            if row["WorkerID"] in touched.get("workers", ()):
+                changed_skills |= worker_skills[row["WorkerID"]]
+        affected = [row for row in tasks if "TaskID" in row and (
+            row["TaskID"] in touched.get("tasks", ())
+            or changed_skills.intersection(self._skill_list(row.get("RequiredSkills", ""))))]
+        affected_ids = {row["TaskID"] for row in affected}
+
+        required_skills = {skill for row in affected if complete(row)
+                           for skill in self._skill_list(row.get("RequiredSkills", ""))}
+        errors.extend(self._coverage_errors(required_skills, worker_skills))
+
+        if corun_components:
+            components = [c for c in corun_components if affected_ids.intersection(c)]
+            members = {t for c in components for t in c}
+            task_phases = {
+                row["TaskID"]: set(self._parse_phases(row.get("PreferredPhases", "")))
+                for row in tasks if row.get("TaskID") in members
+            }
+            for component in components:
+                errors.extend(self._corun_phase_errors(component, task_phases))
+
+        duplicate_workers = len(worker_skills) < len(worker_rows)
+        eligible_counts = self._join_counts(workers, worker_skills, join, duplicate_workers)
+        for row in affected:
+            errors.extend(self._concurrency_errors(row, worker_skills, join, eligible_counts))
+
+        if join is not None:
+            clients_touched = touched.get("clients", set())
+            errors.extend(self._unservable_errors(
+                (client_id, task_id) for client_id, task_id in join.unservable_requests()
+                if client_id in clients_touched or task_id in affected_ids
+            ))
+        return errors
+
+    def _field_errors(self, row: Dict[str, Any]) -> List[ValidationError]:
+        """Checks that only look at one row's own fields"""
+        errors = []
+        # c. Malformed lists
+        if "AvailableSlots" in row:
+            try:
+                slots = row.get("AvailableSlots", [])
+                if isinstance(slots, str):
+                    slots = json.loads(slots)
+                if not all(isinstance(x, int) for x in slots):
+                    errors.append(ValidationError(
+                        "malformed_list",
+                        "AvailableSlots contains non-integer values",
+                        {"row": row}
+                    ))
+            except Exception:
+                errors.append(ValidationError(
+                    "malformed_list",
+                    "Invalid AvailableSlots format",
+                    {"row": row}
+                ))
+
+        # d. Out-of-range values
+        if "PriorityLevel" in row:
+            if row["PriorityLevel"] < 1 or row["PriorityLevel"] > 5:
+                errors.append(ValidationError(
+                    "out_of_range",
+                    "PriorityLevel must be between 1 and 5",
+                    {"value": row["PriorityLevel"], "row": row}
+                ))
+
+        if "Duration" in row:
+            if row["Duration"] < 1:
+                errors.append(ValidationError(
+                    "out_of_range",
+                    "Duration must be at least 1",
+                    {"value": row["Duration"], "row": row}
+                ))
+
+        # e. Broken JSON in AttributesJSON (clients)
+        if "AttributesJSON" in row:
+            try:
+                attr_json = row.get("AttributesJSON", {})
+                if isinstance(attr_json, str):
+                    attr_json = json.loads(attr_json)
+                if not isinstance(attr_json, dict):
+                    errors.append(ValidationError(
+                        "invalid_json",
+                        "AttributesJSON must be a valid JSON object",
+                        {"row": row}
+                    ))
+            except Exception:
+                errors.append(ValidationError(
+                    "invalid_json",
+                    "Invalid AttributesJSON format",
+                    {"row": row}
+                ))
+        return errors
+
+    def _skill_list(self, raw: Any) -> List[str]:
+        try:
+            if isinstance(raw, str):
+                return [s.strip() for s in raw.split(",")]
+            elif isinstance(raw, list):
+                return [str(s).strip() for s in raw]
+        except Exception:
+            pass
+        return []
+
+    def _reference_errors(self, row: Dict[str, Any], task_ids: set) -> List[ValidationError]:
+        if "RequestedTaskIDs" not in row:
+            return []
+        requested = row["RequestedTaskIDs"]
+        if isinstance(requested, str):
+            requested = [x.strip() for x in requested.split(",")]
+        unknown = set(requested) - task_ids
+        if not unknown:
+            return []
+        return [ValidationError(
+            "unknown_reference",
+            f"RequestedTaskIDs refer unknown tasks: {unknown}",
+            {"row": row}
+        )]
+
+    def _corun_phase_errors(self, component: List[str], task_phases: Dict[Any, set]) -> List[ValidationError]:
+        known = [t for t in component if t in task_phases and task_phases[t]]
+        if len(known) > 1 and not set.intersection(*(task_phases[t] for t in known)):
+            return [ValidationError(
+                "corun_phase_conflict",
+                f"Co-run tasks {', '.join(map(str, known))} share no preferred phase",
+                {"tasks": known}
+            )]
+        return []
+
+    def _load_errors(self, row: Dict[str, Any]) -> List[ValidationError]:
+        if "AvailableSlots" not in row or "MaxLoadPerPhase" not in row:
+            return []
+        slots = row["AvailableSlots"]
+        if isinstance(slots, str):
+            try:
+                slots = json.loads(slots)
+            except Exception:
+                slots = []
+        if len(slots) < row["MaxLoadPerPhase"]:
+            return [ValidationError(
+                "overloaded_worker",
+                f"Worker {row.get('WorkerID', 'unknown')} has fewer available slots than MaxLoadPerPhase",
+                {"row": row}
+            )]
+        return []
+
+    def _coverage_errors(self, required_skills: set, worker_skills: Dict[Any, set]) -> List[ValidationError]:
+        errors = []
+        known_skills = set().union(*worker_skills.values()) if worker_skills else set()
+        skill_index = None
         for skill in required_skills:
-            workers_with_skill = sum(1 for skills in worker_skills.values() if skill in skills)
-            if workers_with_skill == 0:
+            if skill not in known_skills:
+                if skill_index is None:
+                    skill_index = SkillIndex(sorted(known_skills))
+                suggestion = skill_index.nearest(skill)
+                message = f"No workers with required skill '{skill}' found"
+                if suggestion:
+                    message += f" (did you mean '{suggestion}'?)"
                 errors.append(ValidationError(
                     "skill_coverage",
-                    f"No workers with required skill '{skill}' found",
-                    {"skill": skill}
+                    message,
+                    {"skill": skill, "suggestion": suggestion}
                 ))
+        return errors
 
-        # n. MaxConcurrent feasibility
-        for row in data:
-            req_skills = row.get("RequiredSkills", [])
-            if isinstance(req_skills, str):
-                req_skills = [s.strip() for s in req_skills.split(",")]
+    def _join_counts(self, data: List[Dict[str, Any]], worker_skills: Dict[Any, set],
+                     join: Optional[EligibilityJoin], duplicate_workers: bool):
+        """Eligible workers per task from the join, or None when they could differ from a rescan"""
+        listed_skills = any(isinstance(row.get("Skills"), list) for row in data if "WorkerID" in row)
+        same_workers = join is not None and worker_skills.keys() == join.worker_pos.keys()
+        return join.eligible_counts() if same_workers and not (duplicate_workers or listed_skills) else None
+
+    def _concurrency_errors(self, row: Dict[str, Any], worker_skills: Dict[Any, set],
+                            join: Optional[EligibilityJoin], eligible_counts) -> List[ValidationError]:
+        if "TaskID" not in row and "RequiredSkills" not in row:
+            return []  # client and worker rows
+        req_raw = row.get("RequiredSkills", [])
+        req_skills = [s.strip() for s in req_raw.split(",")] if isinstance(req_raw, str) else req_raw
+        if (eligible_counts is not None and isinstance(req_raw, str) and all(req_skills)
+                and row.get("TaskID") in join.task_pos):
+            qualified_workers = int(eligible_counts[join.task_pos[row["TaskID"]]])
+        elif not req_skills:
+            qualified_workers = len(worker_skills)  # nothing required, so every worker qualifies
+        else:
             qualified_workers = sum(
                 1 for ws in worker_skills.values() if all(skill in ws for skill in req_skills)
             )
-            if row.get("MaxConcurrent", 0) > qualified_workers:
-                errors.append(ValidationError(
-                    "concurrency_infeasible",
-                    f"MaxConcurrent ({row.get('MaxConcurrent')}) exceeds qualified workers ({qualified_workers}) for task {row.get('TaskID')}",
-                    {"task": row.get('TaskID')}
-                ))
+        if row.get("MaxConcurrent", 0) > qualified_workers:
+            return [ValidationError(
+                "concurrency_infeasible",
+                f"MaxConcurrent ({row.get('MaxConcurrent')}) exceeds qualified workers ({qualified_workers}) for task {row.get('TaskID')}",
+                {"task": row.get('TaskID')}
+            )]
+        return []
 
-        return errors
+    def _unservable_errors(self, pairs) -> List[ValidationError]:
+        return [ValidationError(
+            "unservable_request",
+            f"Client {client_id} requests task {task_id}, but no worker has all its required skills",
+            {"client": client_id, "task": task_id}
+        ) for client_id, task_id in pairs]
 
-    def search(self, query: str, data: List[Dict[str, Any]], top_k=3):
-        """AI-based search functionality"""
-        if not self.gpt_agent or not data:
+    def search(self, query: str, data: List[Dict[str, Any]], top_k=3,
+               index: Optional[Union[TextIndex, VectorIndex]] = None, rerank: bool = False) -> List[Dict[str, Any]]:
+        """Keyword search over every row with BM25, tolerant of typos; works without a model.
+
+        Pass a maintained index to skip indexing data again; a VectorIndex
+        ranks by semantic similarity instead. With rerank, the model
+        reorders only the top candidates.
+        """
+        if not data or not query.strip():
             return []
-        
-        # Use AI to search through data
+        if index is None:
+            index = TextIndex(self._row_to_text)
+            index.sync(data)
+        rows = [row for _, row in index.search(query, top_k)]
+        if rerank and self.gpt_agent and len(rows) > 1:
+            rows = self.rerank(query, rows)
+        return rows
+
+    def rerank(self, query: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Let the model reorder a short candidate list; keeps the given order if it answers badly"""
+        candidates = "\n".join(f"{i}. {self._row_to_text(row)}" for i, row in enumerate(rows))
         prompt = f"""
-        You are a data search assistant. Find the most relevant records from the dataset based on the query.
-        
+        Rank these records by relevance to the query, most relevant first.
+
         Query: "{query}"
-        
-        Dataset sample (first 10 records):
-        {json.dumps(data[:10], indent=2)}
-        
-        Return the top {top_k} most relevant records as a JSON array.
-        Consider similarity in content, structure, and context.
-        Return only the JSON array, no explanations.
+
+        Records:
+        {candidates}
+
+        Return only a JSON array of the record numbers, e.g. [2, 0, 1].
         """
-        
         try:
             result_str = self.gpt_agent.chat_completion(
-                system_prompt="You are a data search AI. Return only valid JSON arrays.",
+                system_prompt="You are a search ranking AI. Return only a JSON array of integers.",
                 user_prompt=prompt
-            )
-            
-            # Clean and parse response
-            result_str = result_str.strip()
-            if result_str.startswith('```'):
-                lines = result_str.split('\n')
-                result_str = '\n'.join(lines[1:-1])
-            
-            start = result_str.find('[')
-            end = result_str.rfind(']')
-            
-            if start != -1 and end != -1 and end > start:
-                json_str = result_str[start:end+1]
-                results = json.loads(json_str)
-                return results[:top_k] if isinstance(results, list) else []
-            
-            return []
+            ).strip()
+            start, end = result_str.find('['), result_str.rfind(']')
+            order = json.loads(result_str[start:end + 1]) if start != -1 and end > start else []
         except Exception as e:
-            print(f"AI search error: {e}")
-            return []
+            print(f"AI rerank error: {e}")
+            return rows
+        ranked = list(dict.fromkeys(i for i in order if isinstance(i, int) and 0 <= i < len(rows)))
+        # Candidates the model left out keep their BM25 order after the ones it ranked
+        ranked += [i for i in range(len(rows)) if i not in ranked]
+        return [rows[i] for i in ranked]
 
-# --------- GPTAgent Wrapper ---------
-class GPTAgent:
-    def __init__(self):
-        github_token = os.getenv("GITHUB_TOKEN")
-        if not github_token:
-            raise ValueError("Missing GITHUB_TOKEN env variable")
+# --------- Core Functionalities ---------
+PLANNER_SYSTEM_PROMPT = "You translate data search requests into JSON filter specs. Return only JSON."
+PHRASING_SYSTEM_PROMPT = "You name and describe scheduling rules. Return only a JSON array."
 
-        endpoint = os.getenv("GITHUB_AI_ENDPOINT", "https://models.github.ai/inference")
-        model = os.getenv("GITHUB_AI_MODEL", "mistral-ai/mistral-medium-2505")
 
-        self.client = ChatCompletionsClient(
-            endpoint=endpoint,
-            credential=AzureKeyCredential(github_token)
-        )
-        self.model_name = model
+def result_category(row: Any) -> Optional[str]:
+    """"clients", "workers" or "tasks" for a search result row, by its ID column"""
+    if not isinstance(row, dict):
+        return None
+    for field, key in (("ClientID", "clients"), ("WorkerID", "workers"), ("TaskID", "tasks")):
+        if field in row:
+            return key
+    return None
 
-    def chat_completion(self, system_prompt: str, user_prompt: str) -> str:
-        messages = [
-            SystemMessage(content=system_prompt),
-            UserMessage(content=user_prompt)
-        ]
-    
-        response = self.client.complete(
-            messages=messages,
-            model=self.model_name,
-            temperature=0.7,
-            top_p=1.0,
-            max_tokens=1000
-        )
-    
-        return response.choices[0].message.content
 
-# --------- Core Functionalities ---------
-def natural_language_search(gpt_agent: GPTAgent, data: List[Dict[str, Any]], query: str) -> Dict[str, Any]:
-    print(f"=== DEBUG natural_language_search ===")
-    print(f"Input data length: {len(data)}")
-    print(f"Query: '{query}'")
-    
-    if not data:
-        print("ERROR: No data provided to search function")
-        return {"clients": [], "workers": [], "tasks": []}
+def stream_json(gpt_agent: GPTAgent, prompt: Dict[str, str], mode: str, bypass: bool = False) -> Iterator[Tuple[str, Any]]:
+    """("token", text) for each piece of the model's answer and ("value", v) for each JSON value as it completes"""
+    parser = JSONStream(mode)
+    for piece in gpt_agent.stream_completion(prompt["system"], prompt["user"], bypass=bypass):
+        yield "token", piece
+        for value in parser.feed(piece):
+            yield "value", value
 
-    # Print first few records to see what we're working with
-    print(f"First 3 data samples:")
-    for i, item in enumerate(data[:3]):
-        print(f"  Record {i}: {item}")
 
+def search_prompt(data: List[Dict[str, Any]], query: str, context: Optional[str] = None) -> Dict[str, str]:
     # Create a more comprehensive data sample for context
     sample_size = min(20, len(data))
     data_sample = data[:sample_size]
@@ -458,16 +611,14 @@ def natural_language_search(gpt_agent: GPTAgent, data: List[Dict[str, Any]], que
     if any("TaskID" in item for item in data_sample):
         data_types.append("tasks")
 
-    print(f"Detected data types: {data_types}")
-
-    prompt = f"""
+    user = f"""
 You are a data search assistant. Analyze the user's query and return relevant data from the dataset.
 
 Available data types: {', '.join(data_types)}
 Total records available: {len(data)}
 
-Sample data structure:
-{json.dumps(data_sample[:5], indent=2)}
+Dataset summary:
+{context or DatasetSummary.from_rows(data).render()}
 
 User Query: "{query}"
 
@@ -483,11 +634,29 @@ Instructions:
 
 Response format: [{{record1}}, {{record2}}, ...]
 """
+    return {"system": "You are a data search AI. Return only valid JSON arrays of data records.", "user": user}
+
 
+def natural_language_search(gpt_agent: GPTAgent, data: List[Dict[str, Any]], query: str,
+                            context: Optional[str] = None) -> Dict[str, Any]:
+    print(f"=== DEBUG natural_language_search ===")
+    print(f"Input data length: {len(data)}")
+    print(f"Query: '{query}'")
+    
+    if not data:
+        print("ERROR: No data provided to search function")
+        return {"clients": [], "workers": [], "tasks": []}
+
+    # Print first few records to see what we're working with
+    print(f"First 3 data samples:")
+    for i, item in enumerate(data[:3]):
+        print(f"  Record {i}: {item}")
+
+    prompt = search_prompt(data, query, context)
     print("Sending prompt to GPT...")
     result_str = gpt_agent.chat_completion(
-        system_prompt="You are a data search AI. Return only valid JSON arrays of data records.",
-        user_prompt=prompt
+        system_prompt=prompt["system"],
+        user_prompt=prompt["user"]
     )
     
     print(f"GPT Response (first 200 chars): {repr(result_str[:200])}")
@@ -522,12 +691,8 @@ Response format: [{{record1}}, {{record2}}, ...]
                 }
                 
                 for item in raw_results:
-                    if "ClientID" in item:
-                        categorized_results["clients"].append(item)
-                    elif "WorkerID" in item:
-                        categorized_results["workers"].append(item)
-                    elif "TaskID" in item:
-                        categorized_results["tasks"].append(item)
+                    if result_category(item):
+                        categorized_results[result_category(item)].append(item)
                 
                 print(f"Categorized results - Clients: {len(categorized_results['clients'])}, Workers: {len(categorized_results['workers'])}, Tasks: {len(categorized_results['tasks'])}")
                 return categorized_results
@@ -546,12 +711,8 @@ Response format: [{{record1}}, {{record2}}, ...]
             }
             
             for item in raw_results:
-                if "ClientID" in item:
-                    categorized_results["clients"].append(item)
-                elif "WorkerID" in item:
-                    categorized_results["workers"].append(item)
-                elif "TaskID" in item:
-                    categorized_results["tasks"].append(item)
+                if result_category(item):
+                    categorized_results[result_category(item)].append(item)
             
             return categorized_results
             
@@ -563,53 +724,21 @@ Response format: [{{record1}}, {{record2}}, ...]
         print(f"Raw AI response: {repr(result_str)}")
         return {"clients": [], "workers": [], "tasks": []}
 
-def natural_language_modify(gpt_agent: GPTAgent, data: List[Dict[str, Any]], command: str) -> Dict[str, Any]:
-    # Prompt GPT to suggest modifications based on user command
-    prompt = f"""
-You are a data modification assistant.
-
-Data sample (up to 10 entries):
-{json.dumps(data[:10], indent=2)}
-
-User command: "{command}"
-
-Suggest the changes as a JSON object with keys: "suggested_changes", "updated_data"
-Return only JSON.
-"""
+def natural_language_modify(gpt_agent: GPTAgent, command: str, context: str) -> List[Dict[str, Any]]:
+    """Have the model turn an edit command into validated bulk-edit operations; raises ValueError"""
     result_str = gpt_agent.chat_completion(
-        system_prompt="You suggest modifications to the data based on commands.",
-        user_prompt=prompt
+        system_prompt="You translate data edit commands into JSON bulk-edit operations. Return only JSON.",
+        user_prompt=modify_prompt(command, context)
     )
-    try:
-        changes = json.loads(result_str)
-        return changes
-    except Exception:
-        return {"suggested_changes": [], "updated_data": []}
+    return validate_ops(parse_spec(result_str))
 
-def nl_to_rule(
-    gpt_agent: GPTAgent,
-    user_rule_request: str,
-    clients: List[Dict[str, Any]],
-    workers: List[Dict[str, Any]],
-    tasks: List[Dict[str, Any]]
-) -> Optional[Dict[str, Any]]:
-    """
-    Converts a user-provided natural language rule into a structured BusinessRule object
-    using a language model agent and a sample of the dataset for context.
-    """
-    prompt = {
+def rule_prompt(user_rule_request: str, context: str) -> Dict[str, str]:
+    return {
         "system": "You are an expert AI rules converter that transforms natural language descriptions of allocation rules into structured JSON rule objects.",
         "user": f'''
 Analyze the following data to understand the context and create a rule:
 
-Clients (sample):
-{json.dumps(clients[:5], indent=2)}
-
-Workers (sample):
-{json.dumps(workers[:5], indent=2)}
-
-Tasks (sample):
-{json.dumps(tasks[:5], indent=2)}
+{context}
 
 Convert the following natural language rule description into a structured JSON rule:
 \"\"\"{user_rule_request.strip()}\"\"\"
@@ -638,6 +767,21 @@ Return only the JSON object. Do not include explanations and code blocks and thi
 '''
     }
 
+
+def nl_to_rule(
+    gpt_agent: GPTAgent,
+    user_rule_request: str,
+    clients: List[Dict[str, Any]],
+    workers: List[Dict[str, Any]],
+    tasks: List[Dict[str, Any]],
+    context: Optional[str] = None
+) -> Optional[Dict[str, Any]]:
+    """
+    Converts a user-provided natural language rule into a structured BusinessRule object
+    using a language model agent and a summary of the dataset for context.
+    """
+    prompt = rule_prompt(user_rule_request, context or DatasetSummary(clients, workers, tasks).render())
+
     result_str = gpt_agent.chat_completion(
         system_prompt=prompt["system"],
         user_prompt=prompt["user"]
@@ -678,21 +822,14 @@ Return only the JSON object. Do not include explanations and code blocks and thi
         print("Failed to parse rule JSON:", e)
         return None
 
-def recommend_rules(
-    gpt_agent: GPTAgent,
-    clients: List[Dict[str, Any]],
-    workers: List[Dict[str, Any]],
-    tasks: List[Dict[str, Any]]
-) -> List[Dict[str, Any]]:
-    prompt = f"""
+def recommend_prompt(context: str) -> Dict[str, str]:
+    user = f"""
 You are an AI analyst specialized in scheduling and allocation business rules.
 
 Analyze the data below and suggest 3-5 practical business rules for task allocation and scheduling.
 
 Available Data:
-Clients: {json.dumps(clients[:5], indent=2)}
-Workers: {json.dumps(workers[:5], indent=2)}  
-Tasks: {json.dumps(tasks[:5], indent=2)}
+{context}
 
 Based on this data, suggest rules in these categories:
 - Priority Rules: Boost/lower priority based on client attributes
@@ -714,13 +851,24 @@ Return ONLY a valid JSON array of rule objects. No explanations, no markdown, no
 
 Example format: [{{"id": "rule1", "name": "...", "type": "priorityRule", ...}}, {{"id": "rule2", ...}}]
 """
+    return {"system": "You are a business rules AI. Return only valid JSON arrays of rule objects.", "user": user}
+
+
+def recommend_rules(
+    gpt_agent: GPTAgent,
+    clients: List[Dict[str, Any]],
+    workers: List[Dict[str, Any]],
+    tasks: List[Dict[str, Any]],
+    context: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    prompt = recommend_prompt(context or DatasetSummary(clients, workers, tasks).render())
 
     print("=== DEBUG recommend_rules ===")
     print("Sending prompt to GPT for rule recommendations...")
     
     result_str = gpt_agent.chat_completion(
-        system_prompt="You are a business rules AI. Return only valid JSON arrays of rule objects.",
-        user_prompt=prompt
+        system_prompt=prompt["system"],
+        user_prompt=prompt["user"]
     )
     
     print(f"GPT Response (first 200 chars): {repr(result_str[:200])}")
@@ -760,10 +908,23 @@ Example format: [{{"id": "rule1", "name": "...", "type": "priorityRule", ...}},
         return []
 
 # --------- Main DataManager Class ---------
+def synchronized(method):
+    """Run a DataManager method under the manager's lock"""
+    @functools.wraps(method)
+    def locked(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+    return locked
+
+
 class DataManager:
     def __init__(self):
+        # Handlers reach the DataManager from the event loop and from threadpool workers (model calls,
+        # streams, scenarios). Data mutations and derived-structure rebuilds hold this lock; model calls never do.
+        self.lock = threading.RLock()
         try:
-            self.gpt_agent = GPTAgent()
+            # Cached answers are keyed to this DataManager's data, passed per call to the shared agent
+            self.gpt_agent = DatasetAgent(shared_agent(), self.dataset_fingerprint)
         except Exception as e:
             print(f"Warning: AI features disabled due to initialization error: {e}")
             self.gpt_agent = None
@@ -775,7 +936,38 @@ class DataManager:
         self.tasks: List[Dict[str, Any]] = []
         self.rules: List[Dict[str, Any]] = []
         self.priorities: Dict[str, float] = {}
-
+        self.corun_groups = CoRunGroups()
+        # rule version (id, type, parameters) -> entity keys a non-idempotent rule action was already applied to
+        self._rule_applications: Dict[str, set] = {}
+
+        # Bumped on every data mutation; derived structures are cached per version
+        self.data_version = 0
+        self._column_stores: Dict[str, ColumnStore] = {}
+        self._column_stores_version = -1
+        self._capacity_report: Optional[Dict[str, Any]] = None
+        self._capacity_report_version = -1
+        self._client_scorer: Optional[ClientScorer] = None
+        self._client_scorer_version = -1
+        self._join: Optional[EligibilityJoin] = None
+        self._join_version = -1
+        self._spec_results: Dict[str, Any] = {}  # canonical spec -> matching row positions
+        self._spec_results_version = -1
+        self._text_index: Optional[TextIndex] = None
+        self._text_index_version = -1
+        self._vector_indexes: Dict[str, VectorIndex] = {}
+        self._vector_indexes_version = -1
+        self._prompt_summary: Optional[DatasetSummary] = None
+        self._prompt_summary_version = -1
+        self._mined_rules: List[Dict[str, Any]] = []
+        self._mined_rules_version = -1
+        self._fingerprint: Optional[str] = None
+        self._fingerprint_version = -1
+        self.last_schedule = None
+        self._scheduler: Optional[GreedyScheduler] = None  # kept for incremental reschedule()
+        self._schedule_weights: Optional[Dict[str, float]] = None
+        self._schedule_method: Optional[Dict[str, Any]] = None  # method and solver settings of the last schedule
+
+    @synchronized
     def load_files(self, clients_path, workers_path, tasks_path):
         # Load CSV files and clean the data
         clients_df = pd.read_csv(clients_path)
@@ -796,7 +988,9 @@ class DataManager:
         self.clients = self._clean_data(self.clients)
         self.workers = self._clean_data(self.workers)
         self.tasks = self._clean_data(self.tasks)
+        self.mark_data_changed()
 
+    @synchronized
     def load_files_from_objects(self, clients_file, workers_file, tasks_file):
         """Load CSV files directly from file objects without saving to disk"""
         # Read CSV files directly from file objects
@@ -818,6 +1012,114 @@ class DataManager:
         self.clients = self._clean_data(self.clients)
         self.workers = self._clean_data(self.workers)
         self.tasks = self._clean_data(self.tasks)
+        self.mark_data_changed()
+
+    @synchronized
+    def mark_data_changed(self):
+        """Invalidate derived structures after clients, workers or tasks were modified"""
+        self.data_version += 1
+        # Tasks may have been added or removed; co-run components only cover tasks that exist
+        self.corun_groups = CoRunGroups.from_rules(self.rules, (t.get("TaskID") for t in self.tasks))
+
+    @synchronized
+    def column_store(self, entity: str) -> ColumnStore:
+        """Columnar, indexed view of 'client', 'worker' or 'task' for the current data version"""
+        if self._column_stores_version != self.data_version:
+            self._column_stores = {}
+            self._column_stores_version = self.data_version
+        if entity not in self._column_stores:
+            records, id_field = {
+                "client": (self.clients, "ClientID"),
+                "worker": (self.workers, "WorkerID"),
+                "task": (self.tasks, "TaskID"),
+            }[entity]
+            self._column_stores[entity] = ColumnStore(records, id_field)
+        return self._column_stores[entity]
+
+    @synchronized
+    def dataset_fingerprint(self) -> str:
+        """Content hash of the data and rules; computed at most once per data version"""
+        if self._fingerprint_version != self.data_version:
+            payload = json.dumps([self.clients, self.workers, self.tasks], sort_keys=True, default=str)
+            self._fingerprint = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+            self._fingerprint_version = self.data_version
+        # Rules change without a data version bump, and are small enough to hash on every call
+        rules = hashlib.sha256(json.dumps(self.rules, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+        return f"{self._fingerprint}:{rules[:16]}"
+
+    @synchronized
+    def join_view(self) -> EligibilityJoin:
+        """Client → task → eligible worker join, patched in place when the data version moves"""
+        if self._join is None:
+            self._join = EligibilityJoin(self.clients, self.workers, self.tasks)
+        elif self._join_version != self.data_version:
+            self._join.update(self.clients, self.workers, self.tasks)
+        self._join_version = self.data_version
+        return self._join
+
+    @synchronized
+    def text_index(self) -> TextIndex:
+        """BM25 index over every client, worker and task row; re-indexes only rows whose text changed"""
+        if self._text_index is None:
+            self._text_index = TextIndex(self.validator._row_to_text)
+        if self._text_index_version != self.data_version:
+            self._text_index.sync(self.clients + self.workers + self.tasks)
+            self._text_index_version = self.data_version
+        return self._text_index
+
+    @synchronized
+    def vector_index(self, entity: str) -> VectorIndex:
+        """Similarity index over 'client', 'worker' or 'task', built on first use per data version"""
+        if self._vector_indexes_version != self.data_version:
+            self._vector_indexes = {}
+            self._vector_indexes_version = self.data_version
+        if entity not in self._vector_indexes:
+            self._vector_indexes[entity] = VectorIndex(self.column_store(entity), self.validator._row_to_text)
+        return self._vector_indexes[entity]
+
+    def similar(self, entity: str, row_id: Any = None, query: str = None, k: int = 10,
+                rerank: bool = False) -> Dict[str, Any]:
+        """Rows of one entity closest to an existing row or to free text; raises ValueError on bad input"""
+        if entity not in RESULT_KEYS:
+            raise ValueError(f"Unknown entity: {entity!r}")
+        k = max(1, min(500, int(k)))
+        index = self.vector_index(entity)
+        if row_id is not None:
+            matches = index.similar(row_id, k)
+            if matches is None:
+                raise KeyError(row_id)
+        elif query:
+            matches = index.search(query, k)
+            if rerank and self.gpt_agent and len(matches) > 1:
+                scores = {id(row): score for score, row in matches}
+                matches = [(scores[id(row)], row) for row in self.validator.rerank(query, [row for _, row in matches])]
+        else:
+            raise ValueError("Provide an ID or a query")
+        return {
+            "entity": entity,
+            "results": [{"score": score, "record": record} for score, record in
+                        zip([m[0] for m in matches], self._clean_data([m[1] for m in matches]))],
+        }
+
+    @synchronized
+    def prompt_summary(self) -> DatasetSummary:
+        """Column statistics and skill vocabulary for prompts, computed once per data version"""
+        if self._prompt_summary_version != self.data_version:
+            self._prompt_summary = DatasetSummary(self.clients, self.workers, self.tasks)
+            self._prompt_summary_version = self.data_version
+        return self._prompt_summary
+
+    def prompt_context(self, budget: Optional[int] = None) -> str:
+        """Dataset summary text for model prompts, within budget tokens (PROMPT_CONTEXT_TOKENS by default)"""
+        return self.prompt_summary().render(budget)
+
+    @synchronized
+    def capacity_report(self) -> Dict[str, Any]:
+        """Phase × skill supply and demand with per-WorkerGroup and per-Category breakdowns, cached per data version"""
+        if self._capacity_report_version != self.data_version:
+            self._capacity_report = CapacityReport(self.workers, self.tasks).to_dict()
+            self._capacity_report_version = self.data_version
+        return {**self._capacity_report, "data_version": self.data_version}
 
     def _clean_data(self, data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Clean data to ensure JSON serialization compatibility"""
@@ -841,41 +1143,65 @@ class DataManager:
         
         return cleaned_data
 
+    @synchronized
     def validate_all(self) -> List[ValidationError]:
         combined = self.clients + self.workers + self.tasks
-        return self.validator.validate_data(combined)
+        return self.validator.validate_data(combined, self.get_corun_components(), self.join_view())
 
     def _validate_single_entry(self, entry: Dict[str, Any]) -> bool:
         """Validate a single data entry using AI if available"""
         if not self.gpt_agent:
             # Basic validation without AI
             return len(entry) > 0 and any(key in entry for key in ["ClientID", "WorkerID", "TaskID"])
-        
-        # Use AI for more sophisticated validation
-        try:
-            validation_prompt = f"""
-            Validate this data entry for correctness and completeness:
-            
-            Entry: {json.dumps(entry, indent=2)}
-            
-            Check for:
-            1. Required fields based on entry type (Client/Worker/Task)
-            2. Valid data types and formats
-            3. Logical consistency
-            
-            Return only "VALID" or "INVALID" with a brief reason.
-            """
-            
-            result = self.gpt_agent.chat_completion(
-                system_prompt="You are a data validation expert. Be concise.",
-                user_prompt=validation_prompt
-            )
-            
-            return "VALID" in result.upper()
-            
-        except Exception as e:
-            print(f"AI validation error: {e}")
-            return True  # Default to valid if AI fails
+        verdict = BatchValidator(self.gpt_agent).validate([entry])["verdicts"][0]
+        return verdict["valid"] is not False  # Default to valid if AI fails
+
+    def ai_validate(self, entity: Optional[str] = None, ids: Optional[List[Any]] = None) -> Dict[str, Any]:
+        """Model verdicts for rows the rule checks accept; rows they already reject are not sent.
+
+        entity limits the run to 'client', 'worker' or 'task' and ids to
+        those rows. Raises ValueError without a model or on a bad entity.
+        """
+        if not self.gpt_agent:
+            raise ValueError("AI features are not available")
+        tables = {"client": self.clients, "worker": self.workers, "task": self.tasks}
+        if entity is not None and entity not in tables:
+            raise ValueError(f"Unknown entity: {entity!r}")
+        with self.lock:
+            rows = [(name, row) for name, table in tables.items() if entity in (None, name) for row in table]
+            if ids is not None:
+                wanted = set(map(str, ids))
+                rows = [(name, row) for name, row in rows if str(row_key(row, -1)[1]) in wanted]
+
+            rejected: Dict[int, List[str]] = {}
+            for error in self.validate_all():
+                row = error.details.get("row")
+                if isinstance(row, dict):
+                    rejected.setdefault(id(row), []).append(error.message)
+        to_check = [row for _, row in rows if id(row) not in rejected]
+        run = BatchValidator(self.gpt_agent).validate(to_check)
+        model_verdicts = {id(row): verdict for row, verdict in zip(to_check, run["verdicts"])}
+
+        results = []
+        for name, row in rows:
+            if id(row) in rejected:
+                verdict = {"valid": False, "reason": "; ".join(rejected[id(row)]), "source": "rules"}
+            else:
+                verdict = model_verdicts[id(row)]
+            results.append({"entity": name, "id": row_key(row, -1)[1], **verdict})
+        return {
+            "results": results,
+            "summary": {
+                "rows": len(results),
+                "valid": sum(1 for r in results if r["valid"] is True),
+                "invalid": sum(1 for r in results if r["valid"] is False),
+                "unknown": sum(1 for r in results if r["valid"] is None),
+                "rule_rejected": len(rows) - len(to_check),
+                "cached": run["cached"],
+                "model_requests": run["requests"],
+            },
+            "elapsed_ms": run["elapsed_ms"],
+        }
 
     def natural_language_search(self, query: str) -> Dict[str, Any]:        
         # Check if data is actually loaded
@@ -886,14 +1212,124 @@ class DataManager:
         combined = self.clients + self.workers + self.tasks
         print(f"Total combined records: {len(combined)}")
         
-        results = natural_language_search(self.gpt_agent, combined, query)
+        results = natural_language_search(self.gpt_agent, combined, query, self.prompt_context())
         print(f"Final results - Clients: {len(results['clients'])}, Workers: {len(results['workers'])}, Tasks: {len(results['tasks'])}")
         
         return results
 
-    def natural_language_modify(self, command: str) -> Dict[str, Any]:
+    def local_search(self, query: str, top_k: int = 10, rerank: bool = False) -> Dict[str, Any]:
+        """Offline keyword search over all rows, grouped like natural_language_search results"""
+        # The index is synced in place, so search it under the lock; the model rerank runs outside it
+        with self.lock:
+            rows = self.validator.search(query, self.clients + self.workers + self.tasks, top_k,
+                                         index=self.text_index())
+        if rerank and self.gpt_agent and len(rows) > 1:
+            rows = self.validator.rerank(query, rows)
+        results = {"clients": [], "workers": [], "tasks": []}
+        for row in rows:
+            key = result_category(row)
+            if key:
+                results[key].append(row)
+        return {key: self._clean_data(rows) for key, rows in results.items()}
+
+    def planned_search(self, query: str) -> Dict[str, Any]:
+        """Have the model translate the query into a filter spec, then run it locally over every row.
+
+        Raises ValueError when no model is configured or the spec does not
+        validate against data/correct_headers.json.
+        """
+        if not self.gpt_agent:
+            raise ValueError("AI features are not available")
+        response = self.gpt_agent.chat_completion(
+            system_prompt=PLANNER_SYSTEM_PROMPT,
+            user_prompt=planner_prompt(query),
+        )
+        spec = validate_spec(parse_spec(response))
+        rows, cached = self._run_spec(spec)
+        results = {"clients": [], "workers": [], "tasks": []}
+        results[RESULT_KEYS[spec["entity"]]] = rows
+        return {"results": results, "plan": spec, "cached": cached}
+
+    @synchronized
+    def _run_spec(self, spec: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], bool]:
+        """Rows matching a validated spec, and whether their positions were cached for this data version"""
+        if self._spec_results_version != self.data_version:
+            self._spec_results = {}
+            self._spec_results_version = self.data_version
+        key = spec_key(spec)
+        cached = key in self._spec_results
+        if not cached:
+            self._spec_results[key] = execute_spec(spec, self.column_store(spec["entity"]))
+        store = self.column_store(spec["entity"])
+        return self._clean_data([store.records[i] for i in self._spec_results[key]]), cached
+
+    def stream_search(self, query: str, mode: str = "planner", top_k: int = 10, rerank: bool = False,
+                      bypass: bool = False) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Search as (event, payload) pairs, sent while the model is still answering.
+
+        Events: "mode" first; "token" for each piece of model output;
+        "plan" once the planner's spec validates, or "plan_error" before
+        falling back to model search; one "record" per result row. Modes
+        are those of /nl_search, with "local" whenever no model is set.
+        """
+        if mode == "local" or not self.gpt_agent:
+            yield "mode", {"mode": "local"}
+            with bypass_cache(bypass):
+                results = self.local_search(query, top_k, rerank)
+            for category, rows in results.items():
+                for row in rows:
+                    yield "record", {"category": category, "record": row}
+            return
+
+        yield "mode", {"mode": mode}
+        if mode == "planner":
+            pieces = []
+            for piece in self.gpt_agent.stream_completion(PLANNER_SYSTEM_PROMPT, planner_prompt(query), bypass=bypass):
+                pieces.append(piece)
+                yield "token", {"text": piece}
+            try:
+                spec = validate_spec(parse_spec("".join(pieces)))
+            except ValueError as e:
+                yield "plan_error", {"message": str(e)}
+            else:
+                rows, cached = self._run_spec(spec)
+                yield "plan", {"plan": spec, "cached": cached}
+                for row in rows:
+                    yield "record", {"category": RESULT_KEYS[spec["entity"]], "record": row}
+                return
+
         combined = self.clients + self.workers + self.tasks
-        return natural_language_modify(self.gpt_agent, combined, command)
+        if not combined:
+            return
+        prompt = search_prompt(combined, query, self.prompt_context())
+        for kind, value in stream_json(self.gpt_agent, prompt, "array", bypass):
+            if kind == "token":
+                yield "token", {"text": value}
+            elif result_category(value):
+                yield "record", {"category": result_category(value), "record": self._clean_data([value])[0]}
+
+    def natural_language_modify(self, command: str, dry_run: bool = True) -> Dict[str, Any]:
+        """Plan an edit command as selector + assignment operations over every row, and apply unless dry_run.
+
+        The dry-run patch can also be committed later with apply_fix_patch
+        and its base_version. Raises ValueError without a model or when the
+        operations do not validate.
+        """
+        if not self.gpt_agent:
+            raise ValueError("AI features are not available")
+        operations = natural_language_modify(self.gpt_agent, command, self.prompt_context())
+        return self._plan_modify(command, operations, dry_run)
+
+    @synchronized
+    def _plan_modify(self, command: str, operations: List[Dict[str, Any]], dry_run: bool) -> Dict[str, Any]:
+        stores = {op["entity"]: self.column_store(op["entity"]) for op in operations}
+        patch, summary = plan_ops(operations, stores)
+        result = {"command": command, "operations": summary, "patch": patch, "base_version": self.data_version}
+        if dry_run or not patch:
+            return result
+
+        applied = self.apply_fix_patch(patch, base_version=result["base_version"])
+        return {**result, "validation_errors": [], **applied}
 
     def generate_rule_from_natural_language(self, user_rule_request: str) -> Optional[Dict[str, Any]]:
         """Generate a rule from natural language without adding it to the rules list"""
@@ -907,7 +1343,8 @@ class DataManager:
         
         # Fallback to AI generation
         try:
-            rule = nl_to_rule(self.gpt_agent, user_rule_request, self.clients, self.workers, self.tasks)
+            rule = nl_to_rule(self.gpt_agent, user_rule_request, self.clients, self.workers, self.tasks,
+                              self.prompt_context())
             if rule:
                 print(f"Generated AI rule: {rule}")
                 return rule
@@ -917,14 +1354,98 @@ class DataManager:
         print("No rule could be generated")
         return None
 
+    def stream_rule_from_nl(self, user_rule_request: str, bypass: bool = False) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """generate_rule_from_natural_language as (event, payload) pairs: "token" pieces of model output, then the "rule".
+
+        Raises ValueError when no rule could be generated.
+        """
+        simple_rule = self.generate_simple_rule_fallback(user_rule_request)
+        if simple_rule:
+            yield "rule", {"rule": simple_rule}
+            return
+        if not self.gpt_agent:
+            raise ValueError("AI features are not available")
+        prompt = rule_prompt(user_rule_request, self.prompt_context())
+        for kind, value in stream_json(self.gpt_agent, prompt, "object", bypass):
+            if kind == "token":
+                yield "token", {"text": value}
+            elif isinstance(value, dict):
+                yield "rule", {"rule": value}
+                return
+        raise ValueError("Failed to generate rule from input")
+
     def add_rule_from_nl(self, user_rule_request: str) -> Optional[Dict[str, Any]]:
-        rule = nl_to_rule(self.gpt_agent, user_rule_request, self.clients, self.workers, self.tasks)
+        rule = nl_to_rule(self.gpt_agent, user_rule_request, self.clients, self.workers, self.tasks,
+                          self.prompt_context())
         if rule:
-            self.rules.append(rule)
+            with self.lock:
+                self.rules.append(rule)
         return rule
 
+    @synchronized
+    def mined_rules(self) -> List[Dict[str, Any]]:
+        """Rule suggestions mined from the full dataset, cached per data version"""
+        if self._mined_rules_version != self.data_version:
+            self._mined_rules = mine_rules(self.workers, self.tasks, self.join_view(), self.capacity_report(),
+                                           self.column_store("client"), self.get_corun_components())
+            self._mined_rules_version = self.data_version
+        return self._mined_rules
+
     def get_recommended_rules(self) -> List[Dict[str, Any]]:
-        return recommend_rules(self.gpt_agent, self.clients, self.workers, self.tasks)
+        """Mined rules, named and described by the model in one call when available"""
+        rules = self.mined_rules()
+        if not rules:
+            return recommend_rules(self.gpt_agent, self.clients, self.workers, self.tasks, self.prompt_context()) if self.gpt_agent else []
+        if not self.gpt_agent:
+            return rules
+        try:
+            phrasing = self.gpt_agent.chat_completion(
+                system_prompt=PHRASING_SYSTEM_PROMPT,
+                user_prompt=phrasing_prompt(rules),
+            )
+        except Exception as e:
+            print(f"AI rule phrasing error: {e}")
+            return rules
+        return apply_phrasing(rules, phrasing)
+
+    def stream_recommended_rules(self, bypass: bool = False) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """get_recommended_rules as (event, payload) pairs.
+
+        Mined rules are sent at once as "rule" events with their index; as
+        the model names and describes each one, the rule is sent again
+        under the same index. Without mined rules, the model's own
+        suggestions are sent as they are parsed. "token" events carry the
+        model output.
+        """
+        rules = self.mined_rules()
+        if not rules:
+            if self.gpt_agent:
+                prompt = recommend_prompt(self.prompt_context())
+                index = 0
+                for kind, value in stream_json(self.gpt_agent, prompt, "array", bypass):
+                    if kind == "token":
+                        yield "token", {"text": value}
+                    elif isinstance(value, dict):
+                        yield "rule", {"index": index, "rule": value}
+                        index += 1
+            return
+
+        for index, rule in enumerate(rules):
+            yield "rule", {"index": index, "rule": rule}
+        if not self.gpt_agent:
+            return
+        phrased = [dict(rule) for rule in rules]
+        prompt = {"system": PHRASING_SYSTEM_PROMPT, "user": phrasing_prompt(rules)}
+        try:
+            for kind, value in stream_json(self.gpt_agent, prompt, "array", bypass):
+                if kind == "token":
+                    yield "token", {"text": value}
+                    continue
+                index = phrase_rule(phrased, value)
+                if index is not None:
+                    yield "rule", {"index": index, "rule": phrased[index]}
+        except Exception as e:
+            print(f"AI rule phrasing error: {e}")
 
     def export_all(self, output_dir="output") -> str:
         os.makedirs(output_dir, exist_ok=True)
@@ -935,8 +1456,12 @@ class DataManager:
             json.dump(self.rules, f, indent=2)
         with open(os.path.join(output_dir, "priorities.json"), "w") as f:
             json.dump(self.priorities, f, indent=2)
+        if self.corun_groups.components():
+            with open(os.path.join(output_dir, "corun_groups.json"), "w") as f:
+                json.dump(self.corun_groups.to_dict(), f, indent=2)
         return output_dir
 
+    @synchronized
     def set_priorities(self, priorities: Dict[str, float]):
         # Expecting keys: PriorityLevel, RequestedTaskIDs, Fairness, LoadLimit
         total = sum(priorities.values())
@@ -945,319 +1470,277 @@ class DataManager:
         else:
             self.priorities = priorities
 
-    def apply_automatic_fixes(self) -> Dict[str, Any]:
-        """Apply automatic fixes to common data issues"""
-        fixes_applied = []
-        
-        # Fix 1: Remove duplicate IDs (but be careful about skill coverage)
+    @synchronized
+    def client_scorer(self, weights: Optional[Dict[str, float]] = None) -> ClientScorer:
+        """Client scores under the given weights (set_priorities by default), kept current per data version"""
+        weights = normalize_weights(weights if weights is not None else self.priorities)
+        if self._client_scorer is None:
+            self._client_scorer = ClientScorer(self.clients, self.workers, self.tasks, weights, join=self.join_view())
+        elif self._client_scorer_version != self.data_version:
+            self._client_scorer.update(self.clients, self.workers, self.tasks)
+        self._client_scorer_version = self.data_version
+        if self._client_scorer.weights != weights:
+            self._client_scorer.set_weights(weights)
+        return self._client_scorer
+
+    @synchronized
+    def rank_clients(self, weights: Optional[Dict[str, float]] = None, k: Optional[int] = None,
+                     offset: int = 0, limit: int = 50, group: Optional[str] = None) -> Dict[str, Any]:
+        """Top-k clients (optionally within one GroupTag) or a page of the full ranking"""
+        scorer = self.client_scorer(weights)
+        if k is not None or group is not None:
+            result = {"clients": scorer.top(k if k is not None else limit, group)}
+        else:
+            result = scorer.page(offset, limit)
+        result["weights"] = scorer.weights
+        result["data_version"] = self.data_version
+        return result
+
+    def build_scheduling_problem(self, weights: Optional[Dict[str, float]] = None) -> SchedulingProblem:
+        return SchedulingProblem(
+            self.clients, self.workers, self.tasks,
+            rules=self.rules,
+            corun_components=self.get_corun_components(),
+            weights=weights if weights is not None else self.priorities,
+            join=self.join_view(),
+        )
+
+    @synchronized
+    def schedule(self, weights: Optional[Dict[str, float]] = None, method: str = "greedy",
+                 time_limit: float = 10.0, mip_gap: float = 0.01) -> Dict[str, Any]:
+        """Assign clients' requested tasks to qualified workers per phase.
+
+        Respects AvailableSlots, MaxLoadPerPhase, MaxConcurrent, PreferredPhases,
+        co-run components, phase windows and slot restrictions; assignments are
+        ranked by the priority weights (set_priorities unless overridden).
+        method="milp" solves exactly with HiGHS, warm-started from the greedy
+        plan, within time_limit seconds or the relative mip_gap. Raises
+        ValueError for an unknown method or out-of-range solver limits.
+        """
+        time_limit, mip_gap = solver_limits(time_limit, mip_gap)
+        problem = self.build_scheduling_problem(weights)
+        self._scheduler = None
+        if method == "milp":
+            self.last_schedule = MILPScheduler(problem, time_limit=time_limit, mip_gap=mip_gap).run()
+        elif method == "greedy":
+            self._scheduler = GreedyScheduler(problem)
+            self.last_schedule = self._scheduler.run()
+        else:
+            raise ValueError(f"Unknown scheduling method: {method}")
+        self._schedule_weights = weights
+        self._schedule_method = {"method": method, "time_limit": time_limit, "mip_gap": mip_gap}
+        result = self.last_schedule.to_dict()
+        result["data_version"] = self.data_version
+        return result
+
+    @synchronized
+    def reschedule(self, resolve_exact: bool = True) -> Dict[str, Any]:
+        """Repair the last greedy schedule after data or rule changes instead of recomputing it.
+
+        Falls back to a full greedy schedule when there is none yet, the
+        weights changed, or rows were added or removed. A MILP schedule is
+        solved again with its settings rather than repaired, since a greedy
+        repair would replace the exact plan. delta reports which happened.
+        With resolve_exact=False a MILP schedule is only reported as stale,
+        for callers that cannot wait for the solver.
+        """
+        start = time.perf_counter()
+        if self._schedule_method and self._schedule_method["method"] == "milp":
+            if not resolve_exact:
+                return {"stale": True, "method": "milp", "data_version": self.data_version}
+            result = self.schedule(self._schedule_weights, **self._schedule_method)
+            result["delta"] = {"full_rebuild": True, "method": "milp"}
+            return result
+
+        scheduler = self._scheduler
+        weights = self._schedule_weights if scheduler is not None else None
+        if scheduler is None or scheduler.problem.weights != normalize_weights(weights if weights is not None else self.priorities):
+            result = self.schedule(weights)
+            result["delta"] = {"full_rebuild": True, "method": "greedy"}
+            return result
+
+        changes = scheduler.problem.update(self.clients, self.workers, self.tasks, self.rules, self.get_corun_components())
+        if changes is None:
+            result = self.schedule(weights)
+            result["delta"] = {"full_rebuild": True, "method": "greedy"}
+            return result
+
+        delta = scheduler.repair(changes)
+        self.last_schedule = scheduler.to_schedule()
+        self.last_schedule.elapsed_ms = (time.perf_counter() - start) * 1000
+        result = self.last_schedule.to_dict()
+        result["data_version"] = self.data_version
+        result["delta"] = {"full_rebuild": False, "method": "greedy", **delta}
+        return result
+
+    def evaluate_scenarios(self, scenarios: List[Dict[str, Any]], max_workers: Optional[int] = None) -> Dict[str, Any]:
+        """Compare what-if priority weights or rule variants without touching the data.
+
+        Each scenario is {"name", "weights", "rules"}; rules are added on top
+        of the current ones. Scenarios run in parallel processes.
+        """
+        # Runs in a worker thread: copy the data under the lock, then schedule without holding it
+        with self.lock:
+            dataset = copy.deepcopy({
+                "clients": self.clients,
+                "workers": self.workers,
+                "tasks": self.tasks,
+                "rules": self.rules,
+                "corun_components": self.get_corun_components(),
+                "priorities": self.priorities,
+            })
+            data_version = self.data_version
+        result = evaluate_scenarios(dataset, scenarios, max_workers=max_workers)
+        result["data_version"] = data_version
+        return result
+
+    @synchronized
+    def apply_automatic_fixes(self, max_changes: int = 1000, dry_run: bool = False) -> Dict[str, Any]:
+        """Apply automatic fixes to common data issues.
+
+        With dry_run=True nothing is modified; the proposed fixes are returned
+        as a JSON-Patch-style changeset that apply_fix_patch can commit.
+        """
         original_clients = len(self.clients)
-        original_workers = len(self.workers) 
+        original_workers = len(self.workers)
         original_tasks = len(self.tasks)
-        
-        # Keep track of removed IDs to handle cascading effects
-        removed_client_ids = set()
-        removed_worker_ids = set()
-        removed_task_ids = set()
-        
-        # Remove duplicate clients (safe)
-        seen_client_ids = set()
-        filtered_clients = []
-        for client in self.clients:
-            client_id = client.get("ClientID")
-            if client_id and client_id not in seen_client_ids:
-                seen_client_ids.add(client_id)
-                filtered_clients.append(client)
-            elif client_id:
-                removed_client_ids.add(client_id)
-                fixes_applied.append(f"Removed duplicate ClientID: {client_id}")
-        self.clients = filtered_clients
-        
-        # Remove duplicate tasks (safe)
-        seen_task_ids = set()
-        filtered_tasks = []
-        for task in self.tasks:
-            task_id = task.get("TaskID")
-            if task_id and task_id not in seen_task_ids:
-                seen_task_ids.add(task_id)
-                filtered_tasks.append(task)
-            elif task_id:
-                removed_task_ids.add(task_id)
-                fixes_applied.append(f"Removed duplicate TaskID: {task_id}")
-        self.tasks = filtered_tasks
-        
-        # For workers, be more careful - collect all required skills first
-        all_required_skills = set()
-        for task in self.tasks:
-            req_skills = task.get("RequiredSkills", "")
-            if isinstance(req_skills, str):
-                skills_list = [s.strip() for s in req_skills.split(",") if s.strip()]
-                all_required_skills.update(skills_list)
-        
-        # Group workers by ID and track their skills
-        worker_groups = {}
-        for worker in self.workers:
-            worker_id = worker.get("WorkerID")
-            if worker_id:
-                if worker_id not in worker_groups:
-                    worker_groups[worker_id] = []
-                worker_groups[worker_id].append(worker)
-        
-        # For each worker ID with duplicates, keep the one with the most comprehensive skills
-        filtered_workers = []
-        for worker_id, worker_list in worker_groups.items():
-            if len(worker_list) == 1:
-                filtered_workers.append(worker_list[0])
-            else:
-                # Find the worker with the most skills that cover required skills
-                best_worker = worker_list[0]
-                best_skill_coverage = 0
-                
-                for worker in worker_list:
-                    skills_raw = worker.get("Skills", "")
-                    if isinstance(skills_raw, str):
-                        worker_skills = set(s.strip() for s in skills_raw.split(",") if s.strip())
-                    else:
-                        worker_skills = set()
-                    
-                    # Count how many required skills this worker covers
-                    coverage = len(all_required_skills.intersection(worker_skills))
-                    if coverage > best_skill_coverage or (coverage == best_skill_coverage and len(worker_skills) > len(best_worker.get("Skills", "").split(","))):
-                        best_worker = worker
-                        best_skill_coverage = coverage
-                
-                filtered_workers.append(best_worker)
-                removed_worker_ids.update(w.get("WorkerID") for w in worker_list if w != best_worker)
-                fixes_applied.append(f"Removed {len(worker_list)-1} duplicate workers for WorkerID: {worker_id}, kept the one with best skill coverage")
-        
-        self.workers = filtered_workers
-        
-        # Fix 1.5: Handle cascading effects from removed entities
-        # Clean up client requested task IDs that reference removed tasks
-        for client in self.clients:
-            if "RequestedTaskIDs" in client and client["RequestedTaskIDs"]:
-                task_ids = [tid.strip() for tid in str(client["RequestedTaskIDs"]).split(",") if tid.strip()]
-                valid_task_ids = [tid for tid in task_ids if tid not in removed_task_ids]
-                if len(valid_task_ids) != len(task_ids):
-                    client["RequestedTaskIDs"] = ",".join(valid_task_ids) if valid_task_ids else ""
-                    fixes_applied.append(f"Cleaned RequestedTaskIDs for client {client.get('ClientID')}")
-        
-        # Fix 2: Clamp out-of-range values
-        for client in self.clients:
-            if "PriorityLevel" in client:
-                old_val = client["PriorityLevel"]
-                if isinstance(old_val, (int, float)):
-                    if old_val < 1:
-                        client["PriorityLevel"] = 1
-                        fixes_applied.append(f"Fixed PriorityLevel {old_val} -> 1 for client {client.get('ClientID')}")
-                    elif old_val > 5:
-                        client["PriorityLevel"] = 5
-                        fixes_applied.append(f"Fixed PriorityLevel {old_val} -> 5 for client {client.get('ClientID')}")
-        
-        for task in self.tasks:
-            if "Duration" in task:
-                old_val = task["Duration"]
-                if isinstance(old_val, (int, float)) and old_val < 1:
-                    task["Duration"] = 1
-                    fixes_applied.append(f"Fixed Duration {old_val} -> 1 for task {task.get('TaskID')}")
-            
-            # Fix negative MaxConcurrent values
-            if "MaxConcurrent" in task:
-                old_val = task["MaxConcurrent"]
-                if isinstance(old_val, (int, float)) and old_val < 0:
-                    task["MaxConcurrent"] = 1
-                    fixes_applied.append(f"Fixed MaxConcurrent {old_val} -> 1 for task {task.get('TaskID')}")
-        
-        # Fix 3: Clean empty skills and convert to proper format
-        for worker in self.workers:
-            if "Skills" in worker:
-                skills = worker["Skills"]
-                if isinstance(skills, str):
-                    # Clean up skills string - remove empty skills
-                    cleaned_skills = [s.strip() for s in skills.split(",") if s.strip()]
-                    if len(cleaned_skills) != len([s for s in skills.split(",") if s]):  # Only count non-empty original splits
-                        worker["Skills"] = ",".join(cleaned_skills)
-                        fixes_applied.append(f"Cleaned skills for worker {worker.get('WorkerID')}")
-        
-        # Fix 4: Clean up unknown skills in tasks (replace with known skills if possible)
-        # First, collect all available skills from workers
-        available_skills = set()
-        for worker in self.workers:
-            skills_raw = worker.get("Skills", "")
-            if isinstance(skills_raw, str):
-                skills_list = [s.strip() for s in skills_raw.split(",") if s.strip()]
-                available_skills.update(skills_list)
-        
-        for task in self.tasks:
-            if "RequiredSkills" in task:
-                req_skills_raw = task["RequiredSkills"]
-                if isinstance(req_skills_raw, str):
-                    req_skills = [s.strip() for s in req_skills_raw.split(",") if s.strip()]
-                    valid_skills = [s for s in req_skills if s in available_skills]
-                    
-                    if len(valid_skills) != len(req_skills) and valid_skills:  # Only fix if we have some valid skills
-                        task["RequiredSkills"] = ",".join(valid_skills)
-                        unknown_skills = set(req_skills) - set(valid_skills)
-                        fixes_applied.append(f"Removed unknown skills {unknown_skills} from task {task.get('TaskID')}")
-                    elif not valid_skills and req_skills:  # All skills are unknown
-                        # Assign the most common skill from available workers
-                        if available_skills:
-                            most_common_skill = list(available_skills)[0]  # Just pick the first one
-                            task["RequiredSkills"] = most_common_skill
-                            fixes_applied.append(f"Replaced all unknown skills with '{most_common_skill}' for task {task.get('TaskID')}")
-        
-        # Fix 5: Add missing required fields with sensible defaults
-            if "Skills" in worker:
-                skills = worker["Skills"]
-                if isinstance(skills, str):
-                    # Clean up skills string
-                    cleaned_skills = [s.strip() for s in skills.split(",") if s.strip()]
-                    if len(cleaned_skills) != len(skills.split(",")):
-                        worker["Skills"] = ",".join(cleaned_skills)
-                        fixes_applied.append(f"Cleaned skills for worker {worker.get('WorkerID')}")
-        
-        for client in self.clients:
-            if not client.get("GroupTag"):
-                client["GroupTag"] = "default"
-                fixes_applied.append(f"Added default GroupTag for client {client.get('ClientID')}")
-            if not client.get("AttributesJSON"):
-                client["AttributesJSON"] = "{}"
-                fixes_applied.append(f"Added default AttributesJSON for client {client.get('ClientID')}")
-        
-        for worker in self.workers:
-            if not worker.get("WorkerGroup"):
-                worker["WorkerGroup"] = "default"
-                fixes_applied.append(f"Added default WorkerGroup for worker {worker.get('WorkerID')}")
-            if not worker.get("QualificationLevel"):
-                worker["QualificationLevel"] = 1
-                fixes_applied.append(f"Added default QualificationLevel for worker {worker.get('WorkerID')}")
-        
-        for task in self.tasks:
-            if not task.get("Category"):
-                task["Category"] = "general"
-                fixes_applied.append(f"Added default Category for task {task.get('TaskID')}")
-            if not task.get("PreferredPhases"):
-                task["PreferredPhases"] = "1"
-                fixes_applied.append(f"Added default PreferredPhases for task {task.get('TaskID')}")
-            if not task.get("MaxConcurrent"):
-                task["MaxConcurrent"] = 1
-                fixes_applied.append(f"Added default MaxConcurrent for task {task.get('TaskID')}")
-        
-        # Fix 5.5: Attempt to fix malformed JSON and lists
-        for client in self.clients:
-            # Try to fix malformed AttributesJSON
-            if "AttributesJSON" in client:
-                attr_json = client["AttributesJSON"]
-                if isinstance(attr_json, str) and attr_json and attr_json != "{}":
-                    try:
-                        # Try to parse as JSON
-                        json.loads(attr_json)
-                    except json.JSONDecodeError:
-                        # If it fails, try common fixes
-                        try:
-                            # Fix common JSON issues like single quotes
-                            fixed_json = attr_json.replace("'", '"')
-                            json.loads(fixed_json)
-                            client["AttributesJSON"] = fixed_json
-                            fixes_applied.append(f"Fixed malformed JSON for client {client.get('ClientID')}")
-                        except:
-                            # If still failing, set to empty JSON
-                            client["AttributesJSON"] = "{}"
-                            fixes_applied.append(f"Reset malformed JSON to empty for client {client.get('ClientID')}")
-        
-        for worker in self.workers:
-            # Try to fix malformed AvailableSlots
-            if "AvailableSlots" in worker:
-                slots = worker["AvailableSlots"]
-                if isinstance(slots, str) and slots:
-                    try:
-                        # Try to parse as JSON
-                        json.loads(slots)
-                    except json.JSONDecodeError:
-                        # Try common fixes
-                        try:
-                            # Fix common list issues like removing non-numeric values
-                            fixed_slots = slots.replace("abc", "0").replace("'", '"')
-                            parsed_slots = json.loads(fixed_slots)
-                            # Ensure all values are integers
-                            cleaned_slots = [int(x) if isinstance(x, (int, float, str)) and str(x).isdigit() else 1 for x in parsed_slots]
-                            worker["AvailableSlots"] = json.dumps(cleaned_slots)
-                            fixes_applied.append(f"Fixed malformed AvailableSlots for worker {worker.get('WorkerID')}")
-                        except:
-                            # If still failing, set to default
-                            worker["AvailableSlots"] = "[1, 1, 1]"
-                            fixes_applied.append(f"Reset malformed AvailableSlots to default for worker {worker.get('WorkerID')}")
-        
-        for task in self.tasks:
-            # Try to fix malformed PreferredPhases
-            if "PreferredPhases" in task:
-                phases = task["PreferredPhases"]
-                if isinstance(phases, str) and phases and not phases.startswith("["):
-                    try:
-                        # Try to convert simple formats
-                        if phases.isdigit():
-                            task["PreferredPhases"] = f"[{phases}]"
-                            fixes_applied.append(f"Fixed PreferredPhases format for task {task.get('TaskID')}")
-                        elif "-" in phases and all(p.strip().isdigit() for p in phases.split("-")):
-                            start, end = map(int, phases.split("-"))
-                            phase_list = list(range(start, end + 1))
-                            task["PreferredPhases"] = json.dumps(phase_list)
-                            fixes_applied.append(f"Fixed PreferredPhases range format for task {task.get('TaskID')}")
-                        else:
-                            # Set to default
-                            task["PreferredPhases"] = "[1]"
-                            fixes_applied.append(f"Reset malformed PreferredPhases to default for task {task.get('TaskID')}")
-                    except:
-                        task["PreferredPhases"] = "[1]"
-                        fixes_applied.append(f"Reset malformed PreferredPhases to default for task {task.get('TaskID')}")
-        
-        # Fix 6: Ensure worker skill coverage after all fixes
-        # Verify that all required skills are still covered after removing duplicates
-        final_required_skills = set()
-        for task in self.tasks:
-            req_skills = task.get("RequiredSkills", "")
-            if isinstance(req_skills, str):
-                skills_list = [s.strip() for s in req_skills.split(",") if s.strip()]
-                final_required_skills.update(skills_list)
-        
-        final_available_skills = set()
-        for worker in self.workers:
-            skills_raw = worker.get("Skills", "")
-            if isinstance(skills_raw, str):
-                skills_list = [s.strip() for s in skills_raw.split(",") if s.strip()]
-                final_available_skills.update(skills_list)
-        
-        # If any required skills are missing, add them to the first worker
-        missing_skills = final_required_skills - final_available_skills
-        if missing_skills and self.workers:
-            for worker in self.workers:
-                if "WorkerID" in worker:
-                    worker_id = worker["WorkerID"]
-                    # Add missing skills to this worker
-                    current_skills = worker.get("Skills", "")
-                    if isinstance(current_skills, str):
-                        current_skills_set = set(s.strip() for s in current_skills.split(",") if s.strip())
-                    else:
-                        current_skills_set = set()
-                    
-                    # Add only the missing skills
-                    skills_to_add = missing_skills - current_skills_set
-                    if skills_to_add:
-                        new_skills = list(current_skills_set.union(skills_to_add))
-                        worker["Skills"] = ",".join(new_skills)
-                        fixes_applied.append(f"Added missing skills to worker {worker_id}: {skills_to_add}")
-        
-        # Summary of fixes applied
-        print(f"Applied {len(fixes_applied)} automatic fixes:")
-        for fix in fixes_applied:
-            print(f" - {fix}")
-        
+
+        pipeline = AutoFixPipeline(self.clients, self.workers, self.tasks)
+        if dry_run:
+            pipeline.run(dry_run=True)
+            return {
+                "base_version": self.data_version,
+                "summary": pipeline.summary(),
+                "patch": pipeline.to_patch(),
+            }
+
+        kept = pipeline.run()
+        self.clients = kept["clients"]
+        self.workers = kept["workers"]
+        self.tasks = kept["tasks"]
+        self.mark_data_changed()
+
+        summary = pipeline.summary()
+        print(f"Applied {summary['total_changes']} automatic fixes: {summary['by_fix']}")
+
         return {
             "clients_removed": original_clients - len(self.clients),
             "workers_removed": original_workers - len(self.workers),
             "tasks_removed": original_tasks - len(self.tasks),
-            "fixes_applied": fixes_applied
+            "summary": summary,
+            "changes": [c._asdict() for c in pipeline.changes[:max_changes]],
+            "truncated": len(pipeline.changes) > max_changes,
         }
-    
+
+    @synchronized
+    def apply_fix_patch(self, ops: List[Dict[str, Any]], base_version: Optional[int] = None) -> Dict[str, Any]:
+        """Commit an accepted subset of a dry-run fix patch in place.
+
+        When the applied ops only edit fields (nl_modify patches do), the
+        result also carries validation_errors for the rows they touched.
+        """
+        if base_version is not None and base_version != self.data_version:
+            return {
+                "applied": 0,
+                "skipped": [{"op": op, "reason": "data changed since dry-run"} for op in ops],
+                "data_version": self.data_version,
+            }
+        tables = {"clients": self.clients, "workers": self.workers, "tasks": self.tasks}
+        result = apply_patch(tables, ops)
+        if result["applied"]:
+            self.mark_data_changed()
+            skipped = {id(item["op"]) for item in result["skipped"]}
+            errors = self._revalidate_touched([op for op in ops if id(op) not in skipped])
+            if errors is not None:
+                result["validation_errors"] = errors
+        result["data_version"] = self.data_version
+        return result
+
+    def _revalidate_touched(self, ops: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+        """validate_touched for applied field edits, or None when ops remove rows or rewrite IDs"""
+        touched: Dict[str, set] = {}
+        old_skills = set()
+        entity_of = {table: entity for entity, table in TABLES.items()}
+        for op in ops:
+            parts = str(op.get("path", "")).strip("/").split("/")
+            if op.get("op") not in ("replace", "add") or len(parts) != 3 or parts[0] not in entity_of:
+                return None
+            table, _, field = parts
+            if field == ID_FIELDS[entity_of[table]]:
+                return None
+            touched.setdefault(table, set()).add(op.get("id"))
+            if table == "workers" and field == "Skills":
+                old_skills.update(self.validator._skill_list(op.get("old")))
+        errors = self.validator.validate_touched(self.clients, self.workers, self.tasks, touched, old_skills,
+                                                 self.get_corun_components(), self.join_view())
+        return [error.to_dict() for error in errors]
+
+    def plan_rules(self, rules: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Describe read/write sets, dependencies, conflicts and order without applying"""
+        active = [r for r in rules if r.get("isActive", True)]
+        return RulePlan(active).describe()
+
+    def preview_rules(self, rules: List[Dict[str, Any]], sample_size: int = 10) -> Dict[str, Any]:
+        """Dry-run: matched counts, sample IDs and a diff preview per rule, without mutating data"""
+        start = time.perf_counter()
+        previews, plan = preview_rules(self, rules, sample_size)
+        return {
+            "previews": previews,
+            "plan": plan,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+        }
+
+    @synchronized
+    def apply_rules_to_data(self, rules: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Apply rules in dependency order until no rule's inputs change"""
+        active = [r for r in rules if r.get("isActive", True)]
+        plan = RulePlan(active)
+        if plan.conflicts:
+            print(f"Rule conflicts detected: {plan.conflicts}")
+
+        outcome = plan.execute(self._apply_rule)
+        print(f"Applied {len(active)} rules in {outcome['executions']} executions (converged: {outcome['converged']})")
+
+        # Keep the stored rule set in sync, deactivated and edited rules included, so exports and the
+        # co-run components rebuilt by mark_data_changed reflect the rules as they are now
+        known = {r.get("id"): i for i, r in enumerate(self.rules) if r.get("id")}
+        for rule in rules:
+            if rule.get("id") in known:
+                self.rules[known[rule["id"]]] = rule
+            elif rule.get("isActive", True):
+                self.rules.append(rule)
+        self.mark_data_changed()
+        return outcome
+
+    def _apply_rule(self, rule: Dict[str, Any]) -> Dict[str, Any]:
+        handlers = {
+            "priorityRule": self._apply_priority_rule,
+            "loadLimit": self._apply_load_limit_rule,
+            "coRun": self._apply_corun_rule,
+            "phaseWindow": self._apply_phase_window_rule,
+            "slotRestriction": self._apply_slot_restriction_rule,
+            "patternMatch": self._apply_pattern_match_rule,
+        }
+        handler = handlers.get(rule.get("type"))
+        if not handler:
+            return {"applied": False, "changes_made": 0, "description": f"Unsupported rule type: {rule.get('type')}"}
+        try:
+            return handler(rule)
+        except Exception as e:
+            print(f"Error applying rule {rule.get('id')}: {e}")
+            return {"applied": False, "changes_made": 0, "description": f"Failed to apply rule: {e}"}
+
+    def _first_application(self, rule: Dict[str, Any], entity_type: str, entity_id: Any) -> bool:
+        """Record that a relative (boost/lower) action hit an entity; False if this version of the rule already did"""
+        # Keyed on what the rule does, so editing a rule under the same id lets it apply again
+        version = cache_key(rule.get("id", rule.get("name", "")), rule.get("type"), rule.get("parameters"))
+        applied = self._rule_applications.setdefault(version, set())
+        key = f"{entity_type}:{entity_id}"
+        if key in applied:
+            return False
+        applied.add(key)
+        return True
+
     def _apply_priority_rule(self, rule: Dict[str, Any]) -> Dict[str, Any]:
         """Apply priority rules to modify client or task priorities"""
         print(f"Applying priority rule: {rule}")
@@ -1271,8 +1754,11 @@ class DataManager:
         rule_name = rule.get("name", "").lower()
         rule_description = rule.get("description", "").lower()
         
+        # Keyword shortcuts only for free-text conditions (generate_simple_rule_fallback); structured ones use the generic path
+        keyword_rule = not isinstance(condition, dict)
+
         # Check if this is a budget-based rule
-        if "budget" in rule_name or "budget" in rule_description:
+        if keyword_rule and ("budget" in rule_name or "budget" in rule_description):
             print("Processing budget-based rule")
             for client in self.clients:
                 try:
@@ -1286,15 +1772,16 @@ class DataManager:
                         # If budget over 40000, set priority to 9
                         if budget > 40000:
                             old_priority = client.get("PriorityLevel", 3)
-                            client["PriorityLevel"] = 9
-                            print(f"Updated client {client.get('ClientID')} priority: {old_priority} -> 9 (budget: {budget})")
-                            changes_made += 1
+                            if old_priority != 9:
+                                client["PriorityLevel"] = 9
+                                print(f"Updated client {client.get('ClientID')} priority: {old_priority} -> 9 (budget: {budget})")
+                                changes_made += 1
                 except Exception as e:
                     print(f"Error processing client {client.get('ClientID')}: {e}")
                     continue
         
         # Check if this is an urgent-based rule
-        elif "urgent" in rule_name or "urgent" in rule_description:
+        elif keyword_rule and ("urgent" in rule_name or "urgent" in rule_description):
             print("Processing urgent-based rule")
             for client in self.clients:
                 try:
@@ -1308,19 +1795,25 @@ class DataManager:
                         # If urgent is true, set priority to 10
                         if urgent:
                             old_priority = client.get("PriorityLevel", 3)
-                            client["PriorityLevel"] = 10
-                            print(f"Updated client {client.get('ClientID')} priority: {old_priority} -> 10 (urgent: {urgent})")
-                            changes_made += 1
+                            if old_priority != 10:
+                                client["PriorityLevel"] = 10
+                                print(f"Updated client {client.get('ClientID')} priority: {old_priority} -> 10 (urgent: {urgent})")
+                                changes_made += 1
                 except Exception as e:
                     print(f"Error processing client {client.get('ClientID')}: {e}")
                     continue
         
         # Fallback to original complex logic
         else:
+            if not isinstance(condition, dict):
+                condition = {}
+            if not isinstance(action, dict):
+                action = {}
+
             # Apply to clients
             if condition.get("entity_type") == "client" or not condition.get("entity_type"):
                 for client in self.clients:
-                    if self._matches_condition(client, condition):
+                    if self._matches_condition(client, condition) and self._first_application(rule, "client", client.get("ClientID")):
                         if action.get("type") == "boost_priority":
                             current_priority = client.get("PriorityLevel", 3)
                             if isinstance(current_priority, str):
@@ -1345,7 +1838,7 @@ class DataManager:
             # Apply to tasks
             if condition.get("entity_type") == "task":
                 for task in self.tasks:
-                    if self._matches_condition(task, condition):
+                    if self._matches_condition(task, condition) and self._first_application(rule, "task", task.get("TaskID")):
                         if action.get("type") == "boost_priority":
                             current_priority = task.get("Priority", 3)
                             boost_amount = action.get("value", 1)
@@ -1388,17 +1881,32 @@ class DataManager:
         # Add co-run group information to tasks
         group_id = f"corun_{rule.get('id', 'unknown')}"
         changes_made = 0
+        wanted = set(task_ids)
         
+        matched_ids = []
         for task in self.tasks:
-            if task.get("TaskID") in task_ids:
+            if task.get("TaskID") in wanted:
+                matched_ids.append(task["TaskID"])
                 if "CoRunGroup" not in task:
                     task["CoRunGroup"] = []
                 if group_id not in task["CoRunGroup"]:
                     task["CoRunGroup"].append(group_id)
                     changes_made += 1
         
+        # Consolidate overlapping co-run rules into connected components; mark_data_changed rebuilds
+        # them from the stored rules, so edited and deactivated rules stop counting
+        self.corun_groups.union_all(matched_ids)
+        
         return {"applied": True, "changes_made": changes_made, "description": f"Added co-run group to {changes_made} tasks"}
     
+    def get_corun_component(self, task_id: str) -> List[str]:
+        """Tasks that must run together with task_id, across all applied co-run rules"""
+        return self.corun_groups.component(task_id)
+
+    def get_corun_components(self) -> List[List[str]]:
+        """Every effective co-run component with more than one task"""
+        return self.corun_groups.components()
+
     def _apply_phase_window_rule(self, rule: Dict[str, Any]) -> Dict[str, Any]:
         """Apply phase window restrictions"""
         params = rule.get("parameters", {})
@@ -1425,8 +1933,10 @@ class DataManager:
                 if not filtered_phases:
                     filtered_phases = allowed_phases[:1]  # Use first allowed phase if none match
                 
-                task["PreferredPhases"] = json.dumps(filtered_phases)
-                changes_made += 1
+                new_phases = json.dumps(filtered_phases)
+                if task.get("PreferredPhases") != new_phases:
+                    task["PreferredPhases"] = new_phases
+                    changes_made += 1
         
         return {"applied": True, "changes_made": changes_made, "description": f"Applied phase window to {changes_made} tasks"}
     
@@ -1436,11 +1946,8 @@ class DataManager:
         target_entities = params.get("target_entities", [])
         min_common_slots = params.get("min_common_slots", 1)
         
-        changes_made = 0
-        
-        # This is a complex rule that would require coordination between entities
-        # For now, we'll just mark it as informational
-        return {"applied": True, "changes_made": 0, "description": "Slot restriction rule registered (requires scheduling engine to enforce)"}
+        # Does not modify data; SchedulingProblem enforces it when building a schedule
+        return {"applied": True, "changes_made": 0, "description": f"Slot restriction registered for {len(target_entities)} groups (enforced by the scheduler, min {min_common_slots} common slots)"}
     
     def _apply_pattern_match_rule(self, rule: Dict[str, Any]) -> Dict[str, Any]:
         """Apply pattern matching rules"""
@@ -1463,12 +1970,13 @@ class DataManager:
                     if action.get("type") == "set_attribute":
                         attr_name = action.get("attribute")
                         attr_value = action.get("value")
-                        if attr_name and attr_value is not None:
+                        if attr_name and attr_value is not None and entity.get(attr_name) != attr_value:
                             entity[attr_name] = attr_value
                             changes_made += 1
                     elif action.get("type") == "modify_priority":
                         priority_field = "PriorityLevel" if entity_type == "client" else "Priority"
-                        if priority_field in entity:
+                        entity_id = entity.get(f"{entity_type.capitalize()}ID")
+                        if priority_field in entity and self._first_application(rule, entity_type, entity_id):
                             modifier = action.get("modifier", 0)
                             current = entity.get(priority_field, 3)
                             entity[priority_field] = max(1, min(5, current + modifier))
@@ -1486,6 +1994,8 @@ class DataManager:
             
             if isinstance(expected_value, dict):
                 # Handle operators like {">=": 3}
+                if entity_value is None:
+                    return False
                 for op, value in expected_value.items():
                     if op == ">=" and entity_value < value:
                         return False
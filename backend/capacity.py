@@ -0,0 +1,159 @@
+import numpy as np
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple
+
+from auto_fix import split_list
+from scheduler import parse_phase_list, _to_int
+
+# Shortfall cells listed individually; the matrices carry the rest
+MAX_SHORTFALLS = 100
+
+
+@lru_cache(maxsize=4096)
+def _parse_phases(value: Any) -> List[int]:
+    return sorted({p for p in parse_phase_list(value) if p >= 1})
+
+
+@lru_cache(maxsize=4096)
+def _parse_skills(value: str) -> List[str]:
+    return sorted(set(split_list(value)))
+
+
+# Raw cell values repeat heavily across rows; parse each distinct string once
+def _phases(value: Any) -> List[int]:
+    return _parse_phases(value) if type(value) in (str, int) else _parse_phases.__wrapped__(value)
+
+
+def _skills(value: Any) -> List[str]:
+    return _parse_skills(value) if isinstance(value, str) else []
+
+
+def _pairs(rows: List[List[Any]], columns: Dict[Any, int]) -> Tuple[np.ndarray, np.ndarray]:
+    """Sparse incidence as parallel (row, column) index arrays"""
+    r = np.fromiter((i for i, items in enumerate(rows) for _ in items), dtype=np.int64)
+    c = np.fromiter((columns[item] for items in rows for item in items), dtype=np.int64)
+    return r, c
+
+
+def _aggregate(per_row: np.ndarray, pairs: Tuple[np.ndarray, np.ndarray], width: int) -> np.ndarray:
+    """Phase × column totals: sum of per_row (rows × phases) over each column's rows"""
+    r, c = pairs
+    totals = np.zeros((per_row.shape[1], width))
+    for p in range(per_row.shape[1]):
+        totals[p] = np.bincount(c, weights=per_row[r, p], minlength=width)
+    return totals
+
+
+def _labels(values: List[Any]) -> Tuple[List[str], Tuple[np.ndarray, np.ndarray]]:
+    keys = sorted({str(v) for v in values})
+    pos = {k: i for i, k in enumerate(keys)}
+    return keys, (np.arange(len(values)), np.array([pos[str(v)] for v in values], dtype=np.int64))
+
+
+class CapacityReport:
+    """Phase × skill supply against demand, built from incidence matrices.
+
+    Supply: every worker contributes MaxLoadPerPhase to each of its skills
+    in each of its AvailableSlots. Demand: every task needs Duration
+    phase-slots of each RequiredSkill, its start spread evenly over its
+    PreferredPhases (any phase that fits when none are given). Parsing
+    is the only per-row Python work; aggregation is array operations
+    over the worker × phase and task × phase matrices.
+    """
+
+    def __init__(self, workers: List[Dict[str, Any]], tasks: List[Dict[str, Any]]):
+        worker_slots = [_phases(w.get("AvailableSlots")) for w in workers]
+        worker_skills = [_skills(w.get("Skills", "")) for w in workers]
+        task_skills = [_skills(t.get("RequiredSkills", "")) for t in tasks]
+        preferred = [_phases(t.get("PreferredPhases")) for t in tasks]
+        duration = np.array([max(1, _to_int(t.get("Duration"), 1)) for t in tasks], dtype=np.int64)
+        max_load = np.array([max(0, _to_int(w.get("MaxLoadPerPhase"), 1)) for w in workers], dtype=float)
+
+        self.phase_count = max(
+            [s[-1] for s in worker_slots if s]
+            + [p[-1] + int(d) - 1 for p, d in zip(preferred, duration) if p]
+            + ([int(duration.max())] if duration.size else [])
+            + [1]
+        )
+        P = self.phase_count
+        self.skills = sorted({s for skills in worker_skills + task_skills for s in skills})
+        skill_pos = {s: i for i, s in enumerate(self.skills)}
+
+        # Worker × phase capacity and worker × skill incidence
+        capacity = np.zeros((len(workers), P))
+        slot_rows, slot_cols = _pairs(worker_slots, {p: p - 1 for p in range(1, P + 1)})
+        capacity[slot_rows, slot_cols] = max_load[slot_rows]
+
+        # Task × phase start probabilities, then shifted along each task's duration
+        combos: Dict[Tuple[Tuple[int, ...], int], int] = {}
+        combo_of = np.fromiter((combos.setdefault((tuple(phases), d), len(combos))
+                                for phases, d in zip(preferred, duration.tolist())), dtype=np.int64, count=len(tasks))
+        templates = np.zeros((len(combos), P))
+        for (phases, d), i in combos.items():
+            fits = [p for p in phases if p + d - 1 <= P] or list(range(1, P - d + 2))
+            templates[i, [p - 1 for p in fits]] = 1.0 / len(fits)
+        starts = templates[combo_of]
+        occupancy = np.zeros_like(starts)
+        for k in range(int(duration.max()) if duration.size else 0):
+            occupancy[:, k:] += starts[:, :P - k] * (duration > k)[:, None]
+
+        # Skill incidence stays sparse: one bincount per phase instead of dense worker × skill products
+        K = len(self.skills)
+        self.supply = _aggregate(capacity, _pairs(worker_skills, skill_pos), K)  # P × K
+        self.demand = _aggregate(occupancy, _pairs(task_skills, skill_pos), K)  # P × K
+        self.phase_supply = capacity.sum(axis=0)
+        self.phase_demand = occupancy.sum(axis=0)
+
+        self.worker_groups, group_pairs = _labels([w.get("WorkerGroup") or "" for w in workers])
+        self.categories, category_pairs = _labels([t.get("Category") or "" for t in tasks])
+        self.group_supply = _aggregate(capacity, group_pairs, len(self.worker_groups))  # P × groups
+        self.category_demand = _aggregate(occupancy, category_pairs, len(self.categories))  # P × categories
+
+    def shortfalls(self) -> List[Dict[str, Any]]:
+        gap = self.demand - self.supply
+        phases, skills = np.nonzero(gap > 1e-9)
+        order = np.argsort(-gap[phases, skills], kind="stable")[:MAX_SHORTFALLS]
+        return [
+            {
+                "phase": int(phases[i]) + 1,
+                "skill": self.skills[skills[i]],
+                "supply": round(float(self.supply[phases[i], skills[i]]), 3),
+                "demand": round(float(self.demand[phases[i], skills[i]]), 3),
+            }
+            for i in order
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        utilization = np.divide(self.phase_demand, self.phase_supply,
+                                out=np.full(self.phase_count, np.inf), where=self.phase_supply > 0)
+        skill_supply = self.supply.sum(axis=0)
+        skill_demand = self.demand.sum(axis=0)
+        rounded = lambda m: np.round(m, 3).tolist()
+        return {
+            "phases": list(range(1, self.phase_count + 1)),
+            "skills": self.skills,
+            "by_phase": [
+                {
+                    "phase": p + 1,
+                    "supply": round(float(self.phase_supply[p]), 3),
+                    "demand": round(float(self.phase_demand[p]), 3),
+                    "utilization": round(float(utilization[p]), 4) if np.isfinite(utilization[p]) else None,
+                    "oversaturated": bool(self.phase_demand[p] > self.phase_supply[p] + 1e-9),
+                }
+                for p in range(self.phase_count)
+            ],
+            "by_skill": [
+                {
+                    "skill": skill,
+                    "supply": round(float(skill_supply[k]), 3),
+                    "demand": round(float(skill_demand[k]), 3),
+                    "short_phases": [int(p) + 1 for p in np.nonzero(self.demand[:, k] > self.supply[:, k] + 1e-9)[0]],
+                }
+                for k, skill in enumerate(self.skills)
+            ],
+            "supply_matrix": rounded(self.supply),
+            "demand_matrix": rounded(self.demand),
+            "shortfalls": self.shortfalls(),
+            "by_worker_group": {g: rounded(self.group_supply[:, i]) for i, g in enumerate(self.worker_groups)},
+            "by_category": {c: rounded(self.category_demand[:, i]) for i, c in enumerate(self.categories)},
+        }
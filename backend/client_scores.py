@@ -0,0 +1,217 @@
+import heapq
+import numpy as np
+from typing import List, Dict, Any, Optional, Iterable
+
+from auto_fix import split_list
+from join_view import EligibilityJoin
+from scheduler import (
+    normalize_weights, parse_phase_list, _to_int, _snapshot, _unique_rows,
+    DEFAULT_WEIGHTS, WORKER_FIELDS, TASK_FIELDS, CLIENT_FIELDS,
+)
+
+SCORED_CLIENT_FIELDS = CLIENT_FIELDS + ("GroupTag",)
+COMPONENTS = tuple(DEFAULT_WEIGHTS)  # PriorityLevel, RequestedTaskIDs, Fairness, LoadLimit
+
+
+class ClientScorer:
+    """Scores every client with the priority weights, one column per weight.
+
+    PriorityLevel: (level - 1) / 4. RequestedTaskIDs: requested tasks
+    that some worker can serve, relative to the largest request list.
+    Fairness: 1 / number of clients sharing the GroupTag. LoadLimit: mean
+    1 / (1 + pressure) over the client's servable tasks, where pressure is
+    requesting clients per unit of qualified worker capacity
+    (MaxLoadPerPhase × AvailableSlots).
+
+    Components are kept per client, so a weight change is a single matrix
+    product and a client edit only recomputes the clients it touches.
+    """
+
+    def __init__(self, clients: List[Dict[str, Any]], workers: List[Dict[str, Any]], tasks: List[Dict[str, Any]],
+                 weights: Optional[Dict[str, float]] = None, join: Optional[EligibilityJoin] = None):
+        self.weights = normalize_weights(weights)
+        # Qualified workers per task come from the shared eligibility join; pass DataManager.join_view() to reuse it
+        self.eligibility = join if join is not None else EligibilityJoin(clients, workers, tasks)
+        self._build(clients, workers, tasks)
+
+    # --- Building blocks shared by __init__ and update() ---
+    def _build(self, clients, workers, tasks):
+        _, worker_rows = _unique_rows(workers, "WorkerID")
+        self.task_pos, task_rows = _unique_rows(tasks, "TaskID")
+        self._worker_snapshots = [_snapshot(w, WORKER_FIELDS) for w in worker_rows]
+        self._task_snapshots = [_snapshot(t, TASK_FIELDS) for t in task_rows]
+        self.eligibility.update(clients, workers, tasks)
+        self.task_capacity = self._task_capacity(worker_rows)
+
+        self.client_pos, client_rows = _unique_rows(clients, "ClientID")
+        self.client_ids: List[Any] = list(self.client_pos)
+        n = len(client_rows)
+        self._client_snapshots = [_snapshot(c, SCORED_CLIENT_FIELDS) for c in client_rows]
+        self._requests: List[List[int]] = [[] for _ in range(n)]
+        self._request_count = np.zeros(n, dtype=np.int64)
+        self._group_of: List[str] = [""] * n
+        self.components = np.zeros((n, len(COMPONENTS)))
+        self._requesters: List[set] = [set() for _ in task_rows]
+        self._groups: Dict[str, set] = {}
+        for i, client in enumerate(client_rows):
+            self._set_client(i, client)
+
+        # Every column in one vectorized pass
+        indptr = np.cumsum([0] + [len(r) for r in self._requests])
+        indices = np.fromiter((t for r in self._requests for t in r), dtype=np.int64, count=int(indptr[-1]))
+        owner = np.repeat(np.arange(n), np.diff(indptr))
+        self.task_demand = np.bincount(indices, minlength=len(task_rows)).astype(float)
+        servable = self.task_capacity[indices] > 0
+        self._feasible = np.bincount(owner, weights=servable, minlength=n)
+        relief = self._relief(indices) * servable
+        load = np.divide(np.bincount(owner, weights=relief, minlength=n), self._feasible,
+                         out=np.zeros(n), where=self._feasible > 0)
+        group_size = {g: len(members) for g, members in self._groups.items()}
+        self._most_requested = int(self._request_count.max()) if n else 0
+        self.components[:, 1] = self._requested_column()
+        self.components[:, 2] = [1.0 / group_size[g] for g in self._group_of]
+        self.components[:, 3] = load
+        self._rescore()
+
+    def _task_capacity(self, worker_rows) -> np.ndarray:
+        supply = np.array([
+            max(0, _to_int(w.get("MaxLoadPerPhase"), 1)) * len({p for p in parse_phase_list(w.get("AvailableSlots")) if p >= 1})
+            for w in worker_rows
+        ], dtype=float)
+        indptr, indices = self.eligibility.task_csr
+        owner = np.repeat(np.arange(len(indptr) - 1), np.diff(indptr))
+        return np.bincount(owner, weights=supply[indices], minlength=len(indptr) - 1)
+
+    def _relief(self, tasks: Any) -> np.ndarray:
+        capacity = self.task_capacity[tasks]
+        pressure = np.divide(self.task_demand[tasks], capacity, out=np.zeros(len(capacity)), where=capacity > 0)
+        return 1.0 / (1.0 + pressure)
+
+    def _set_client(self, i: int, client: Dict[str, Any]):
+        """Parse a client row into its request list, group and PriorityLevel column"""
+        for t in self._requests[i]:
+            self._requesters[t].discard(i)
+        if self._group_of[i] in self._groups:
+            self._groups[self._group_of[i]].discard(i)
+        requested = list(dict.fromkeys(split_list(client.get("RequestedTaskIDs", ""))))
+        self._requests[i] = [self.task_pos[t] for t in requested if t in self.task_pos]
+        self._request_count[i] = len(requested)
+        for t in self._requests[i]:
+            self._requesters[t].add(i)
+        self._group_of[i] = str(client.get("GroupTag") or "")
+        self._groups.setdefault(self._group_of[i], set()).add(i)
+        level = min(5, max(1, _to_int(client.get("PriorityLevel"), 3)))
+        self.components[i, 0] = (level - 1) / 4
+
+    def _requested_column(self) -> np.ndarray:
+        most = self._most_requested
+        return self._feasible / most if most else np.zeros(len(self._feasible))
+
+    def _refresh_clients(self, clients: Iterable[int]):
+        for i in clients:
+            tasks = np.array(self._requests[i], dtype=np.int64)
+            servable = self.task_capacity[tasks] > 0
+            self._feasible[i] = servable.sum()
+            self.components[i, 3] = float(self._relief(tasks)[servable].mean()) if servable.any() else 0.0
+            self.components[i, 2] = 1.0 / len(self._groups[self._group_of[i]])
+
+    def _rescore(self):
+        w = np.array([self.weights[c] for c in COMPONENTS])
+        self.scores = self.components @ w
+        self._order = None  # ranking, sorted lazily by page()
+
+    # --- Incremental maintenance ---
+    def set_weights(self, weights: Optional[Dict[str, float]]):
+        self.weights = normalize_weights(weights)
+        self._rescore()
+
+    def update(self, clients: List[Dict[str, Any]], workers: List[Dict[str, Any]],
+               tasks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Bring scores in line with the data; only clients touched by an edit are recomputed.
+
+        Worker or task edits change task capacity for everyone, as do added
+        or removed rows, so those rebuild all columns in one pass.
+        """
+        client_pos, client_rows = _unique_rows(clients, "ClientID")
+        _, worker_rows = _unique_rows(workers, "WorkerID")
+        task_pos, task_rows = _unique_rows(tasks, "TaskID")
+        if (list(client_pos) != self.client_ids or list(task_pos) != list(self.task_pos)
+                or [_snapshot(w, WORKER_FIELDS) for w in worker_rows] != self._worker_snapshots
+                or [_snapshot(t, TASK_FIELDS) for t in task_rows] != self._task_snapshots):
+            self._build(clients, workers, tasks)
+            return {"rebuilt": True, "rescored": len(self.client_ids)}
+
+        affected = set()
+        for i, client in enumerate(client_rows):
+            snapshot = _snapshot(client, SCORED_CLIENT_FIELDS)
+            if snapshot == self._client_snapshots[i]:
+                continue
+            self._client_snapshots[i] = snapshot
+            old_tasks, old_group = set(self._requests[i]), self._group_of[i]
+            self._set_client(i, client)
+            new_tasks = set(self._requests[i])
+            for t in old_tasks - new_tasks:
+                self.task_demand[t] -= 1
+            for t in new_tasks - old_tasks:
+                self.task_demand[t] += 1
+            # Demand shifts change the pressure on every requester of those tasks; group moves change both groups
+            for t in old_tasks ^ new_tasks:
+                affected |= self._requesters[t]
+            if old_group != self._group_of[i]:
+                affected |= self._groups.get(old_group, set()) | self._groups[self._group_of[i]]
+            affected.add(i)
+        if not affected:
+            return {"rebuilt": False, "rescored": 0}
+
+        self._refresh_clients(affected)
+        most = int(self._request_count.max())
+        if most != self._most_requested:
+            # The normaliser moved, so every client's RequestedTaskIDs column shifts
+            self._most_requested = most
+            self.components[:, 1] = self._requested_column()
+        else:
+            rows = np.fromiter(affected, dtype=np.int64)
+            self.components[rows, 1] = self._feasible[rows] / most if most else 0.0
+        self._rescore()
+        return {"rebuilt": False, "rescored": len(affected)}
+
+    # --- Queries ---
+    def _entry(self, i: int, rank: Optional[int] = None) -> Dict[str, Any]:
+        entry = {
+            "client_id": self.client_ids[i],
+            "score": round(float(self.scores[i]), 6),
+            "components": {c: round(float(v), 6) for c, v in zip(COMPONENTS, self.components[i])},
+            "group": self._group_of[i],
+        }
+        if rank is not None:
+            entry["rank"] = rank
+        return entry
+
+    def top(self, k: int, group: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Highest-scoring k clients via a bounded heap; ties keep input order"""
+        candidates = sorted(self._groups.get(group, ())) if group is not None else range(len(self.client_ids))
+        scores = self.scores
+        best = heapq.nsmallest(max(0, k), ((-scores[i], i) for i in candidates))
+        return [self._entry(i, rank + 1) for rank, (_, i) in enumerate(best)]
+
+    def page(self, offset: int = 0, limit: int = 50) -> Dict[str, Any]:
+        """Slice of the full ranking; the order is sorted once per score change"""
+        if self._order is None:
+            self._order = np.lexsort((np.arange(len(self.scores)), -self.scores))
+        offset = max(0, offset)
+        window = self._order[offset:offset + max(0, limit)]
+        return {
+            "total": len(self.client_ids),
+            "offset": offset,
+            "limit": limit,
+            "clients": [self._entry(int(i), offset + n + 1) for n, i in enumerate(window)],
+        }
+
+    def score_of(self, client_id: Any) -> Optional[Dict[str, Any]]:
+        i = self.client_pos.get(client_id)
+        if i is None:
+            return None
+        if self._order is None:
+            self.page(0, 0)
+        rank = int(np.nonzero(self._order == i)[0][0]) + 1
+        return self._entry(i, rank)
@@ -0,0 +1,211 @@
+import json
+import numpy as np
+import pandas as pd
+from typing import List, Dict, Any, Optional, Callable
+
+# A compiled predicate maps a column store to a boolean row mask
+Predicate = Callable[["ColumnStore"], np.ndarray]
+
+COMPARISON_OPS = (">=", "<=", ">", "<", "==", "!=", "contains")
+
+
+class ColumnStore:
+    """Columnar, indexed view over one entity table, built once per dataset version"""
+
+    def __init__(self, records: List[Dict[str, Any]], id_field: str):
+        self.records = records
+        self.id_field = id_field
+        self.size = len(records)
+        self.frame = pd.DataFrame.from_records(records) if records else pd.DataFrame()
+        self._indexes: Dict[str, Dict[Any, np.ndarray]] = {}
+        self._values: Dict[str, np.ndarray] = {}
+        self._numeric: Dict[str, np.ndarray] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._attributes: Dict[str, pd.Series] = {}
+        self._parsed_attributes: Optional[pd.Series] = None
+
+    def has(self, name: str) -> bool:
+        return name in self.frame.columns
+
+    def column(self, name: str) -> pd.Series:
+        if not self.has(name):
+            return pd.Series([None] * self.size, dtype=object)
+        return self.frame[name]
+
+    def values(self, name: str) -> np.ndarray:
+        """Column as a cached object array, for positional lookups"""
+        if name not in self._values:
+            self._values[name] = self.column(name).to_numpy(dtype=object)
+        return self._values[name]
+
+    def ids(self) -> np.ndarray:
+        return self.values(self.id_field)
+
+    def numeric(self, name: str) -> np.ndarray:
+        """Column as float64 with NaN for missing or non-numeric values"""
+        if name not in self._numeric:
+            col = self.column(name)
+            # Booleans are not numbers for comparison purposes
+            col = col.where(~col.map(lambda v: isinstance(v, bool)), None) if col.dtype == object else col
+            self._numeric[name] = pd.to_numeric(col, errors="coerce").to_numpy(dtype=float)
+        return self._numeric[name]
+
+    def index(self, name: str) -> Optional[Dict[Any, np.ndarray]]:
+        """Hash index value -> row positions, or None if the column is not hashable"""
+        if name not in self._indexes:
+            if not self.has(name):
+                self._indexes[name] = {}
+            else:
+                try:
+                    self._indexes[name] = {
+                        key: np.asarray(pos) for key, pos in self.frame.groupby(name, sort=False, dropna=True).indices.items()
+                    }
+                except TypeError:
+                    self._indexes[name] = None
+        return self._indexes[name]
+
+    def stats(self, name: str) -> Dict[str, Any]:
+        if name not in self._stats:
+            col = self.column(name)
+            nums = self.numeric(name)
+            valid = nums[~np.isnan(nums)]
+            index = self.index(name)
+            self._stats[name] = {
+                "nulls": int(col.isna().sum()),
+                "distinct": len(index) if index is not None else None,
+                "min": float(valid.min()) if valid.size else None,
+                "max": float(valid.max()) if valid.size else None,
+                "numeric_count": int(valid.size),
+            }
+        return self._stats[name]
+
+    def attribute(self, key: str) -> pd.Series:
+        """Values of one key inside AttributesJSON, parsed once for the whole table"""
+        if self._parsed_attributes is None:
+            self._parsed_attributes = self.column("AttributesJSON").map(_parse_attributes)
+        if key not in self._attributes:
+            self._attributes[key] = self._parsed_attributes.map(lambda d: d.get(key))
+        return self._attributes[key]
+
+    def mask_for_ids(self, ids: List[Any]) -> np.ndarray:
+        mask = np.zeros(self.size, dtype=bool)
+        index = self.index(self.id_field) or {}
+        for value in ids:
+            pos = index.get(value)
+            if pos is not None:
+                mask[pos] = True
+        return mask
+
+
+def _parse_attributes(value: Any) -> Dict[str, Any]:
+    if isinstance(value, dict):
+        return value
+    if isinstance(value, str) and value:
+        try:
+            parsed = json.loads(value)
+            return parsed if isinstance(parsed, dict) else {}
+        except Exception:
+            return {}
+    return {}
+
+
+def _compare(store: ColumnStore, field: str, op: str, value: Any) -> np.ndarray:
+    col = store.column(field)
+
+    if op in ("==", "!=") and not isinstance(value, (list, dict)):
+        index = store.index(field)
+        if index is not None:
+            mask = np.zeros(store.size, dtype=bool)
+            pos = index.get(value)
+            if pos is not None:
+                mask[pos] = True
+        else:
+            mask = col.map(lambda v: v == value).to_numpy(dtype=bool)
+        return mask if op == "==" else (~mask & col.notna().to_numpy())
+
+    if op == "contains":
+        # Missing cells are NaN in the frame, and "nan" must not match a substring
+        return (col.notna() & col.map(lambda v: str(value) in str(v))).to_numpy(dtype=bool)
+
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        nums = store.numeric(field)
+        with np.errstate(invalid="ignore"):
+            if op == ">=":
+                return nums >= value
+            if op == "<=":
+                return nums <= value
+            if op == ">":
+                return nums > value
+            if op == "<":
+                return nums < value
+
+    # Non-numeric ordering comparisons fall back to per-value evaluation
+    def check(v):
+        try:
+            return v is not None and {
+                ">=": v >= value, "<=": v <= value, ">": v > value, "<": v < value,
+            }.get(op, True)
+        except TypeError:
+            return False
+    return col.map(check).to_numpy(dtype=bool)
+
+
+def compile_condition(condition: Any) -> Predicate:
+    """Compile a rule condition (same shape as DataManager._matches_condition) to a mask function"""
+    clauses = []
+    if isinstance(condition, dict):
+        for field, expected in condition.items():
+            if field == "entity_type":
+                continue
+            if isinstance(expected, dict):
+                for op, value in expected.items():
+                    if op in COMPARISON_OPS:
+                        clauses.append((field, op, value))
+            else:
+                clauses.append((field, "==", expected))
+
+    def predicate(store: ColumnStore) -> np.ndarray:
+        mask = np.ones(store.size, dtype=bool)
+        for field, op, value in clauses:
+            if not mask.any():
+                break
+            mask &= _compare(store, field, op, value)
+        return mask
+
+    predicate.clauses = clauses
+    return predicate
+
+
+def estimate_selectivity(store: ColumnStore, predicate: Predicate) -> float:
+    """Estimate the matched fraction from column statistics alone (independence assumed)"""
+    if store.size == 0:
+        return 0.0
+    selectivity = 1.0
+    for field, op, value in getattr(predicate, "clauses", []):
+        stats = store.stats(field)
+        non_null = (store.size - stats["nulls"]) / store.size
+        if op in ("==", "!="):
+            index = store.index(field)
+            if index is not None and not isinstance(value, (list, dict)):
+                eq = len(index.get(value, ())) / store.size
+            else:
+                eq = non_null / max(stats["distinct"] or 1, 1)
+            sel = eq if op == "==" else non_null - eq
+        elif op in (">=", "<=", ">", "<") and stats["min"] is not None and isinstance(value, (int, float)):
+            lo, hi = stats["min"], stats["max"]
+            numeric_share = stats["numeric_count"] / store.size
+            if hi == lo:
+                frac = 1.0 if _compare_scalar(lo, op, value) else 0.0
+            elif op in (">=", ">"):
+                frac = (hi - value) / (hi - lo)
+            else:
+                frac = (value - lo) / (hi - lo)
+            sel = numeric_share * min(1.0, max(0.0, frac))
+        else:
+            sel = non_null / 3  # Default guess for substring matches
+        selectivity *= sel
+    return max(0.0, min(1.0, selectivity))
+
+
+def _compare_scalar(a: float, op: str, b: float) -> bool:
+    return {">=": a >= b, "<=": a <= b, ">": a > b, "<": a < b}[op]
@@ -0,0 +1,80 @@
+from typing import List, Dict, Any, Iterable
+
+
+class CoRunGroups:
+    """Disjoint-set (union-find) of task IDs that must run together"""
+
+    def __init__(self):
+        self._parent: Dict[Any, Any] = {}
+        self._members: Dict[Any, List[Any]] = {}  # root -> all task IDs in its component
+
+    @classmethod
+    def from_rules(cls, rules: Iterable[Dict[str, Any]], task_ids: Iterable[Any]) -> "CoRunGroups":
+        """Components of the active coRun rules, over the tasks that exist"""
+        known = set(task_ids)
+        groups = cls()
+        for rule in rules:
+            if rule.get("type") == "coRun" and rule.get("isActive", True):
+                params = rule.get("parameters", {}) or {}
+                groups.union_all(t for t in params.get("task_ids", []) or [] if t in known)
+        return groups
+
+    def __contains__(self, task_id: Any) -> bool:
+        return task_id in self._parent
+
+    def add(self, task_id: Any):
+        if task_id not in self._parent:
+            self._parent[task_id] = task_id
+            self._members[task_id] = [task_id]
+
+    def find(self, task_id: Any) -> Any:
+        """Root of the task's component, with path halving"""
+        self.add(task_id)
+        parent = self._parent
+        while parent[task_id] != task_id:
+            parent[task_id] = parent[parent[task_id]]
+            task_id = parent[task_id]
+        return task_id
+
+    def union(self, a: Any, b: Any) -> bool:
+        """Merge the components of a and b; returns False if they were already joined"""
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a == root_b:
+            return False
+        # Union by size: the smaller member list moves
+        if len(self._members[root_a]) < len(self._members[root_b]):
+            root_a, root_b = root_b, root_a
+        self._parent[root_b] = root_a
+        self._members[root_a].extend(self._members.pop(root_b))
+        return True
+
+    def union_all(self, task_ids: Iterable[Any]) -> int:
+        """Join every task in task_ids into one component; returns the number of merges"""
+        ids = list(task_ids)
+        if not ids:
+            return 0
+        first = ids[0]
+        self.add(first)
+        return sum(1 for other in ids[1:] if self.union(first, other))
+
+    def component(self, task_id: Any) -> List[Any]:
+        """All tasks that run together with task_id (including itself)"""
+        if task_id not in self._parent:
+            return [task_id]
+        return sorted(self._members[self.find(task_id)], key=str)
+
+    def component_id(self, task_id: Any) -> str:
+        """Canonical component label: the smallest task ID in the component"""
+        return str(self.component(task_id)[0])
+
+    def components(self, min_size: int = 2) -> List[List[Any]]:
+        """Every component with at least min_size tasks, sorted for stable output"""
+        groups = [sorted(m, key=str) for m in self._members.values() if len(m) >= min_size]
+        return sorted(groups, key=lambda g: str(g[0]))
+
+    def to_dict(self) -> Dict[str, Any]:
+        components = self.components()
+        return {
+            "components": [{"id": str(c[0]), "tasks": c} for c in components],
+            "total_components": len(components),
+        }
@@ -0,0 +1,224 @@
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
+
+from auto_fix import split_list
+
+EMPTY = np.zeros(0, dtype=np.int32)
+
+
+def _pack(rows: List[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """Per-row index arrays as CSR (indptr, indices)"""
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    np.cumsum([len(r) for r in rows], out=indptr[1:])
+    indices = np.concatenate(rows).astype(np.int32, copy=False) if rows else EMPTY
+    return indptr, indices
+
+
+def _unique_rows(rows: List[Dict[str, Any]], id_field: str) -> Tuple[Dict[Any, int], List[Dict[str, Any]]]:
+    """First row per ID, in input order"""
+    positions: Dict[Any, int] = {}
+    unique = []
+    for row in rows:
+        row_id = row.get(id_field)
+        if row_id and row_id not in positions:
+            positions[row_id] = len(unique)
+            unique.append(row)
+    return positions, unique
+
+
+class EligibilityJoin:
+    """Materialized client → requested task → eligible worker join.
+
+    Both hops are CSR integer arrays over row positions: client_indptr /
+    client_tasks for RequestedTaskIDs and task_indptr / task_workers for
+    the workers holding every RequiredSkill. Tasks with the same skill
+    set share one eligible-worker array. update() re-parses only changed
+    rows and re-intersects only the skill sets touched by a worker edit;
+    the CSR arrays are re-packed lazily on the next read.
+    """
+
+    def __init__(self, clients: List[Dict[str, Any]], workers: List[Dict[str, Any]], tasks: List[Dict[str, Any]]):
+        self._build(clients, workers, tasks)
+
+    def _build(self, clients, workers, tasks):
+        self.worker_pos, worker_rows = _unique_rows(workers, "WorkerID")
+        self.task_pos, task_rows = _unique_rows(tasks, "TaskID")
+        self.client_pos, client_rows = _unique_rows(clients, "ClientID")
+        self.worker_ids: List[Any] = list(self.worker_pos)
+        self.task_ids: List[Any] = list(self.task_pos)
+        self.client_ids: List[Any] = list(self.client_pos)
+
+        self._worker_raw = [w.get("Skills", "") for w in worker_rows]
+        self._worker_skills = [frozenset(split_list(raw)) for raw in self._worker_raw]
+        self._skill_workers: Dict[str, set] = {}
+        for i, skills in enumerate(self._worker_skills):
+            for skill in skills:
+                self._skill_workers.setdefault(skill, set()).add(i)
+
+        self._task_raw = [t.get("RequiredSkills", "") for t in task_rows]
+        self._task_signature = [frozenset(split_list(raw)) for raw in self._task_raw]
+        self._eligible: Dict[frozenset, np.ndarray] = {}
+
+        self._client_raw = [c.get("RequestedTaskIDs", "") for c in client_rows]
+        self._requests: List[np.ndarray] = [EMPTY] * len(client_rows)
+        self.unknown: Dict[Any, List[Any]] = {}
+        for i in range(len(client_rows)):
+            self._set_requests(i)
+        self._client_csr = self._task_csr = self._reverse_csr = None
+
+    def _set_requests(self, i: int):
+        requested = list(dict.fromkeys(split_list(self._client_raw[i])))
+        self._requests[i] = np.array([self.task_pos[t] for t in requested if t in self.task_pos], dtype=np.int32)
+        missing = [t for t in requested if t not in self.task_pos]
+        if missing:
+            self.unknown[self.client_ids[i]] = missing
+        else:
+            self.unknown.pop(self.client_ids[i], None)
+
+    def _eligible_for(self, signature: frozenset) -> np.ndarray:
+        if signature not in self._eligible:
+            holders = sorted((self._skill_workers.get(s, set()) for s in signature), key=len)
+            workers = set.intersection(*holders) if holders else range(len(self.worker_ids))
+            self._eligible[signature] = np.array(sorted(workers), dtype=np.int32)
+        return self._eligible[signature]
+
+    def update(self, clients: List[Dict[str, Any]], workers: List[Dict[str, Any]],
+               tasks: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Patch the join to match the data; added or removed rows rebuild it"""
+        worker_pos, worker_rows = _unique_rows(workers, "WorkerID")
+        task_pos, task_rows = _unique_rows(tasks, "TaskID")
+        client_pos, client_rows = _unique_rows(clients, "ClientID")
+        if list(worker_pos) != self.worker_ids or list(task_pos) != self.task_ids or list(client_pos) != self.client_ids:
+            self._build(clients, workers, tasks)
+            return {"rebuilt": True}
+
+        touched_skills = set()
+        workers_changed = 0
+        for i, worker in enumerate(worker_rows):
+            raw = worker.get("Skills", "")
+            if raw == self._worker_raw[i]:
+                continue
+            self._worker_raw[i] = raw
+            skills = frozenset(split_list(raw))
+            for skill in self._worker_skills[i] - skills:
+                self._skill_workers[skill].discard(i)
+            for skill in skills - self._worker_skills[i]:
+                self._skill_workers.setdefault(skill, set()).add(i)
+            touched_skills |= skills ^ self._worker_skills[i]
+            self._worker_skills[i] = skills
+            workers_changed += 1
+        if touched_skills:
+            # Only skill sets mentioning a gained or lost skill can change eligibility
+            stale = [sig for sig in self._eligible if sig & touched_skills]
+            for signature in stale:
+                del self._eligible[signature]
+            if stale:
+                self._task_csr = None
+
+        tasks_changed = 0
+        for i, task in enumerate(task_rows):
+            raw = task.get("RequiredSkills", "")
+            if raw != self._task_raw[i]:
+                self._task_raw[i] = raw
+                self._task_signature[i] = frozenset(split_list(raw))
+                tasks_changed += 1
+        if tasks_changed:
+            self._task_csr = None
+
+        clients_changed = 0
+        for i, client in enumerate(client_rows):
+            raw = client.get("RequestedTaskIDs", "")
+            if raw != self._client_raw[i]:
+                self._client_raw[i] = raw
+                self._set_requests(i)
+                clients_changed += 1
+        if clients_changed:
+            self._client_csr = self._reverse_csr = None
+        return {"rebuilt": False, "workers": workers_changed, "tasks": tasks_changed, "clients": clients_changed}
+
+    # --- CSR arrays ---
+    @property
+    def client_csr(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._client_csr is None:
+            self._client_csr = _pack(self._requests)
+        return self._client_csr
+
+    @property
+    def task_csr(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self._task_csr is None:
+            self._task_csr = _pack([self._eligible_for(sig) for sig in self._task_signature])
+        return self._task_csr
+
+    @property
+    def reverse_csr(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Task → requesting clients, the transpose of client_csr"""
+        if self._reverse_csr is None:
+            indptr, indices = self.client_csr
+            owners = np.repeat(np.arange(len(self.client_ids), dtype=np.int32), np.diff(indptr))
+            order = np.argsort(indices, kind="stable")
+            counts = np.bincount(indices, minlength=len(self.task_ids))
+            reverse_indptr = np.zeros(len(self.task_ids) + 1, dtype=np.int64)
+            np.cumsum(counts, out=reverse_indptr[1:])
+            self._reverse_csr = (reverse_indptr, owners[order])
+        return self._reverse_csr
+
+    def eligible_counts(self) -> np.ndarray:
+        return np.diff(self.task_csr[0])
+
+    # --- Lookups by ID ---
+    def tasks_for_client(self, client_id: Any) -> List[Any]:
+        i = self.client_pos.get(client_id)
+        if i is None:
+            return []
+        indptr, indices = self.client_csr
+        return [self.task_ids[t] for t in indices[indptr[i]:indptr[i + 1]].tolist()]
+
+    def workers_for_task(self, task_id: Any) -> List[Any]:
+        t = self.task_pos.get(task_id)
+        if t is None:
+            return []
+        indptr, indices = self.task_csr
+        return [self.worker_ids[w] for w in indices[indptr[t]:indptr[t + 1]].tolist()]
+
+    def clients_for_task(self, task_id: Any) -> List[Any]:
+        t = self.task_pos.get(task_id)
+        if t is None:
+            return []
+        indptr, indices = self.reverse_csr
+        return [self.client_ids[c] for c in indices[indptr[t]:indptr[t + 1]].tolist()]
+
+    def workers_for_client(self, client_id: Any) -> Optional[Dict[str, Any]]:
+        """Eligible workers per requested task, and every worker that can serve at least one"""
+        if client_id not in self.client_pos:
+            return None
+        per_task = {t: self.workers_for_task(t) for t in self.tasks_for_client(client_id)}
+        task_indptr, task_workers = self.task_csr
+        rows = [task_workers[task_indptr[self.task_pos[t]]:task_indptr[self.task_pos[t] + 1]] for t in per_task]
+        union = np.unique(np.concatenate(rows)) if rows else EMPTY
+        return {
+            "client_id": client_id,
+            "tasks": per_task,
+            "any_task": [self.worker_ids[w] for w in union.tolist()],
+            "unknown_tasks": self.unknown.get(client_id, []),
+        }
+
+    def unservable_requests(self) -> List[Tuple[Any, Any]]:
+        """(client_id, task_id) pairs whose task exists but no worker holds all its RequiredSkills"""
+        indptr, indices = self.client_csr
+        empty = self.eligible_counts()[indices] == 0
+        owners = np.repeat(np.arange(len(self.client_ids)), np.diff(indptr))
+        return [(self.client_ids[c], self.task_ids[t]) for c, t in zip(owners[empty].tolist(), indices[empty].tolist())]
+
+    def summary(self) -> Dict[str, Any]:
+        client_indptr, client_tasks = self.client_csr
+        counts = self.eligible_counts()
+        return {
+            "clients": len(self.client_ids),
+            "tasks": len(self.task_ids),
+            "workers": len(self.worker_ids),
+            "requests": int(len(client_tasks)),
+            "eligible_pairs": int(counts.sum()),
+            "tasks_without_workers": [self.task_ids[t] for t in np.nonzero(counts == 0)[0].tolist()],
+            "clients_with_unknown_tasks": len(self.unknown),
+            "unservable_requests": len(self.unservable_requests()),
+        }
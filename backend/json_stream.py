@@ -0,0 +1,132 @@
+import json
+from typing import List, Any, Optional
+
+# Characters a JSON value can start with
+VALUE_START = set('{["-0123456789tfn')
+
+
+class JSONStream:
+    """Complete JSON values out of model output that arrives in chunks.
+
+    mode "array" yields each element of the first top-level array as soon
+    as its closing character arrives; mode "object" yields the first
+    top-level object once it closes. Prose or code fences around the JSON
+    are skipped, including bracketed prose such as "[see below]": a
+    candidate array or object whose first value does not parse is
+    abandoned and scanning resumes right after its opening character.
+    Later elements that do not parse are counted in errors.
+    """
+
+    def __init__(self, mode: str = "array"):
+        if mode not in ("array", "object"):
+            raise ValueError(f"Unknown mode: {mode!r}")
+        self.mode = mode
+        self.errors = 0
+        self.done = False
+        self._buffer = ""
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._start: Optional[int] = None  # start of the value being collected
+        self._anchor: Optional[int] = None  # opening character of the candidate array or object
+        self._emitted = 0  # values taken from the current candidate
+
+    def _emit(self, end: int, out: List[Any]) -> bool:
+        """Parse the collected value; False means the candidate was prose and scanning must restart"""
+        try:
+            out.append(json.loads(self._buffer[self._start:end]))
+        except ValueError:
+            if not self._emitted:
+                return False
+            self.errors += 1
+        self._emitted += 1
+        self._start = None
+        return True
+
+    def _reset(self) -> int:
+        """Drop the current candidate; returns where to resume scanning"""
+        resume = self._anchor + 1
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._start = None
+        self._anchor = None
+        return resume
+
+    def feed(self, chunk: str) -> List[Any]:
+        out: List[Any] = []
+        if self.done:
+            return out
+        self._buffer += chunk
+        resume: Optional[int] = self._pos
+        while resume is not None:
+            resume = self._scan(resume, out)
+        self._pos = len(self._buffer)
+        return out
+
+    def _scan(self, begin: int, out: List[Any]) -> Optional[int]:
+        """Scan the buffer from begin; returns a position to rescan from if a candidate turned out to be prose"""
+        # Values are collected at this depth: inside the array, or at the top level for an object
+        level = 1 if self.mode == "array" else 0
+        buffer = self._buffer
+        for i in range(begin, len(buffer)):
+            ch = buffer[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == level and self._start is not None and buffer[self._start] == '"':
+                        if not self._emit(i + 1, out):
+                            return self._reset()
+                continue
+
+            if self._depth == 0 and self.mode == "array":
+                if ch == "[":
+                    self._depth = 1
+                    self._anchor = i
+                    self._emitted = 0
+                continue
+            if self._depth == 0 and self.mode == "object":
+                if ch != "{":
+                    continue
+                self._anchor = i
+                self._emitted = 0
+
+            if (self.mode == "array" and self._depth == level and not self._emitted and self._start is None
+                    and not ch.isspace() and ch not in VALUE_START and ch != "]"):
+                return self._reset()  # "[see below]" is not an array
+
+            if ch == '"':
+                self._in_string = True
+                if self._depth == level and self._start is None:
+                    self._start = i
+            elif ch in "{[":
+                if self._depth == level and self._start is None:
+                    self._start = i
+                self._depth += 1
+            elif ch in "}]":
+                if self._depth == level and self._start is not None:
+                    if not self._emit(i, out):  # bare scalar closed by the array end
+                        return self._reset()
+                self._depth -= 1
+                if self._depth == level and self._start is not None:
+                    if not self._emit(i + 1, out):
+                        return self._reset()
+                    if self.mode == "object":
+                        self.done = True
+                        return None
+                if self._depth < level or self._depth == 0:
+                    self.done = True
+                    return None
+            elif self._depth == level:
+                if ch == ",":
+                    if self._start is not None:
+                        if not self._emit(i, out):  # number, true, false or null
+                            return self._reset()
+                elif not ch.isspace() and self._start is None:
+                    self._start = i
+        return None
@@ -0,0 +1,201 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Any, Optional, Callable
+
+# Set inside `with bypass_cache():` so one request skips the cache without threading a flag through every helper
+_bypass: ContextVar[bool] = ContextVar("llm_cache_bypass", default=False)
+
+
+@contextmanager
+def bypass_cache(active: bool = True):
+    token = _bypass.set(active)
+    try:
+        yield
+    finally:
+        _bypass.reset(token)
+
+
+def cache_key(*parts: Any) -> str:
+    return hashlib.sha256(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """LRU of model responses with a TTL, optionally backed by SQLite on disk.
+
+    Entries expire ttl seconds after they were stored. The memory tier
+    holds max_entries; the disk tier (when path is set) holds
+    max_disk_entries and survives restarts. Thread-safe, since handlers
+    may call the model from worker threads.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl: float = 3600.0, path: Optional[str] = None,
+                 max_disk_entries: int = 10000):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_disk_entries = max_disk_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (stored_at, value)
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expired": 0, "bypassed": 0}
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, stored_at REAL, value TEXT)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_stored_at ON responses (stored_at)")
+            self._db.commit()
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        directory = os.getenv("LLM_CACHE_DIR")
+        return cls(
+            max_entries=int(os.getenv("LLM_CACHE_SIZE", "512")),
+            ttl=float(os.getenv("LLM_CACHE_TTL", "3600")),
+            path=os.path.join(directory, "llm_cache.sqlite3") if directory else None,
+            max_disk_entries=int(os.getenv("LLM_CACHE_DISK_SIZE", "10000")),
+        )
+
+    @property
+    def bypassed(self) -> bool:
+        return _bypass.get()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock:
+            if self.bypassed:
+                self.stats["bypassed"] += 1
+                return None
+            entry = self._entries.get(key)
+            if entry is not None:
+                if now - entry[0] <= self.ttl:
+                    self._entries.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return entry[1]
+                del self._entries[key]
+                self.stats["expired"] += 1
+            if self._db is not None:
+                row = self._db.execute("SELECT stored_at, value FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None and now - row[0] <= self.ttl:
+                    self._remember(key, row[0], row[1])
+                    self.stats["disk_hits"] += 1
+                    return row[1]
+            self.stats["misses"] += 1
+            return None
+
+    def put(self, key: str, value: str):
+        now = time.time()
+        with self._lock:
+            # Stored even when bypassed: a bypass forces a fresh answer and refreshes the entry
+            self._remember(key, now, value)
+            self.stats["stores"] += 1
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?)", (key, now, value))
+                # Drop expired rows and everything beyond the newest max_disk_entries
+                self._db.execute("DELETE FROM responses WHERE stored_at < ?", (now - self.ttl,))
+                self._db.execute(
+                    "DELETE FROM responses WHERE key NOT IN (SELECT key FROM responses ORDER BY stored_at DESC LIMIT ?)",
+                    (self.max_disk_entries,),
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, stored_at: float, value: str):
+        self._entries[key] = (stored_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["disk_hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "hit_rate": round((self.stats["hits"] + self.stats["disk_hits"]) / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "disk": self._db is not None,
+            }
+
+
+_shared: Optional[ResponseCache] = None
+
+
+def shared_cache() -> ResponseCache:
+    """One cache per process, so answers survive a new upload's DataManager"""
+    global _shared
+    if _shared is None:
+        _shared = ResponseCache.from_env()
+    return _shared
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Optional[str] = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Concurrent calls with the same key share one execution.
+
+    The first caller runs fn; callers arriving while it runs wait for it
+    and get its result, or its exception. Nothing is kept after the call
+    returns: remembering answers is the ResponseCache's job.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "coalesced": 0}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            self.stats["calls" if leader else "coalesced"] += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+        try:
+            flight.result = fn()
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self.stats, "in_flight": len(self._flights)}
+
+
+_flights: Optional[SingleFlight] = None
+
+
+def shared_flights() -> SingleFlight:
+    """One per process, so identical prompts from any DataManager share a call"""
+    global _flights
+    if _flights is None:
+        _flights = SingleFlight()
+    return _flights
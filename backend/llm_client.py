@@ -0,0 +1,214 @@
+import os
+import time
+import random
+import threading
+from typing import Optional, Callable, Iterator
+
+from azure.ai.inference import ChatCompletionsClient
+from azure.ai.inference.models import SystemMessage, UserMessage
+from azure.core.credentials import AzureKeyCredential
+from azure.core.exceptions import HttpResponseError, ServiceRequestError, ServiceResponseError
+
+from llm_cache import ResponseCache, SingleFlight, shared_cache, shared_flights, cache_key, bypass_cache
+
+# Rate limiting, timeouts and upstream hiccups are worth another attempt; anything else is the caller's problem
+TRANSIENT_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+class LLMSettings:
+    """Model endpoint and call limits, read from the environment"""
+
+    def __init__(self):
+        self.token = os.getenv("GITHUB_TOKEN")
+        if not self.token:
+            raise ValueError("Missing GITHUB_TOKEN env variable")
+        self.endpoint = os.getenv("GITHUB_AI_ENDPOINT", "https://models.github.ai/inference")
+        self.model = os.getenv("GITHUB_AI_MODEL", "mistral-ai/mistral-medium-2505")
+        # Lower temperatures make cached answers representative of what the model would say again
+        self.temperature = float(os.getenv("GITHUB_AI_TEMPERATURE", "0.7"))
+        self.connect_timeout = float(os.getenv("LLM_CONNECT_TIMEOUT", "10"))
+        self.timeout = float(os.getenv("LLM_TIMEOUT", "60"))
+        self.max_retries = int(os.getenv("LLM_MAX_RETRIES", "3"))
+        self.backoff_base = float(os.getenv("LLM_BACKOFF_BASE", "0.5"))
+        self.backoff_max = float(os.getenv("LLM_BACKOFF_MAX", "8"))
+        self.max_in_flight = max(1, int(os.getenv("LLM_MAX_CONCURRENCY", "4")))
+        self.max_tokens = int(os.getenv("LLM_MAX_TOKENS", "1000"))
+
+
+def is_transient(error: Exception) -> bool:
+    if isinstance(error, HttpResponseError):
+        return error.status_code in TRANSIENT_STATUS
+    return isinstance(error, (ServiceRequestError, ServiceResponseError, TimeoutError, ConnectionError))
+
+
+def backoff_delay(attempt: int, settings: LLMSettings, error: Optional[Exception] = None) -> float:
+    """Full-jitter exponential backoff, never shorter than a server's Retry-After"""
+    delay = random.uniform(0, min(settings.backoff_max, settings.backoff_base * 2 ** attempt))
+    response = getattr(error, "response", None)
+    retry_after = response.headers.get("Retry-After") if response is not None and response.headers else None
+    try:
+        delay = max(delay, min(settings.backoff_max, float(retry_after)))
+    except (TypeError, ValueError):
+        pass
+    return delay
+
+
+class GPTAgent:
+    """Blocking model client; safe to share between request threads.
+
+    Identical prompts asked while one is already in flight wait for that
+    call instead of making their own, cache or no cache (a bypass still
+    joins: the answer it gets is fresh).
+    """
+
+    def __init__(self, settings: Optional[LLMSettings] = None, cache: Optional[ResponseCache] = None,
+                 flights: Optional[SingleFlight] = None):
+        self.settings = settings or LLMSettings()
+        # retry_total=0: retries happen here, with jitter and the in-flight cap held only while calling
+        self.client = ChatCompletionsClient(
+            endpoint=self.settings.endpoint,
+            credential=AzureKeyCredential(self.settings.token),
+            retry_total=0,
+        )
+        self.cache = cache if cache is not None else shared_cache()
+        self.flights = flights if flights is not None else shared_flights()
+        self._in_flight = threading.BoundedSemaphore(self.settings.max_in_flight)
+
+    @property
+    def model_name(self) -> str:
+        return self.settings.model
+
+    @property
+    def temperature(self) -> float:
+        return self.settings.temperature
+
+    def _prompt_key(self, system_prompt: str, user_prompt: str, fingerprint: Optional[str]) -> str:
+        return cache_key(self.model_name, self.temperature, system_prompt, user_prompt, fingerprint)
+
+    def _cache_key(self, system_prompt: str, user_prompt: str, fingerprint: Optional[str]) -> Optional[str]:
+        if self.cache is None or os.getenv("LLM_CACHE_DISABLED", "").lower() in ("1", "true", "yes"):
+            return None
+        return self._prompt_key(system_prompt, user_prompt, fingerprint)
+
+    def _request(self, system_prompt: str, user_prompt: str) -> dict:
+        return {
+            "messages": [SystemMessage(content=system_prompt), UserMessage(content=user_prompt)],
+            "model": self.model_name,
+            "temperature": self.temperature,
+            "top_p": 1.0,
+            "max_tokens": self.settings.max_tokens,
+            "connection_timeout": self.settings.connect_timeout,
+            "read_timeout": self.settings.timeout,
+        }
+
+    def chat_completion(self, system_prompt: str, user_prompt: str, fingerprint: Optional[str] = None) -> str:
+        """fingerprint identifies the data the prompt is about, so cached answers never cross datasets"""
+        key = self._cache_key(system_prompt, user_prompt, fingerprint)
+        if key is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+        return self.flights.do(self._prompt_key(system_prompt, user_prompt, fingerprint),
+                               lambda: self._complete(system_prompt, user_prompt, key))
+
+    def _complete(self, system_prompt: str, user_prompt: str, key: Optional[str]) -> str:
+        request = self._request(system_prompt, user_prompt)
+        for attempt in range(self.settings.max_retries + 1):
+            try:
+                with self._in_flight:
+                    response = self.client.complete(**request)
+                break
+            except Exception as e:
+                if attempt == self.settings.max_retries or not is_transient(e):
+                    raise
+                time.sleep(backoff_delay(attempt, self.settings, e))
+
+        content = response.choices[0].message.content
+        if key is not None and content:
+            self.cache.put(key, content)
+        return content
+
+    def stream_completion(self, system_prompt: str, user_prompt: str, bypass: bool = False,
+                          fingerprint: Optional[str] = None) -> Iterator[str]:
+        """Yield the answer in pieces as the model produces them; a cached answer comes as one piece.
+
+        Only opening the stream is retried; once text has been relayed a
+        failure propagates. The in-flight slot is held until the stream
+        ends, and only a stream read to the end is cached. bypass is a
+        parameter rather than bypass_cache() around the call, since a
+        generator may resume in a different context.
+        """
+        with bypass_cache(bypass):
+            key = self._cache_key(system_prompt, user_prompt, fingerprint)
+            cached = self.cache.get(key) if key is not None else None
+        if cached is not None:
+            yield cached
+            return
+
+        request = {**self._request(system_prompt, user_prompt), "stream": True}
+        for attempt in range(self.settings.max_retries + 1):
+            self._in_flight.acquire()
+            try:
+                updates = self.client.complete(**request)
+                break
+            except Exception as e:
+                self._in_flight.release()
+                if attempt == self.settings.max_retries or not is_transient(e):
+                    raise
+                time.sleep(backoff_delay(attempt, self.settings, e))
+
+        parts = []
+        try:
+            for update in updates:
+                delta = update.choices[0].delta if update.choices else None
+                if delta is not None and delta.content:
+                    parts.append(delta.content)
+                    yield delta.content
+            content = "".join(parts)
+            if key is not None and content:
+                self.cache.put(key, content)
+        finally:
+            self._in_flight.release()
+            updates.close()
+
+
+class DatasetAgent:
+    """One DataManager's handle on the shared agent.
+
+    Every call passes that DataManager's dataset fingerprint along, so
+    the process-wide agent holds no per-dataset state and keeps no
+    DataManager alive. Anything else is read from the shared agent.
+    """
+
+    def __init__(self, agent: GPTAgent, fingerprint: Callable[[], str]):
+        self.agent = agent
+        self.fingerprint = fingerprint
+
+    def __getattr__(self, name):
+        return getattr(self.agent, name)
+
+    def chat_completion(self, system_prompt: str, user_prompt: str) -> str:
+        return self.agent.chat_completion(system_prompt, user_prompt, fingerprint=self.fingerprint())
+
+    def stream_completion(self, system_prompt: str, user_prompt: str, bypass: bool = False) -> Iterator[str]:
+        return self.agent.stream_completion(system_prompt, user_prompt, bypass=bypass, fingerprint=self.fingerprint())
+
+
+# One client (and connection pool) per process instead of one per upload
+_shared_agent: Optional[GPTAgent] = None
+_shared_lock = threading.Lock()
+
+
+def shared_agent() -> GPTAgent:
+    global _shared_agent
+    with _shared_lock:
+        if _shared_agent is None:
+            _shared_agent = GPTAgent()
+        return _shared_agent
+
+
+def close_shared_agents():
+    global _shared_agent
+    if _shared_agent is not None:
+        _shared_agent.client.close()
+        _shared_agent = None
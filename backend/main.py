@@ -1,12 +1,18 @@
 # main.py
-from fastapi import FastAPI, UploadFile, File, Form
+from fastapi import FastAPI, UploadFile, File, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
 import pandas as pd
 import os
 import math
 import json
+from fastapi.concurrency import run_in_threadpool, iterate_in_threadpool
 from backend import DataManager
+import llm_cache
+import llm_client
+from prompt_context import estimate_tokens
+from admission import AdmissionControl, AdmissionRejected, session_scope
+from scenarios import shutdown_pool as shutdown_scenario_pool
 
 app = FastAPI()
 
@@ -19,6 +25,74 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Bounds model-backed requests per session and overall; beyond that, callers get a fast 429
+admission = AdmissionControl()
+
+# Requests are grouped per session for admission: the X-Session-ID header, else the client address
+@app.middleware("http")
+async def admission_session(request: Request, call_next):
+    session = request.headers.get("X-Session-ID") or (request.client.host if request.client else "anonymous")
+    with session_scope(session):
+        return await call_next(request)
+
+def too_busy(error: AdmissionRejected) -> JSONResponse:
+    return JSONResponse(status_code=429, content={"status": "error", "message": str(error)},
+                        headers={"Retry-After": str(error.retry_after)})
+
+async def call_model(fn, *args, bypass: bool = False, admit: bool = True):
+    """Run a model-backed DataManager call in the threadpool so a slow model never blocks the event loop.
+
+    Raises AdmissionRejected when the session or the server has too many such calls running or queued.
+    Pass admit=False when this request will not reach the model (local search without rerank), so it
+    neither waits for nor takes a slot.
+    """
+    def run():
+        with llm_cache.bypass_cache(bypass):
+            return fn(*args)
+    if not admit:
+        return await run_in_threadpool(run)
+    async with admission.slot():
+        return await run_in_threadpool(run)
+
+def sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+async def event_stream(events, admit: bool = True):
+    """Server-Sent Events from (event, payload) pairs; a failure is sent as an "error" event and "done" always ends the stream.
+
+    Takes an admission slot up front (raises AdmissionRejected) and holds it until the stream ends or the client leaves;
+    admit=False skips that for streams that never call the model.
+    """
+    def frames():
+        try:
+            for event, payload in events:
+                yield sse(event, payload)
+        except Exception as e:
+            yield sse("error", {"status": "error", "message": str(e)})
+        yield sse("done", {})
+
+    release = await admission.acquire() if admit else (lambda: None)
+
+    async def run():
+        try:
+            # Advanced in the threadpool, so the blocking model stream never holds the event loop
+            async for frame in iterate_in_threadpool(frames()):
+                yield frame
+        finally:
+            release()
+    return StreamingResponse(run(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# Close the shared model clients' connection pools
+@app.on_event("shutdown")
+async def close_model_clients():
+    llm_client.close_shared_agents()
+
+# Stop the what-if scenario worker processes
+@app.on_event("shutdown")
+async def close_scenario_pool():
+    shutdown_scenario_pool()
+
 # Save uploaded file
 # UPLOAD_DIR = "uploads"  # No longer needed
 # os.makedirs(UPLOAD_DIR, exist_ok=True)  # No longer needed
@@ -148,27 +222,65 @@ async def upload_files(
 
 # Natural language search
 @app.post("/nl_search")
-async def nl_search(query: str = Form(...)):
+async def nl_search(query: str = Form(...), bypass_cache: bool = Form(False), mode: str = Form("planner"),
+                    top_k: int = Form(10), rerank: bool = Form(False)):
     try:
         dm = get_or_create_data_manager()
         if not dm:
             return JSONResponse(status_code=400, content={"status": "error", "message": "No data loaded. Please upload files first."})
         
-        results = dm.natural_language_search(query)
-        return {"status": "success", "results": results}
+        # "planner": the model only writes a filter spec, run locally over all rows; "model": legacy sample search;
+        # "local": offline BM25 keyword search, also used whenever no model is configured
+        if mode == "local" or not dm.gpt_agent:
+            results = await call_model(dm.local_search, query, top_k, rerank, bypass=bypass_cache,
+                                       admit=bool(rerank and dm.gpt_agent))
+            return {"status": "success", "results": results, "mode": "local"}
+        plan_error = None
+        if mode == "planner" and dm.gpt_agent:
+            try:
+                planned = await call_model(dm.planned_search, query, bypass=bypass_cache)
+                return {"status": "success", **planned}
+            except ValueError as e:
+                plan_error = str(e)
+        results = await call_model(dm.natural_language_search, query, bypass=bypass_cache)
+        response = {"status": "success", "results": results}
+        if plan_error:
+            response["plan_error"] = plan_error
+        return response
+    except AdmissionRejected as e:
+        return too_busy(e)
     except Exception as e:
         return JSONResponse(status_code=500, content={"status": "error", "message": str(e)})
 
+# Natural language search, streamed as Server-Sent Events while the model answers
+@app.post("/nl_search/stream")
+async def nl_search_stream(query: str = Form(...), bypass_cache: bool = Form(False), mode: str = Form("planner"),
+                           top_k: int = Form(10), rerank: bool = Form(False)):
+    dm = get_or_create_data_manager()
+    if not dm:
+        return JSONResponse(status_code=400, content={"status": "error", "message": "No data loaded. Please upload files first."})
+    
+    try:
+        uses_model = bool(dm.gpt_agent) and (mode != "local" or rerank)
+        return await event_stream(dm.stream_search(query, mode, top_k, rerank, bypass_cache), admit=uses_model)
+    except AdmissionRejected as e:
+        return too_busy(e)
+
 # Natural language modify
 @app.post("/nl_modify")
-async def nl_modify(command: str = Form(...)):
+async def nl_modify(command: str = Form(...), dry_run: bool = Form(True), bypass_cache: bool = Form(False)):
     try:
         dm = get_or_create_data_manager()
         if not dm:
             return JSONResponse(status_code=400, content={"status": "error", "message": "No data loaded. Please upload files first."})
         
-        updated_data = dm.natural_language_modify(command)
-        return {"status": "success", "updated": updated_data}
+        # The model only writes selector + assignment operations; they are planned and applied here over all rows
+        result = await call_model(dm.natural_language_modify, command, dry_run, bypass=bypass_cache)
+        return {"status": "success", "dry_run": dry_run, **result}
+    except AdmissionRejected as e:
+        return too_busy(e)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"status": "error", "message": str(e)})
     except Exception as e:
         return JSONResponse(status_code=500, content={"status": "error", "message": str(e)})
 
@@ -195,11 +307,27 @@ async def ai_rule_recommendations(request: dict = None):
         if not dm:
             return JSONResponse(status_code=400, content={"status": "error", "message": "No data loaded. Please upload files first."})
         
-        rule_suggestions = dm.get_recommended_rules()
+        rule_suggestions = await call_model(dm.get_recommended_rules, bypass=bool((request or {}).get("bypass_cache")),
+                                            admit=bool(dm.gpt_agent))
         return {"status": "success", "rules": rule_suggestions}
+    except AdmissionRejected as e:
+        return too_busy(e)
     except Exception as e:
         return JSONResponse(status_code=500, content={"status": "error", "message": str(e)})
 
+# AI Rule Recommendations, streamed as Server-Sent Events
+@app.post("/ai_rule_recommendations/stream")
+async def ai_rule_recommendations_stream(request: dict = None):
+    dm = get_or_create_data_manager()
+    if not dm:
+        return JSONResponse(status_code=400, content={"status": "error", "message": "No data loaded. Please upload files first."})
+    
+    try:
+        return await event_stream(dm.stream_recommended_rules(bool((request or {}).get("bypass_cache"))),
+                                  admit=bool(dm.gpt_agent))
+    except AdmissionRejected as e:
+        return too_busy(e)
+
 # AI Rule Generation from Natural Language
 @app.post("/ai_generate_rule")
 async def ai_generate_rule(request: dict):
@@ -212,17 +340,46 @@ async def ai_generate_rule(request: dict):
         if not user_input:
             return JSONResponse(status_code=400, content={"status": "error", "message": "No input provided"})
         
-        generated_rule = dm.generate_rule_from_natural_language(user_input)
+        generated_rule = await call_model(dm.generate_rule_from_natural_language, user_input, bypass=bool(request.get("bypass_cache")))
         if generated_rule:
             return {"status": "success", "rule": generated_rule}
         else:
             return {"status": "error", "message": "Failed to generate rule from input"}
+    except AdmissionRejected as e:
+        return too_busy(e)
     except Exception as e:
         return JSONResponse(status_code=500, content={"status": "error", "message": str(e)})
 
+# AI Rule Generation from Natural Language, streamed as Server-Sent Events
+@app.post("/ai_generate_rule/stream")
+async def ai_generate_rule_stream(request: dict):
+    dm = get_or_create_data_manager()
+    if not dm:
+        return JSONResponse(status_code=400, content={"status": "error", "message": "No data loaded. Please upload files first."})
+    
+    user_input = request.get("input", "")
+    if not user_input:
+        return JSONResponse(status_code=400, content={"status": "error", "message": "No input provided"})
+    
+    try:
+        return await event_stream(dm.stream_rule_from_nl(user_input, bool(request.get("bypass_cache"))))
+    except AdmissionRejected as e:
+        return too_busy(e)
+
+# Model response cache statistics; DELETE empties it
+@app.get("/llm_cache")
+async def llm_cache_stats():
+    return {"status": "success", **llm_cache.shared_cache().summary(),
+            "coalescing": llm_cache.shared_flights().summary(), "admission": admission.summary()}
+
+@app.delete("/llm_cache")
+async def llm_cache_clear():
+    llm_cache.shared_cache().clear()
+    return {"status": "success", **llm_cache.shared_cache().summary()}
+
 # Apply automatic corrections
 @app.post("/apply_corrections")
-async def apply_corrections():
+async def apply_corrections(request: dict = None):
     try:
         print("=== APPLY CORRECTIONS ENDPOINT CALLED ===")
         
@@ -231,6 +388,11 @@ async def apply_corrections():
             print("❌ No data manager found and no files to reload")
             return JSONResponse(status_code=400, content={"status": "error", "message": "No data loaded. Please upload files first."})
         
+        # Dry-run: return the proposed fixes as a patch without touching the data
+        if request and request.get("dry_run"):
+            proposal = dm.apply_automatic_fixes(dry_run=True)
+            return {"status": "success", "dry_run": True, **proposal}
+        
         print(f"✅ Using data manager with {len(dm.clients)} clients, {len(dm.workers)} workers, {len(dm.tasks)} tasks")
         
         # Get validation errors
@@ -263,11 +425,6 @@ async def apply_corrections():
         # Re-run validation to see if errors were fixed
         new_validation_errors = dm.validate_all()
         print(f"🔍 After fixes: Found {len(new_validation_errors)} validation errors")
-        for i, error in enumerate(new_validation_errors[:5]):  # Show first 5 errors
-            print(f"  Error {i+1}: {error.error_type} - {error.message}")
-        if len(new_validation_errors) > 5:
-            print(f"  ... and {len(new_validation_errors) - 5} more errors")
-        print(f"🔍 After fixes: Found {len(new_validation_errors)} validation errors")
         for i, error in enumerate(new_validation_errors[:5]):  # Show first 5 errors
             print(f"  Error {i+1}: {error.error_type} - {error.message}")
         if len(new_validation_errors) > 5:
@@ -302,6 +459,7 @@ async def apply_corrections():
             "status": "success", 
             "message": f"Applied fixes. Errors reduced from {len(validation_errors)} to {len(new_validation_errors)}",
             "errors": cleaned_errors,
+            "fixes": fixed_data["summary"],
             "data": {
                 "clients": dm.clients,
                 "workers": dm.workers,
@@ -325,6 +483,32 @@ async def apply_corrections():
         traceback.print_exc()
         return JSONResponse(status_code=500, content={"status": "error", "message": str(e)})
 
+# Commit an accepted subset of a dry-run correction patch
+@app.post("/apply_fix_patch")
+async def apply_fix_patch(request: dict):
+    try:
+        dm = get_or_create_data_manager()
+        if not dm:
+            return JSONResponse(status_code=400, content={"status": "error", "message": "No data loaded. Please upload files first."})
+        
+        ops = request.get("patch", [])
+        if not ops:
+            return JSONResponse(status_code=400, content={"status": "error", "message": "No patch operations provided"})
+        
+        result = dm.apply_fix_patch(ops, base_version=request.get("base_version"))
+        return {
+            "status": "success",
+            "message": f"Applied {result['applied']} of {len(ops)} operations",
+            **result,
+            "data": {
+                "clients": dm.clients,
+                "workers": dm.workers,
+                "tasks": dm.tasks,
+            },
+        }
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"status": "error", "message": str(e)})
+
 # Export processed data
 @app.post("/export")
 async def export_data():
@@ -359,6 +543,9 @@ async def export_data():
             exported_files.append({"name": "rules.json", "path": rules_file, "type": "json"})
         if os.path.exists(priorities_file):
             exported_files.append({"name": "priorities.json", "path": priorities_file, "type": "json"})
+        corun_file = os.path.join(output_dir, "corun_groups.json")
+        if os.path.exists(corun_file):
+            exported_files.append({"name": "corun_groups.json", "path": corun_file, "type": "json"})
         
         return {
             "status": "success",
@@ -462,6 +649,16 @@ async def export_download():
                 "size": len(priorities_json.encode('utf-8'))
             })
         
+        # Co-run components
+        if dm.get_corun_components():
+            corun_json = json.dumps(dm.corun_groups.to_dict(), indent=2)
+            files_data.append({
+                "name": "corun_groups.json",
+                "content": corun_json,
+                "type": "application/json",
+                "size": len(corun_json.encode('utf-8'))
+            })
+        
         print(f"✅ Prepared {len(files_data)} files for download")
         
         return {
@@ -495,21 +692,233 @@ async def apply_rules(request: dict):
         if not rules:
             return JSONResponse(status_code=400, content={"status": "error", "message": "No rules provided"})
         
-        # Apply the rules to the data
-        applied_results = dm.apply_rules_to_data(rules)
+        # Dry-run: report what the rules would change without mutating anything
+        if request.get("dry_run"):
+            preview = dm.preview_rules(rules, sample_size=request.get("sample_size", 10))
+            return {"status": "success", "dry_run": True, **preview}
         
-        return {
+        # Apply the rules to the data in dependency order
+        outcome = dm.apply_rules_to_data(rules)
+        
+        response = {
             "status": "success", 
             "message": f"Applied {len(rules)} rules to data",
-            "results": applied_results,
+            "results": outcome["results"],
+            "plan": {
+                "order": outcome["order"],
+                "conflicts": outcome["conflicts"],
+                "cycles": outcome["cycles"],
+                "executions": outcome["executions"],
+                "converged": outcome["converged"],
+            },
             "data": {
                 "clients": dm.clients,
                 "workers": dm.workers,
                 "tasks": dm.tasks,
             }
         }
+        # Keep an existing greedy schedule in step with the new rules; a MILP schedule is only marked
+        # stale, since solving it again here would hold the request for the whole time limit
+        if dm.last_schedule is not None:
+            rescheduled = await run_in_threadpool(dm.reschedule, False)
+            if rescheduled.get("stale"):
+                response["schedule"] = rescheduled
+            else:
+                response["schedule"] = {"delta": rescheduled["delta"], "stats": rescheduled["stats"], "elapsed_ms": rescheduled["elapsed_ms"]}
+        return response
     except Exception as e:
         print(f"Error in apply_rules endpoint: {str(e)}")
         import traceback
         traceback.print_exc()
-        return JSONResponse(status_code=500, content={"status": "error", "message": str(e)})
\ No newline at end of file
+        return JSONResponse(status_code=500, content={"status": "error", "message": str(e)})
+
+# Inspect rule dependencies and conflicts without applying them
+@app.post("/plan_rules")
+async def plan_rules(request: dict):
+    try:
+        dm = get_or_create_data_manager()
+        if not dm:
+            return JSONResponse(status_code=400, content={"status": "error", "message": "No data loaded. Please upload files first."})
+        
+        rules = request.get("rules", [])
+        if not rules:
+            return JSONResponse(status_code=400, content={"status": "error", "message": "No rules provided"})
+        
+        return {"status": "success", "plan": dm.plan_rules(rules)}
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"status": "error", "message": str(e)})
+
+# Effective co-run components (union of all applied co-run rules)
+@app.get("/corun_groups")
+async def corun_groups(task_id: str = None):
+    try:
+        dm = get_or_create_data_manager()
+        if not dm:
+            return JSONResponse(status_code=400, content={"status": "error", "message": "No data loaded. Please upload files first."})
+        
+        if task_id:
+            return {"status": "success", "task_id": task_id, "component": dm.get_corun_component(task_id)}
+        return {"status": "success", **dm.corun_groups.to_dict()}
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"status": "error", "message": str(e)})
+
+# Which workers can serve a client's requests (or a task), from the materialized join
+@app.get("/eligibility")
+async def eligibility(client_id: str = None, task_id: str = None):
+    try:
+        dm = get_or_create_data_manager()
+        if not dm:
+            return JSONResponse(status_code=400, content={"status": "error", "message": "No data loaded. Please upload files first."})
+        
+        join = dm.join_view()
+        if client_id:
+            result = join.workers_for_client(client_id)
+            if result is None:
+                return JSONResponse(status_code=404, content={"status": "error", "message": f"Unknown client: {client_id}"})
+            return {"status": "success", **result}
+        if task_id:
+            return {"status": "success", "task_id": task_id, "workers": join.workers_for_task(task_id), "clients": join.clients_for_task(task_id)}
+        return {"status": "success", **join.summary()}
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"status": "error", "message": str(e)})
+
+# Model validation of rows the rule checks accept, batched and cached per row
+@app.post("/ai_validate")
+async def ai_validate(request: dict = None):
+    try:
+        dm = get_or_create_data_manager()
+        if not dm:
+            return JSONResponse(status_code=400, content={"status": "error", "message": "No data loaded. Please upload files first."})
+        
+        request = request or {}
+        result = await call_model(dm.ai_validate, request.get("entity"), request.get("ids"),
+                                  bypass=bool(request.get("bypass_cache")))
+        return {"status": "success", **result}
+    except AdmissionRejected as e:
+        return too_busy(e)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"status": "error", "message": str(e)})
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"status": "error", "message": str(e)})
+
+# Dataset summary sent to the model in place of raw sample rows
+@app.get("/prompt_context")
+async def prompt_context(budget: int = None):
+    try:
+        dm = get_or_create_data_manager()
+        if not dm:
+            return JSONResponse(status_code=400, content={"status": "error", "message": "No data loaded. Please upload files first."})
+        
+        context = dm.prompt_context(budget)
+        return {
+            "status": "success",
+            "context": context,
+            "tokens": estimate_tokens(context),
+            "summary": dm.prompt_summary().to_dict(),
+        }
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"status": "error", "message": str(e)})
+
+# Records similar to an existing row (id) or to free text (query), from the local vector index
+@app.get("/similar")
+async def similar(entity: str, id: str = None, query: str = None, k: int = 10, rerank: bool = False):
+    try:
+        dm = get_or_create_data_manager()
+        if not dm:
+            return JSONResponse(status_code=400, content={"status": "error", "message": "No data loaded. Please upload files first."})
+        
+        # Only a reranked text query asks the model; ID lookups and plain queries stay on the local index
+        result = await call_model(dm.similar, entity, id, query, k, rerank,
+                                  admit=bool(rerank and query and id is None and dm.gpt_agent))
+        return {"status": "success", **result}
+    except KeyError:
+        return JSONResponse(status_code=404, content={"status": "error", "message": f"Unknown {entity}: {id}"})
+    except AdmissionRejected as e:
+        return too_busy(e)
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"status": "error", "message": str(e)})
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"status": "error", "message": str(e)})
+
+# Clients ranked by the priority weights: top-k or paginated
+@app.post("/client_ranking")
+async def client_ranking(request: dict = None):
+    try:
+        dm = get_or_create_data_manager()
+        if not dm:
+            return JSONResponse(status_code=400, content={"status": "error", "message": "No data loaded. Please upload files first."})
+        
+        request = request or {}
+        result = dm.rank_clients(
+            weights=request.get("weights"),
+            k=request.get("k"),
+            offset=request.get("offset", 0),
+            limit=request.get("limit", 50),
+            group=request.get("group_tag"),
+        )
+        return {"status": "success", **result}
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"status": "error", "message": str(e)})
+
+# Phase × skill supply against demand, cached per data version
+@app.get("/capacity")
+async def capacity():
+    try:
+        dm = get_or_create_data_manager()
+        if not dm:
+            return JSONResponse(status_code=400, content={"status": "error", "message": "No data loaded. Please upload files first."})
+        
+        return {"status": "success", **dm.capacity_report()}
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"status": "error", "message": str(e)})
+
+# Assign requested tasks to workers per phase
+@app.post("/schedule")
+async def schedule(request: dict = None):
+    try:
+        dm = get_or_create_data_manager()
+        if not dm:
+            return JSONResponse(status_code=400, content={"status": "error", "message": "No data loaded. Please upload files first."})
+        
+        request = request or {}
+        # A large greedy run or a MILP solve takes seconds; keep it off the event loop
+        result = await run_in_threadpool(
+            dm.schedule,
+            weights=request.get("weights"),
+            method=request.get("method", "greedy"),
+            time_limit=request.get("time_limit", 10.0),
+            mip_gap=request.get("mip_gap", 0.01),
+        )
+        return {"status": "success", **result}
+    except (ValueError, RuntimeError) as e:
+        return JSONResponse(status_code=400, content={"status": "error", "message": str(e)})
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"status": "error", "message": str(e)})
+
+# Repair the last schedule after data or rule edits, returning the assignment delta
+@app.post("/reschedule")
+async def reschedule():
+    try:
+        dm = get_or_create_data_manager()
+        if not dm:
+            return JSONResponse(status_code=400, content={"status": "error", "message": "No data loaded. Please upload files first."})
+        
+        return {"status": "success", **(await run_in_threadpool(dm.reschedule))}
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"status": "error", "message": str(e)})
+
+# Compare what-if weight sets or rule variants in parallel without changing the data
+@app.post("/scenarios")
+async def scenarios(request: dict):
+    try:
+        dm = get_or_create_data_manager()
+        if not dm:
+            return JSONResponse(status_code=400, content={"status": "error", "message": "No data loaded. Please upload files first."})
+        
+        # Scheduling every scenario takes a while; keep it off the event loop
+        result = await run_in_threadpool(dm.evaluate_scenarios, request.get("scenarios", []), request.get("max_workers"))
+        return {"status": "success", **result}
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"status": "error", "message": str(e)})
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"status": "error", "message": str(e)})
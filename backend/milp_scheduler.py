@@ -0,0 +1,264 @@
+import time
+import numpy as np
+from typing import List, Dict, Any, Tuple
+
+from scheduler import SchedulingProblem, GreedyScheduler, Schedule
+
+# Optional dependency: exact mode is unavailable without the HiGHS solver
+try:
+    import highspy
+except ImportError:
+    highspy = None
+
+# Tie-break reward for qualified workers; small enough never to outweigh serving a request
+QUALIFICATION_EPSILON = 0.01
+# Requests hold the DataManager lock while solving, so a caller cannot ask for longer than this
+MAX_TIME_LIMIT = 60.0
+
+
+def solver_limits(time_limit: Any, mip_gap: Any) -> Tuple[float, float]:
+    """time_limit and mip_gap as floats; raises ValueError unless 0 < time_limit <= MAX_TIME_LIMIT and 0 <= mip_gap < 1"""
+    try:
+        time_limit, mip_gap = float(time_limit), float(mip_gap)
+    except (TypeError, ValueError):
+        raise ValueError(f"time_limit and mip_gap must be numbers: {time_limit!r}, {mip_gap!r}")
+    if not 0 < time_limit <= MAX_TIME_LIMIT:
+        raise ValueError(f"time_limit must be in (0, {MAX_TIME_LIMIT:g}] seconds: {time_limit!r}")
+    if not 0 <= mip_gap < 1:
+        raise ValueError(f"mip_gap must be in [0, 1): {mip_gap!r}")
+    return time_limit, mip_gap
+
+
+class MILPScheduler:
+    """Exact allocation as a mixed-integer program, solved with HiGHS.
+
+    Binary y[u, s] starts demand unit u at phase s; binary x[u, t, w, s]
+    gives task t of that unit to worker w. Rows keep one start per unit,
+    one worker per task of a started unit, worker load within
+    MaxLoadPerPhase and task load within MaxConcurrent for every phase.
+    Only workers that hold the skills and the slots for the whole window
+    get a variable. The objective mirrors GreedyScheduler: PriorityLevel
+    and RequestedTaskIDs per served unit, Fairness per client served at
+    least once (z[c]), and LoadLimit against the peak utilisation L.
+    """
+
+    def __init__(self, problem: SchedulingProblem, time_limit: float = 10.0, mip_gap: float = 0.01,
+                 max_variables: int = 200000):
+        if highspy is None:
+            raise RuntimeError("Exact scheduling requires the 'highspy' package (pip install highspy)")
+        self.problem = problem
+        self.time_limit = time_limit
+        self.mip_gap = mip_gap
+        self.max_variables = max_variables
+
+    def _build(self):
+        problem = self.problem
+        w = problem.weights
+        self.y_vars: List[Tuple[int, int]] = []  # (unit, start)
+        self.x_vars: List[Tuple[int, int, int, int]] = []  # (unit, task, worker, start)
+        self.reasons: Dict[int, str] = {}
+        self.unknown: List[Tuple[int, Any]] = []
+        costs: List[float] = []
+        rows: List[Tuple[List[int], List[float], float, float]] = []  # (columns, coefficients, lower, upper)
+
+        base = {u: problem.base_score(problem.units[u]) for u in problem.live_units()}
+        usable = problem.available & (problem.max_load[:, None] > 0)
+        unit_columns: Dict[int, List[int]] = {}
+        load_cells: Dict[Tuple[int, int], List[int]] = {}
+        task_cells: Dict[Tuple[int, int], List[int]] = {}
+
+        pending_x: List[Tuple[int, List[Tuple[int, np.ndarray]]]] = []  # (y column, [(task, workers)])
+        variable_count = 0
+        for u in problem.live_units():
+            unit = problem.units[u]
+            known, unknown = problem.split_unit(unit)
+            self.unknown.extend((u, t) for t in unknown)
+            if not known:
+                continue
+            starts = problem.common_starts(known)
+            self.reasons[u] = "no_capacity" if starts else "no_allowed_phase"
+            if any(not problem.qualified(task).size for task in known):
+                self.reasons[u] = "no_qualified_worker"
+                continue
+            for start in starts:
+                per_task = []
+                for task in known:
+                    candidates = problem.qualified(task)
+                    cols = slice(start - 1, start - 1 + int(problem.duration[task]))
+                    fits = candidates[usable[candidates, cols].all(axis=1)]
+                    if not fits.size:
+                        break
+                    per_task.append((task, fits))
+                else:
+                    y = len(costs)
+                    self.y_vars.append((u, start))
+                    costs.append(base[u])
+                    unit_columns.setdefault(u, []).append(y)
+                    pending_x.append((y, per_task))
+                    variable_count += 1 + sum(len(fits) for _, fits in per_task)
+                    self.reasons.pop(u, None)
+            if variable_count > self.max_variables:
+                raise ValueError(
+                    f"Instance exceeds {self.max_variables} variables; use the greedy scheduler for data this large"
+                )
+
+        # x columns come after all y columns so y indices are final
+        for y, per_task in pending_x:
+            u, start = self.y_vars[y]
+            for task, workers in per_task:
+                first = len(costs)
+                for worker in workers.tolist():
+                    col = len(costs)
+                    self.x_vars.append((u, task, worker, start))
+                    costs.append(QUALIFICATION_EPSILON * float(problem.qualification[worker]))
+                    for phase in range(start - 1, start - 1 + int(problem.duration[task])):
+                        load_cells.setdefault((worker, phase), []).append(col)
+                        task_cells.setdefault((task, phase), []).append(col)
+                # Exactly one worker per task when the unit starts here: sum x - y = 0
+                columns = list(range(first, len(costs)))
+                rows.append((columns + [y], [1.0] * len(columns) + [-1.0], 0.0, 0.0))
+
+        for columns in unit_columns.values():
+            rows.append((columns, [1.0] * len(columns), 0.0, 1.0))
+
+        # Fairness: z[c] <= number of the client's served units
+        self.z_vars: Dict[int, int] = {}
+        client_ys: Dict[int, List[int]] = {}
+        for y, (u, _) in enumerate(self.y_vars):
+            client_ys.setdefault(problem.units[u]["client"], []).append(y)
+        for client, ys in client_ys.items():
+            z = len(costs)
+            self.z_vars[client] = z
+            costs.append(w["Fairness"])
+            rows.append((ys + [z], [1.0] * len(ys) + [-1.0], 0.0, np.inf))
+
+        # Load balance: every worker-phase utilisation stays below L
+        self.peak_var = len(costs)
+        costs.append(-w["LoadLimit"])
+        for (worker, phase), columns in load_cells.items():
+            capacity = float(problem.max_load[worker])
+            rows.append((columns, [1.0] * len(columns), 0.0, capacity))
+            rows.append((columns + [self.peak_var], [1.0 / capacity] * len(columns) + [-1.0], -np.inf, 0.0))
+        for (task, phase), columns in task_cells.items():
+            if len(columns) > problem.max_concurrent[task]:
+                rows.append((columns, [1.0] * len(columns), 0.0, float(problem.max_concurrent[task])))
+
+        self.costs = np.array(costs, dtype=float)
+        self.rows = rows
+
+    def _model(self):
+        num_col = len(self.costs)
+        lp = highspy.HighsLp()
+        lp.num_col_ = num_col
+        lp.num_row_ = len(self.rows)
+        lp.sense_ = highspy.ObjSense.kMaximize
+        lp.col_cost_ = self.costs
+        lp.col_lower_ = np.zeros(num_col)
+        lp.col_upper_ = np.ones(num_col)
+        lp.row_lower_ = np.array([r[2] for r in self.rows], dtype=float)
+        lp.row_upper_ = np.array([r[3] for r in self.rows], dtype=float)
+
+        # Rows are collected sparse; HiGHS takes the matrix column-wise
+        row_index = np.concatenate([np.full(len(r[0]), i) for i, r in enumerate(self.rows)]) if self.rows else np.empty(0)
+        col_index = np.concatenate([np.asarray(r[0]) for r in self.rows]) if self.rows else np.empty(0)
+        values = np.concatenate([np.asarray(r[1], dtype=float) for r in self.rows]) if self.rows else np.empty(0)
+        order = np.lexsort((row_index, col_index))
+        lp.a_matrix_.format_ = highspy.MatrixFormat.kColwise
+        lp.a_matrix_.start_ = np.searchsorted(col_index[order], np.arange(num_col + 1)).astype(np.int32)
+        lp.a_matrix_.index_ = row_index[order].astype(np.int32)
+        lp.a_matrix_.value_ = values[order]
+
+        integrality = [highspy.HighsVarType.kInteger] * num_col
+        integrality[self.peak_var] = highspy.HighsVarType.kContinuous
+        lp.integrality_ = integrality
+        return lp
+
+    def _warm_start(self) -> Tuple[np.ndarray, float]:
+        """Greedy solution mapped onto the model's columns"""
+        greedy = GreedyScheduler(self.problem)
+        greedy.run()
+        values = np.zeros(len(self.costs))
+        y_col = {key: i for i, key in enumerate(self.y_vars)}
+        x_offset = len(self.y_vars)
+        x_col = {key: x_offset + i for i, key in enumerate(self.x_vars)}
+        load = np.zeros_like(self.problem.available, dtype=float)
+        for u, placed in greedy.placements.items():
+            start = placed[0][2]
+            if (u, start) not in y_col:
+                continue
+            values[y_col[(u, start)]] = 1
+            for task, worker, _ in placed:
+                values[x_col[(u, task, worker, start)]] = 1
+                load[worker, start - 1:start - 1 + int(self.problem.duration[task])] += 1
+            client = self.problem.units[u]["client"]
+            values[self.z_vars[client]] = 1
+        capacity = np.maximum(self.problem.max_load, 1)[:, None]
+        values[self.peak_var] = float((load / capacity).max()) if load.size else 0.0
+        return values, float(self.costs @ values)
+
+    def run(self) -> Schedule:
+        started = time.perf_counter()
+        problem = self.problem
+        schedule = Schedule(problem, "milp")
+        self._build()
+
+        highs = highspy.Highs()
+        highs.setOptionValue("output_flag", False)
+        highs.setOptionValue("time_limit", float(self.time_limit))
+        highs.setOptionValue("mip_rel_gap", float(self.mip_gap))
+        highs.passModel(self._model())
+
+        warm_values, warm_objective = self._warm_start()
+        solution = highspy.HighsSolution()
+        solution.col_value = warm_values.tolist()
+        highs.setSolution(solution)
+        highs.run()
+
+        info = highs.getInfo()
+        values = np.asarray(highs.getSolution().col_value) if info.primal_solution_status else warm_values
+        if not values.size:
+            values = warm_values
+
+        chosen = {}
+        for i, (u, start) in enumerate(self.y_vars):
+            if values[i] > 0.5:
+                chosen[u] = start
+        x_offset = len(self.y_vars)
+        for i, (u, task, worker, start) in enumerate(self.x_vars):
+            if values[x_offset + i] > 0.5 and chosen.get(u) == start:
+                unit = problem.units[u]
+                schedule.assignments.append({
+                    "client_id": problem.client_ids[unit["client"]],
+                    "task_id": problem.task_ids[task],
+                    "worker_id": problem.worker_ids[worker],
+                    "phases": list(range(start, start + int(problem.duration[task]))),
+                    "score": round(problem.base_score(unit), 4),
+                })
+        for u, task_id in self.unknown:
+            schedule.unassigned.append({"client_id": problem.client_ids[problem.units[u]["client"]], "task_id": task_id, "reason": "unknown_task"})
+        for u in problem.live_units():
+            unit = problem.units[u]
+            if u in chosen:
+                continue
+            known, _ = problem.split_unit(unit)
+            for task in known:
+                schedule.unassigned.append({
+                    "client_id": problem.client_ids[unit["client"]],
+                    "task_id": problem.task_ids[task],
+                    "reason": self.reasons.get(u, "not_selected"),
+                })
+
+        objective = float(self.costs @ values)
+        bound = float(info.mip_dual_bound)
+        schedule.extra["solver"] = {
+            "status": highs.modelStatusToString(highs.getModelStatus()),
+            "objective": round(objective, 6),
+            "bound": round(bound, 6) if np.isfinite(bound) else None,
+            "gap": round(float(info.mip_gap), 6) if np.isfinite(info.mip_gap) else None,
+            "warm_start_objective": round(warm_objective, 6),
+            "variables": len(self.costs),
+            "constraints": len(self.rows),
+            "time_limit": self.time_limit,
+        }
+        schedule.elapsed_ms = (time.perf_counter() - started) * 1000
+        return schedule
@@ -0,0 +1,122 @@
+import json
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
+
+from column_store import ColumnStore, COMPARISON_OPS
+from query_planner import load_schema, validate_spec, filter_mask, _number
+from auto_fix import ID_FIELDS, TABLES
+
+MAX_OPERATIONS = 20
+
+
+def validate_ops(payload: Any, schema: Optional[Dict[str, List[str]]] = None) -> List[Dict[str, Any]]:
+    """Check bulk-edit operations against the schema and return them in canonical form; raises ValueError.
+
+    Shape: {"operations": [{"entity": "client" | "worker" | "task",
+                            "where": [{"field", "op", "value"}, ...],
+                            "set": {"<field>": <scalar>, ...}}, ...]}
+    An empty "where" selects every row of the entity.
+    """
+    schema = schema or load_schema()
+    operations = payload.get("operations") if isinstance(payload, dict) else payload
+    if not isinstance(operations, list) or not operations:
+        raise ValueError("Expected a non-empty list of operations")
+    if len(operations) > MAX_OPERATIONS:
+        raise ValueError(f"At most {MAX_OPERATIONS} operations per command")
+
+    canonical = []
+    for op in operations:
+        if not isinstance(op, dict):
+            raise ValueError(f"Operation must be an object: {op!r}")
+        spec = validate_spec({"entity": op.get("entity"), "filters": op.get("where") or []}, schema)
+        entity = spec["entity"]
+        assignments = op.get("set")
+        if not isinstance(assignments, dict) or not assignments:
+            raise ValueError(f"Operation on {entity} has nothing to set")
+        for field, value in assignments.items():
+            if field not in schema[entity]:
+                raise ValueError(f"Unknown {entity} field: {field!r}")
+            if field == ID_FIELDS[entity]:
+                raise ValueError(f"{field} cannot be modified")
+            if isinstance(value, (dict, list)):
+                raise ValueError(f"Assigned value must be a scalar: {value!r}")
+        canonical.append({"entity": entity, "where": spec["filters"], "set": dict(assignments)})
+    return canonical
+
+
+def _coerce(store: ColumnStore, field: str, value: Any) -> Any:
+    """Numeric strings become numbers in columns that already hold numbers"""
+    if isinstance(value, str) and store.has(field) and not np.isnan(store.numeric(field)).all():
+        return _number(value)
+    return value
+
+
+def plan_ops(operations: List[Dict[str, Any]], stores: Dict[str, ColumnStore]) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Patch ops (apply_patch format) and a per-operation summary for validated operations.
+
+    Selectors are evaluated column-wise against the data as it was before
+    the command; a later operation assigning the same field of the same
+    row wins. Assignments that would not change a value are left out.
+    """
+    patch: List[Dict[str, Any]] = []
+    slot: Dict[Tuple[str, int, str], int] = {}  # (entity, position, field) -> index in patch
+    summary = []
+    for op in operations:
+        entity = op["entity"]
+        store = stores[entity]
+        rows = np.nonzero(filter_mask(op["where"], store))[0]
+        changes = 0
+        for field, value in op["set"].items():
+            value = _coerce(store, field, value)
+            if rows.size and store.has(field):
+                current = store.values(field)[rows]
+                differs = np.fromiter((v != value for v in current), dtype=bool, count=rows.size)
+                targets = rows[differs]
+            else:
+                targets = rows
+            for pos in targets.tolist():
+                row = store.records[pos]
+                key = (entity, pos, field)
+                entry = {
+                    "op": "replace" if field in row else "add",
+                    "path": f"/{TABLES[entity]}/{pos}/{field}",
+                    "id": row.get(ID_FIELDS[entity]),
+                    "old": row.get(field),
+                    "value": value,
+                    "fix_code": "nl_modify",
+                }
+                if key in slot:
+                    patch[slot[key]] = entry
+                else:
+                    slot[key] = len(patch)
+                    patch.append(entry)
+            changes += int(targets.size)
+        summary.append({**op, "matched": int(rows.size), "changes": changes})
+    return patch, summary
+
+
+def modify_prompt(command: str, context: str, schema: Optional[Dict[str, List[str]]] = None) -> str:
+    schema = schema or load_schema()
+    return f"""
+Translate the user's data edit command into bulk-edit operations. Do not return data records.
+
+Schema (entity: columns):
+{json.dumps(schema)}
+
+Dataset summary:
+{context}
+
+Operation format:
+{{"operations": [{{"entity": "client" | "worker" | "task",
+                  "where": [{{"field": "<column>", "op": one of {list(COMPARISON_OPS)}, "value": <scalar>}}],
+                  "set": {{"<column>": <new scalar value>}}}}]}}
+
+Notes:
+- "where" conditions are ANDed; leave it empty to change every row of the entity.
+- ID columns (ClientID, WorkerID, TaskID) cannot be set.
+- List columns are comma-separated strings ("SkillA,SkillB") or phase lists ("[1,2,3]"); set the full new value.
+
+User command: "{command}"
+
+Return only the JSON object.
+"""
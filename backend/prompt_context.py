@@ -0,0 +1,185 @@
+import os
+import json
+import math
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple
+
+from auto_fix import split_list
+from scheduler import parse_phase_list
+
+ENTITIES = (("client", "Clients", "ClientID"), ("worker", "Workers", "WorkerID"), ("task", "Tasks", "TaskID"))
+ITEM_LIST_FIELDS = {"Skills", "RequiredSkills", "RequestedTaskIDs"}
+PHASE_LIST_FIELDS = {"AvailableSlots", "PreferredPhases"}
+JSON_FIELDS = {"AttributesJSON"}
+SKILL_FIELDS = ("Skills", "RequiredSkills")
+
+# (top values per column, skill vocabulary size, sample rows per entity), richest first
+DETAIL_LEVELS = ((8, 60, 3), (5, 30, 2), (3, 15, 1), (2, 8, 0), (0, 0, 0))
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token), good enough for budgeting"""
+    return math.ceil(len(text) / 4)
+
+
+def default_budget() -> int:
+    return int(os.getenv("PROMPT_CONTEXT_TOKENS", "1500"))
+
+
+def compact(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), default=str)
+
+
+def _missing(value: Any) -> bool:
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    return number if math.isfinite(number) else None
+
+
+def _attribute_keys(value: Any) -> List[str]:
+    if isinstance(value, dict):
+        return list(value)
+    try:
+        parsed = json.loads(value) if isinstance(value, str) else None
+    except ValueError:
+        return []
+    return list(parsed) if isinstance(parsed, dict) else []
+
+
+def summarize_column(name: str, values: List[Any], id_field: str) -> Dict[str, Any]:
+    present = [v for v in values if not _missing(v)]
+    summary: Dict[str, Any] = {"missing": len(values) - len(present)}
+    if name == id_field:
+        counts = Counter(present)
+        summary.update(type="id", distinct=len(counts), duplicated=sum(1 for c in counts.values() if c > 1),
+                       examples=[present[0], present[-1]] if present else [])
+        return summary
+    if name in ITEM_LIST_FIELDS or name in PHASE_LIST_FIELDS:
+        parse = split_list if name in ITEM_LIST_FIELDS else parse_phase_list
+        counts = Counter(item for v in present for item in parse(v))
+        summary.update(type="list", distinct=len(counts), top=counts.most_common())
+        return summary
+    if name in JSON_FIELDS:
+        counts = Counter(key for v in present for key in _attribute_keys(v))
+        summary.update(type="json", distinct=len(counts), top=counts.most_common())
+        return summary
+
+    numbers = [n for n in map(_number, present) if n is not None]
+    if present and len(numbers) >= 0.9 * len(present):
+        summary.update(type="number", min=min(numbers), max=max(numbers),
+                       mean=round(sum(numbers) / len(numbers), 2), invalid=len(present) - len(numbers))
+        return summary
+    counts = Counter(str(v) for v in present)
+    summary.update(type="category" if len(counts) <= max(20, len(present) // 2) else "text",
+                   distinct=len(counts), top=counts.most_common())
+    return summary
+
+
+def _format_number(x: float) -> str:
+    return str(int(x)) if float(x).is_integer() else str(x)
+
+
+def _column_line(name: str, column: Dict[str, Any], top: int) -> str:
+    kind = column["type"]
+    if kind == "id":
+        line = f"{name}: id, {column['distinct']} distinct"
+        if column["duplicated"]:
+            line += f", {column['duplicated']} duplicated"
+        if column["examples"] and top:
+            line += f", e.g. {column['examples'][0]} .. {column['examples'][1]}"
+    elif kind == "number":
+        line = f"{name}: number {_format_number(column['min'])}..{_format_number(column['max'])}, mean {column['mean']}"
+        if column["invalid"]:
+            line += f", {column['invalid']} non-numeric"
+    else:
+        label = {"list": "list", "json": "json keys"}.get(kind, kind)
+        line = f"{name}: {label}, {column['distinct']} distinct"
+        if top and column["top"] and column["top"][0][1] == 1:
+            # All values unique: counts say nothing, a couple of examples say more
+            line += "; e.g. " + ", ".join(str(value) for value, _ in column["top"][:2])
+        elif top and column["top"]:
+            line += "; top " + ", ".join(f"{value}({count})" for value, count in column["top"][:top])
+    if column["missing"]:
+        line += f", {column['missing']} empty"
+    return line
+
+
+class DatasetSummary:
+    """Compact description of the loaded data for model prompts, computed once per dataset version.
+
+    Column statistics (type, cardinality, ranges, top values) and the skill
+    vocabulary are gathered in one pass. render() lays them out with a
+    few sample rows, dropping detail level by level until the text fits
+    the token budget; rendered texts are memoized per budget.
+    """
+
+    def __init__(self, clients: List[Dict[str, Any]], workers: List[Dict[str, Any]], tasks: List[Dict[str, Any]]):
+        self.rows = {"client": clients, "worker": workers, "task": tasks}
+        self.columns: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        for entity, _, id_field in ENTITIES:
+            rows = self.rows[entity]
+            names = list(dict.fromkeys(name for row in rows for name in row))
+            self.columns[entity] = {name: summarize_column(name, [row.get(name) for row in rows], id_field)
+                                    for name in names}
+        self.skills = Counter(skill for entity in ("worker", "task") for row in self.rows[entity]
+                              for field in SKILL_FIELDS for skill in split_list(row.get(field)))
+        self._rendered: Dict[Tuple, str] = {}
+
+    @classmethod
+    def from_rows(cls, rows: List[Dict[str, Any]]) -> "DatasetSummary":
+        """Summary of a mixed list of rows, split by which ID field each one carries"""
+        split: Dict[str, List[Dict[str, Any]]] = {entity: [] for entity, _, _ in ENTITIES}
+        for row in rows:
+            for entity, _, id_field in ENTITIES:
+                if id_field in row:
+                    split[entity].append(row)
+                    break
+        return cls(split["client"], split["worker"], split["task"])
+
+    def _render_level(self, entities: Tuple[str, ...], top: int, vocabulary: int, samples: int) -> str:
+        lines = []
+        for entity, title, _ in ENTITIES:
+            if entity not in entities or not self.rows[entity]:
+                continue
+            lines.append(f"{title} ({len(self.rows[entity])} rows):")
+            lines.extend(f"- {_column_line(name, column, top)}" for name, column in self.columns[entity].items())
+            if samples:
+                lines.append("  samples: " + " ".join(compact(row) for row in self.rows[entity][:samples]))
+        if self.skills and ({"worker", "task"} & set(entities)):
+            skills = [skill for skill, _ in self.skills.most_common(vocabulary)] if vocabulary else []
+            more = len(self.skills) - len(skills)
+            lines.append(f"Skill vocabulary ({len(self.skills)}): " + ", ".join(skills) + (f", +{more} more" if more and skills else ""))
+        return "\n".join(lines)
+
+    def render(self, budget: Optional[int] = None, entities: Tuple[str, ...] = ("client", "worker", "task"),
+               max_samples: int = 3) -> str:
+        """The richest summary that fits budget tokens (PROMPT_CONTEXT_TOKENS by default)"""
+        budget = budget or default_budget()
+        key = (budget, tuple(entities), max_samples)
+        if key not in self._rendered:
+            text = ""
+            for top, vocabulary, samples in DETAIL_LEVELS:
+                text = self._render_level(entities, top, vocabulary, min(samples, max_samples))
+                if estimate_tokens(text) <= budget:
+                    break
+            else:
+                text = text[:budget * 4]
+            self._rendered[key] = text
+        return self._rendered[key]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "rows": {entity: len(rows) for entity, rows in self.rows.items()},
+            "columns": {entity: {name: {k: (v[:20] if k == "top" else v) for k, v in column.items()}
+                                 for name, column in columns.items()}
+                        for entity, columns in self.columns.items()},
+            "skills": self.skills.most_common(),
+        }
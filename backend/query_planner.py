@@ -0,0 +1,155 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from typing import List, Dict, Any, Optional
+
+from column_store import ColumnStore, compile_condition, COMPARISON_OPS
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "correct_headers.json")
+ENTITIES = {"client": "Client", "worker": "Worker", "task": "Task"}
+RESULT_KEYS = {"client": "clients", "worker": "workers", "task": "tasks"}
+ORDERING_OPS = (">=", "<=", ">", "<")
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 500
+
+_schema: Optional[Dict[str, List[str]]] = None
+
+
+def load_schema() -> Dict[str, List[str]]:
+    """Columns per entity ('client', 'worker', 'task') from data/correct_headers.json"""
+    global _schema
+    if _schema is None:
+        with open(SCHEMA_PATH) as f:
+            headers = json.load(f)
+        _schema = {entity: list(headers.get(name, [])) for entity, name in ENTITIES.items()}
+    return _schema
+
+
+def _number(value: Any) -> Any:
+    if isinstance(value, str):
+        try:
+            number = float(value)
+            return int(number) if number.is_integer() else number
+        except ValueError:
+            return value
+    return value
+
+
+def validate_spec(spec: Any, schema: Optional[Dict[str, List[str]]] = None) -> Dict[str, Any]:
+    """Check a filter spec against the schema and return it in canonical form; raises ValueError.
+
+    Shape: {"entity": "client" | "worker" | "task",
+            "filters": [{"field", "op", "value"}, ...],
+            "sort": [{"field", "order": "asc" | "desc"}, ...],
+            "limit": n}
+    """
+    schema = schema or load_schema()
+    if not isinstance(spec, dict):
+        raise ValueError("Spec must be a JSON object")
+    entity = str(spec.get("entity", "")).lower().rstrip("s")
+    if entity not in schema:
+        raise ValueError(f"Unknown entity: {spec.get('entity')!r}")
+    fields = schema[entity]
+
+    filters = []
+    for item in spec.get("filters") or []:
+        if not isinstance(item, dict):
+            raise ValueError(f"Filter must be an object: {item!r}")
+        field, op, value = item.get("field"), item.get("op", "=="), item.get("value")
+        if field not in fields:
+            raise ValueError(f"Unknown {entity} field: {field!r}")
+        if op not in COMPARISON_OPS:
+            raise ValueError(f"Unsupported operator: {op!r}")
+        if isinstance(value, (list, dict)):
+            raise ValueError(f"Filter value must be a scalar: {value!r}")
+        filters.append({"field": field, "op": op, "value": _number(value) if op in ORDERING_OPS else value})
+
+    sort = []
+    for item in spec.get("sort") or []:
+        item = {"field": item} if isinstance(item, str) else item
+        if not isinstance(item, dict) or item.get("field") not in fields:
+            raise ValueError(f"Unknown sort field: {item!r}")
+        order = str(item.get("order", "asc")).lower()
+        if order not in ("asc", "desc"):
+            raise ValueError(f"Sort order must be 'asc' or 'desc': {order!r}")
+        sort.append({"field": item["field"], "order": order})
+
+    limit = spec.get("limit", DEFAULT_LIMIT)
+    try:
+        limit = max(1, min(MAX_LIMIT, int(limit if limit is not None else DEFAULT_LIMIT)))
+    except (TypeError, ValueError):
+        raise ValueError(f"Limit must be an integer: {limit!r}")
+    return {"entity": entity, "filters": filters, "sort": sort, "limit": limit}
+
+
+def spec_key(spec: Dict[str, Any]) -> str:
+    return json.dumps(spec, sort_keys=True, default=str)
+
+
+def filter_mask(filters: List[Dict[str, Any]], store: ColumnStore) -> np.ndarray:
+    """Boolean row mask for validated filters, ANDed together"""
+    mask = np.ones(store.size, dtype=bool)
+    for item in filters:
+        if not mask.any():
+            break
+        mask &= compile_condition({item["field"]: {item["op"]: item["value"]}})(store)
+    return mask
+
+
+def execute_spec(spec: Dict[str, Any], store: ColumnStore) -> np.ndarray:
+    """Row positions matching a validated spec, sorted and limited"""
+    rows = np.nonzero(filter_mask(spec["filters"], store))[0]
+
+    if spec["sort"] and rows.size:
+        # np.lexsort sorts by the last key first, so keys go in reverse; missing values sort last
+        keys = []
+        for item in reversed(spec["sort"]):
+            numbers = store.numeric(item["field"])[rows]
+            if np.isnan(numbers).all():
+                values = store.values(item["field"])[rows]
+                missing = pd.isna(values)  # None or NaN
+                _, ranks = np.unique([str(v) if not m else "" for v, m in zip(values, missing)], return_inverse=True)
+                key = ranks.astype(float)
+                key[missing] = np.nan
+            else:
+                key = numbers
+            key = -key if item["order"] == "desc" else key
+            keys.append(np.where(np.isnan(key), np.inf, key))
+        rows = rows[np.lexsort(keys)]
+    return rows[:spec["limit"]]
+
+
+def planner_prompt(query: str, schema: Optional[Dict[str, List[str]]] = None) -> str:
+    schema = schema or load_schema()
+    return f"""
+Translate the user's search into a JSON filter spec. Do not return data records.
+
+Schema (entity: columns):
+{json.dumps(schema, indent=2)}
+
+Spec format:
+{{"entity": "client" | "worker" | "task",
+  "filters": [{{"field": "<column>", "op": one of {list(COMPARISON_OPS)}, "value": <scalar>}}],
+  "sort": [{{"field": "<column>", "order": "asc" | "desc"}}],
+  "limit": <integer, default {DEFAULT_LIMIT}>}}
+
+Notes:
+- Skills, RequiredSkills and RequestedTaskIDs are comma-separated strings; use "contains" to match one item.
+- AvailableSlots and PreferredPhases are lists of phase numbers such as "[1,2,3]".
+- PriorityLevel is 1-5 (5 is highest); "top N" means sort descending with limit N.
+
+User query: "{query}"
+
+Return only the JSON object.
+"""
+
+
+def parse_spec(text: str) -> Any:
+    text = text.strip()
+    if text.startswith("```"):
+        text = "\n".join(text.split("\n")[1:-1])
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end <= start:
+        raise ValueError("Model response contains no JSON object")
+    return json.loads(text[start:end + 1])
@@ -0,0 +1,257 @@
+import math
+import json
+import numpy as np
+from collections import Counter
+from datetime import datetime
+from itertools import combinations
+from typing import List, Dict, Any, Optional
+
+from column_store import ColumnStore, compile_condition
+from join_view import EligibilityJoin
+from llm_cache import cache_key
+from scheduler import parse_phase_list, _to_int, _unique_rows
+
+MAX_PER_TYPE = 5
+# Clients requesting more tasks than this add no pairs; their combinations would dominate the count
+MAX_PAIR_ITEMS = 50
+
+
+def _min_support(n: int) -> int:
+    return max(2, math.ceil(0.05 * n))
+
+
+def _rule(rule_type: str, name: str, description: str, parameters: Dict[str, Any],
+          evidence: Dict[str, Any], score: float) -> Dict[str, Any]:
+    return {
+        # Stable per finding, so mining the same data twice suggests the same rule IDs
+        "id": f"{rule_type}_mined_{cache_key(rule_type, parameters)[:8]}",
+        "name": name,
+        "description": description,
+        "type": rule_type,
+        "parameters": parameters,
+        "isActive": True,
+        "createdAt": datetime.now().isoformat(),
+        "source": "mined",
+        "score": round(score, 4),
+        "evidence": evidence,
+    }
+
+
+def mine_corun(join: EligibilityJoin, corun_components: List[List[str]]) -> List[Dict[str, Any]]:
+    """Task pairs that clients keep requesting together"""
+    indptr, indices = join.client_csr
+    frequency = np.bincount(indices, minlength=len(join.task_ids))
+    pairs: Counter = Counter()
+    for c in range(len(join.client_ids)):
+        requested = np.unique(indices[indptr[c]:indptr[c + 1]])
+        if 2 <= requested.size <= MAX_PAIR_ITEMS:
+            pairs.update(combinations(requested.tolist(), 2))
+
+    together = {task: i for i, component in enumerate(corun_components) for task in component}
+    support = _min_support(len(join.client_ids))
+    found = []
+    for (a, b), count in pairs.items():
+        ta, tb = join.task_ids[a], join.task_ids[b]
+        confidence = count / min(frequency[a], frequency[b])
+        if count < support or confidence < 0.5:
+            continue
+        if ta in together and together.get(ta) == together.get(tb):
+            continue
+        found.append(_rule(
+            "coRun", f"Co-run {ta} and {tb}",
+            f"{count} clients request both {ta} and {tb} ({confidence:.0%} of the less requested one)",
+            {"task_ids": [ta, tb]},
+            {"clients": count, "confidence": round(float(confidence), 4)},
+            count * confidence,
+        ))
+    return sorted(found, key=lambda r: -r["score"])[:MAX_PER_TYPE]
+
+
+def mine_load_limits(join: EligibilityJoin, workers: List[Dict[str, Any]], tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """WorkerGroups whose share of eligible task demand exceeds their capacity"""
+    _, worker_rows = _unique_rows(workers, "WorkerID")
+    _, task_rows = _unique_rows(tasks, "TaskID")
+    if not worker_rows or not task_rows:
+        return []
+    indptr, indices = join.task_csr
+    counts = np.diff(indptr)
+    duration = np.array([max(1, _to_int(t.get("Duration"), 1)) for t in task_rows], dtype=float)
+    # Each task's Duration is shared evenly by its eligible workers
+    share = np.divide(duration, counts, out=np.zeros_like(duration), where=counts > 0)
+    load = np.bincount(indices, weights=np.repeat(share, counts), minlength=len(worker_rows))
+    max_load = np.array([max(0, _to_int(w.get("MaxLoadPerPhase"), 0)) for w in worker_rows], dtype=float)
+    capacity = max_load * np.array([len(parse_phase_list(w.get("AvailableSlots"))) for w in worker_rows])
+
+    groups: Dict[str, List[int]] = {}
+    for i, worker in enumerate(worker_rows):
+        groups.setdefault(str(worker.get("WorkerGroup") or ""), []).append(i)
+    found = []
+    for group, members in groups.items():
+        if not group:
+            continue
+        demand, supply = float(load[members].sum()), float(capacity[members].sum())
+        if demand <= supply:
+            continue
+        # Cap the group at its median load so its busiest members are not stacked further
+        cap = int(np.median(max_load[members]))
+        affected = int((max_load[members] > cap).sum())
+        if cap < 1 or not affected:
+            continue
+        utilization = demand / supply if supply else float("inf")
+        found.append(_rule(
+            "loadLimit", f"Load limit for {group}",
+            f"{group} is eligible for {demand:.1f} task-phases against {supply:.0f} slots of capacity; "
+            f"cap MaxLoadPerPhase at {cap} ({affected} workers above it)",
+            {"max_load_per_phase": cap, "worker_groups": [group]},
+            {"demand": round(demand, 3), "capacity": round(supply, 3),
+             "utilization": round(utilization, 4) if math.isfinite(utilization) else None, "workers_capped": affected},
+            min(utilization, 1e6),
+        ))
+    return sorted(found, key=lambda r: -r["score"])[:MAX_PER_TYPE]
+
+
+def mine_phase_windows(capacity: Dict[str, Any], tasks: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Move the longest tasks that could avoid an oversaturated phase out of it"""
+    hot = {p["phase"]: p for p in capacity.get("by_phase", []) if p["oversaturated"]}
+    if not hot:
+        return []
+    _, task_rows = _unique_rows(tasks, "TaskID")
+    found = []
+    for task in task_rows:
+        preferred = sorted(set(parse_phase_list(task.get("PreferredPhases"))))
+        crowded = [p for p in preferred if p in hot]
+        allowed = [p for p in preferred if p not in hot]
+        if not crowded or not allowed:
+            continue
+        duration = max(1, _to_int(task.get("Duration"), 1))
+        task_id = task.get("TaskID")
+        phases = f"phase{'s' if len(crowded) > 1 else ''} {', '.join(map(str, crowded))}"
+        found.append(_rule(
+            "phaseWindow", f"Keep {task_id} out of {phases}",
+            f"{phases.capitalize()} {'are' if len(crowded) > 1 else 'is'} oversaturated; {task_id} (Duration {duration}) "
+            f"can run in phase {', '.join(map(str, allowed))} instead",
+            {"task_id": task_id, "allowed_phases": allowed},
+            {"crowded_phases": [{"phase": p, "demand": hot[p]["demand"], "supply": hot[p]["supply"]} for p in crowded],
+             "duration": duration},
+            float(duration),
+        ))
+    return sorted(found, key=lambda r: -r["score"])[:MAX_PER_TYPE]
+
+
+def _keys(value: Any) -> List[str]:
+    try:
+        parsed = json.loads(value) if isinstance(value, str) and value else value
+    except ValueError:
+        return []
+    return list(parsed) if isinstance(parsed, dict) else []
+
+
+def _attribute_features(store: ColumnStore) -> List[tuple]:
+    """(label, condition, mask) for each scalar non-numeric AttributesJSON value a contains-match selects exactly"""
+    if not store.has("AttributesJSON"):
+        return []
+    keys = dict.fromkeys(k for v in store.column("AttributesJSON") for k in _keys(v))
+    features = []
+    for key in keys:
+        values = store.attribute(key)
+        counts = Counter(v for v in values if isinstance(v, (bool, str)))
+        if len(counts) > 20:
+            continue  # free text, not a category
+        for value, count in counts.items():
+            if count < 2:
+                continue
+            mask = values.map(lambda v: v is value if isinstance(value, bool) else v == value).to_numpy(dtype=bool)
+            condition = {"entity_type": "client", "AttributesJSON": {"contains": json.dumps({key: value})[1:-1]}}
+            # Rules match the raw JSON text; keep only features where that agrees with the parsed value
+            if np.array_equal(compile_condition(condition)(store), mask):
+                features.append((f"{key} = {json.dumps(value)}", condition, mask))
+    return features
+
+
+def mine_priority_rules(store: ColumnStore) -> List[Dict[str, Any]]:
+    """Client features whose members sit well above or below the average PriorityLevel"""
+    priority = store.numeric("PriorityLevel")
+    valid = ~np.isnan(priority)
+    n = int(valid.sum())
+    if n < 4:
+        return []
+    mean, std = float(priority[valid].mean()), float(priority[valid].std())
+    if std == 0:
+        return []
+
+    features = []
+    if store.has("GroupTag"):
+        tags = store.values("GroupTag")
+        for tag in {t for t in tags if t not in (None, "")}:
+            features.append((f"GroupTag = {tag}", {"entity_type": "client", "GroupTag": {"==": tag}}, tags == tag))
+    features.extend(_attribute_features(store))
+
+    support = _min_support(n)
+    found = []
+    for label, condition, mask in features:
+        members = mask & valid
+        size = int(members.sum())
+        if size < support or size == n:
+            continue
+        group_mean = float(priority[members].mean())
+        z = (group_mean - mean) / (std / math.sqrt(size))
+        if abs(z) < 2 or abs(group_mean - mean) < 0.5:
+            continue
+        direction = "boost_priority" if group_mean > mean else "lower_priority"
+        found.append(_rule(
+            "priorityRule", f"{'Raise' if direction == 'boost_priority' else 'Lower'} priority where {label}",
+            f"{size} clients with {label} average PriorityLevel {group_mean:.2f} against {mean:.2f} overall",
+            {"condition": condition, "action": {"type": direction, "value": 1}},
+            {"clients": size, "mean_priority": round(group_mean, 3), "overall_mean": round(mean, 3), "z": round(z, 3)},
+            abs(z),
+        ))
+    return sorted(found, key=lambda r: -r["score"])[:MAX_PER_TYPE]
+
+
+def phrasing_prompt(rules: List[Dict[str, Any]]) -> str:
+    findings = json.dumps([{"i": i, "type": r["type"], "parameters": r["parameters"], "evidence": r["evidence"],
+                            "draft": r["description"]} for i, r in enumerate(rules)], separators=(",", ":"), default=str)
+    return f"""
+These scheduling rules were mined from the data. Write a short name and a one-sentence description for each,
+for a business user. Keep the numbers from the evidence; do not change what the rule does.
+
+Rules:
+{findings}
+
+Return only a JSON array: [{{"i": <number>, "name": "...", "description": "..."}}]
+"""
+
+
+def phrase_rule(phrased: List[Dict[str, Any]], item: Any) -> Optional[int]:
+    """Copy one phrasing answer item onto its rule; the rule's index, or None when the item is unusable"""
+    if not isinstance(item, dict) or not isinstance(item.get("i"), int) or not 0 <= item["i"] < len(phrased):
+        return None
+    for field in ("name", "description"):
+        if isinstance(item.get(field), str) and item[field].strip():
+            phrased[item["i"]][field] = item[field].strip()
+    return item["i"]
+
+
+def apply_phrasing(rules: List[Dict[str, Any]], text: str) -> List[Dict[str, Any]]:
+    """Copies of rules with the model's names and descriptions where it gave usable ones"""
+    text = (text or "").strip()
+    start, end = text.find("["), text.rfind("]")
+    try:
+        items = json.loads(text[start:end + 1]) if start != -1 and end > start else []
+    except ValueError:
+        items = []
+    phrased = [dict(rule) for rule in rules]
+    for item in items if isinstance(items, list) else []:
+        phrase_rule(phrased, item)
+    return phrased
+
+
+def mine_rules(workers: List[Dict[str, Any]], tasks: List[Dict[str, Any]], join: EligibilityJoin, capacity: Dict[str, Any], client_store: ColumnStore,
+               corun_components: Optional[List[List[str]]] = None) -> List[Dict[str, Any]]:
+    """Rule suggestions grounded in the full dataset, strongest first within each type"""
+    return (
+        mine_corun(join, corun_components or [])
+        + mine_load_limits(join, workers, tasks)
+        + mine_phase_windows(capacity, tasks)
+        + mine_priority_rules(client_store)
+    )
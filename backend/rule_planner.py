@@ -0,0 +1,322 @@
+import heapq
+import json
+from typing import List, Dict, Any, Optional, Set, Tuple, Callable
+
+# A field is addressed as (entity, column), e.g. ("client", "PriorityLevel")
+Field = Tuple[str, str]
+
+ENTITY_TYPES = ("client", "worker", "task")
+
+# Write modes that commute with each other when two rules touch the same field
+COMMUTATIVE_MODES = {"min", "union", "add"}
+
+
+def field_name(field: Field) -> str:
+    return f"{field[0]}.{field[1]}"
+
+
+def rule_key(rule: Dict[str, Any]) -> str:
+    """Stable identifier used for ordering and bookkeeping"""
+    rule_id = rule.get("id")
+    if rule_id:
+        return str(rule_id)
+    return json.dumps(rule, sort_keys=True, default=str)
+
+
+class RuleEffects:
+    """Fields a rule reads and writes, plus how and where it writes them"""
+
+    def __init__(self, rule: Dict[str, Any]):
+        self.rule = rule
+        self.key = rule_key(rule)
+        self.reads: Set[Field] = set()
+        self.writes: Set[Field] = set()
+        self.mode = "set"
+        self.value: Any = None
+        self.scope: Optional[Set[str]] = None  # None means "every entity of that type"
+
+    def overlaps(self, other: "RuleEffects") -> bool:
+        if self.scope is None or other.scope is None:
+            return True
+        return bool(self.scope & other.scope)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "rule_id": self.key,
+            "reads": sorted(field_name(f) for f in self.reads),
+            "writes": sorted(field_name(f) for f in self.writes),
+            "mode": self.mode,
+        }
+
+
+def _condition_fields(condition: Any) -> List[str]:
+    if not isinstance(condition, dict):
+        return []
+    return [f for f in condition.keys() if f != "entity_type"]
+
+
+def analyze_rule(rule: Dict[str, Any]) -> RuleEffects:
+    """Compute the read/write sets of a rule, mirroring DataManager._apply_* semantics"""
+    effects = RuleEffects(rule)
+    rule_type = rule.get("type")
+    params = rule.get("parameters", {}) or {}
+
+    if rule_type == "priorityRule":
+        text = f"{rule.get('name', '')} {rule.get('description', '')}".lower()
+        if ("budget" in text or "urgent" in text) and not isinstance(params.get("condition"), dict):
+            effects.reads.add(("client", "AttributesJSON"))
+            effects.writes.add(("client", "PriorityLevel"))
+            effects.mode = "set"
+            effects.value = 9 if "budget" in text else 10
+        else:
+            condition = params.get("condition", {})
+            action = params.get("action", {})
+            entity = condition.get("entity_type") if isinstance(condition, dict) else None
+            entity = entity or "client"
+            target = "PriorityLevel" if entity == "client" else "Priority"
+            effects.reads.update((entity, f) for f in _condition_fields(condition))
+            effects.reads.add((entity, target))
+            effects.writes.add((entity, target))
+            effects.mode = "add" if isinstance(action, dict) else "set"
+
+    elif rule_type == "loadLimit":
+        effects.reads.update({("worker", "WorkerGroup"), ("worker", "MaxLoadPerPhase")})
+        effects.writes.add(("worker", "MaxLoadPerPhase"))
+        effects.mode = "min"
+
+    elif rule_type == "coRun":
+        effects.reads.add(("task", "TaskID"))
+        effects.writes.add(("task", "CoRunGroup"))
+        effects.mode = "union"
+        effects.scope = {str(t) for t in params.get("task_ids", [])}
+
+    elif rule_type == "phaseWindow":
+        effects.reads.update({("task", "TaskID"), ("task", "PreferredPhases")})
+        effects.writes.add(("task", "PreferredPhases"))
+        effects.mode = "filter"
+        effects.value = sorted(params.get("allowed_phases", []))
+        effects.scope = {str(params.get("task_id"))}
+
+    elif rule_type == "slotRestriction":
+        # Enforced at scheduling time; it only reads availability
+        effects.reads.update({("worker", "AvailableSlots"), ("worker", "WorkerGroup"), ("client", "GroupTag")})
+        effects.mode = "none"
+
+    elif rule_type == "patternMatch":
+        pattern = params.get("pattern", {})
+        action = params.get("action", {}) or {}
+        for entity in ENTITY_TYPES:
+            effects.reads.update((entity, f) for f in _condition_fields(pattern))
+        if action.get("type") == "set_attribute" and action.get("attribute"):
+            for entity in ENTITY_TYPES:
+                effects.writes.add((entity, action["attribute"]))
+            effects.mode = "set"
+            effects.value = action.get("value")
+        elif action.get("type") == "modify_priority":
+            effects.reads.update({("client", "PriorityLevel"), ("task", "Priority")})
+            effects.writes.update({("client", "PriorityLevel"), ("task", "Priority")})
+            effects.mode = "add"
+
+    return effects
+
+
+def _conflict_reason(a: RuleEffects, b: RuleEffects) -> Optional[str]:
+    if not a.overlaps(b):
+        return None
+    if a.mode == b.mode and a.mode in COMMUTATIVE_MODES:
+        return None
+    if a.mode == b.mode and a.value == b.value:
+        return None  # Same assignment twice is harmless
+    if a.mode == b.mode:
+        return f"both {a.mode} different values"
+    return f"{a.mode} vs {b.mode}"
+
+
+class RulePlan:
+    """Dependency graph and deterministic application order for a batch of rules"""
+
+    def __init__(self, rules: List[Dict[str, Any]]):
+        # Sort by key first so the plan never depends on request order
+        self.effects = sorted((analyze_rule(r) for r in rules), key=lambda e: e.key)
+        n = len(self.effects)
+        self.edges: List[Set[int]] = [set() for _ in range(n)]
+        self.conflicts: List[Dict[str, Any]] = []
+
+        writers: Dict[Field, List[int]] = {}
+        readers: Dict[Field, List[int]] = {}
+        for i, eff in enumerate(self.effects):
+            for f in eff.writes:
+                writers.setdefault(f, []).append(i)
+            for f in eff.reads:
+                readers.setdefault(f, []).append(i)
+
+        # Writer -> reader edges; self-dependencies are handled by idempotent rules
+        for f, ws in writers.items():
+            for w in ws:
+                for r in readers.get(f, []):
+                    if r != w:
+                        self.edges[w].add(r)
+
+        # Conflicting writers on the same field
+        for f, ws in sorted(writers.items()):
+            for x in range(len(ws)):
+                for y in range(x + 1, len(ws)):
+                    a, b = self.effects[ws[x]], self.effects[ws[y]]
+                    reason = _conflict_reason(a, b)
+                    if reason:
+                        self.conflicts.append({
+                            "field": field_name(f),
+                            "rules": [a.key, b.key],
+                            "reason": reason,
+                            "winner": b.key,  # Applied last in key order
+                        })
+                        # Last writer wins: order the pair and never re-trigger the loser
+                        self.edges[ws[x]].add(ws[y])
+                        self.edges[ws[y]].discard(ws[x])
+
+        self.components = self._strongly_connected_components()
+        self.order = self._topological_order()
+        self.rank = {idx: pos for pos, idx in enumerate(self.order)}
+
+    def _strongly_connected_components(self) -> List[List[int]]:
+        # Iterative Tarjan, visiting nodes in key order for reproducibility
+        n = len(self.effects)
+        index = [0] * n
+        low = [0] * n
+        on_stack = [False] * n
+        visited = [False] * n
+        stack: List[int] = []
+        components: List[List[int]] = []
+        counter = 0
+
+        for root in range(n):
+            if visited[root]:
+                continue
+            work = [(root, iter(sorted(self.edges[root])))]
+            visited[root] = True
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            while work:
+                node, children = work[-1]
+                advanced = False
+                for child in children:
+                    if not visited[child]:
+                        visited[child] = True
+                        index[child] = low[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack[child] = True
+                        work.append((child, iter(sorted(self.edges[child]))))
+                        advanced = True
+                        break
+                    elif on_stack[child]:
+                        low[node] = min(low[node], index[child])
+                if advanced:
+                    continue
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        component.append(member)
+                        if member == node:
+                            break
+                    components.append(sorted(component))
+        return components
+
+    def _topological_order(self) -> List[int]:
+        # Kahn's algorithm over the condensed graph, smallest key first
+        comp_of = {}
+        for c, members in enumerate(self.components):
+            for m in members:
+                comp_of[m] = c
+        indegree = [0] * len(self.components)
+        comp_edges: List[Set[int]] = [set() for _ in self.components]
+        for src, targets in enumerate(self.edges):
+            for dst in targets:
+                a, b = comp_of[src], comp_of[dst]
+                if a != b and b not in comp_edges[a]:
+                    comp_edges[a].add(b)
+                    indegree[b] += 1
+
+        heap = [(self.components[c][0], c) for c in range(len(self.components)) if indegree[c] == 0]
+        heapq.heapify(heap)
+        order: List[int] = []
+        while heap:
+            _, c = heapq.heappop(heap)
+            order.extend(self.components[c])
+            for nxt in comp_edges[c]:
+                indegree[nxt] -= 1
+                if indegree[nxt] == 0:
+                    heapq.heappush(heap, (self.components[nxt][0], nxt))
+        return order
+
+    def cycles(self) -> List[List[str]]:
+        return [[self.effects[i].key for i in comp] for comp in self.components if len(comp) > 1]
+
+    def execute(self, apply_fn: Callable[[Dict[str, Any]], Dict[str, Any]], max_runs_per_rule: int = 10) -> Dict[str, Any]:
+        """Apply rules in topological order, re-running only rules whose inputs changed"""
+        queued = set(range(len(self.effects)))
+        heap = [(self.rank[i], i) for i in queued]
+        heapq.heapify(heap)
+        runs = [0] * len(self.effects)
+        results: Dict[int, Dict[str, Any]] = {}
+        executions = 0
+        converged = True
+
+        while heap:
+            _, i = heapq.heappop(heap)
+            queued.discard(i)
+            if runs[i] >= max_runs_per_rule:
+                converged = False
+                continue
+            runs[i] += 1
+            executions += 1
+
+            result = apply_fn(self.effects[i].rule)
+            changed = result.get("changes_made", 0)
+            previous = results.get(i)
+            if previous:
+                result["changes_made"] = previous.get("changes_made", 0) + changed
+            results[i] = result
+
+            if changed > 0:
+                for dependent in self.edges[i]:
+                    if dependent not in queued:
+                        queued.add(dependent)
+                        heapq.heappush(heap, (self.rank[dependent], dependent))
+
+        ordered_results = []
+        for i in self.order:
+            res = dict(results.get(i, {"applied": False, "changes_made": 0}))
+            res["rule_id"] = self.effects[i].key
+            res["runs"] = runs[i]
+            ordered_results.append(res)
+
+        return {
+            "results": ordered_results,
+            "order": [self.effects[i].key for i in self.order],
+            "conflicts": self.conflicts,
+            "cycles": self.cycles(),
+            "executions": executions,
+            "passes": max(runs) if runs else 0,
+            "converged": converged,
+        }
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "rules": [e.to_dict() for e in self.effects],
+            "edges": [
+                [self.effects[src].key, self.effects[dst].key]
+                for src in self.order for dst in sorted(self.edges[src], key=lambda d: self.rank[d])
+            ],
+            "order": [self.effects[i].key for i in self.order],
+            "conflicts": self.conflicts,
+            "cycles": self.cycles(),
+        }
@@ -0,0 +1,228 @@
+import json
+import numpy as np
+import pandas as pd
+from typing import List, Dict, Any, Tuple
+
+from column_store import ColumnStore, compile_condition, estimate_selectivity
+from rule_planner import RulePlan
+
+PRIORITY_NAMES = {"Low": 1, "Medium": 3, "High": 5}
+
+
+class RuleImpact:
+    """Matched rows and field-level changes a single rule would produce"""
+
+    def __init__(self, rule: Dict[str, Any], sample_size: int):
+        self.rule = rule
+        self.sample_size = sample_size
+        self.estimated: Dict[str, float] = {}
+        self.matched: Dict[str, int] = {}
+        self.changed: Dict[str, int] = {}
+        self.sample_ids: Dict[str, List[Any]] = {}
+        self.diff: List[Dict[str, Any]] = []
+        self.note = ""
+
+    def add(self, entity: str, store: ColumnStore, positions: np.ndarray, field: str,
+            old: np.ndarray, new: np.ndarray, estimate: float = None):
+        """Record matches and the diff for one (entity, field); old/new are aligned with positions"""
+        changed = np.flatnonzero(_differs(old, new))
+        self.matched[entity] = self.matched.get(entity, 0) + int(positions.size)
+        self.changed[entity] = self.changed.get(entity, 0) + int(changed.size)
+        self.estimated[entity] = estimate if estimate is not None else positions.size / max(store.size, 1)
+
+        ids = store.ids()
+        sample = self.sample_ids.setdefault(entity, [])
+        for pos in positions[: max(0, self.sample_size - len(sample))]:
+            sample.append(_plain(ids[pos]))
+        room = self.sample_size - len(self.diff)
+        for k in changed[: max(0, room)]:
+            self.diff.append({
+                "entity": entity,
+                "id": _plain(ids[positions[k]]),
+                "field": field,
+                "old": _plain(old[k]),
+                "new": _plain(new[k]),
+            })
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {
+            "rule_id": self.rule.get("id"),
+            "type": self.rule.get("type"),
+            "estimated_selectivity": {k: round(v, 4) for k, v in self.estimated.items()},
+            "matched": self.matched,
+            "changed": self.changed,
+            "sample_ids": self.sample_ids,
+            "diff_preview": self.diff,
+        }
+        if self.note:
+            result["note"] = self.note
+        return result
+
+
+def _values_at(store: ColumnStore, field: str, positions: np.ndarray) -> np.ndarray:
+    return store.values(field)[positions]
+
+
+def _filled(positions: np.ndarray, value: Any) -> np.ndarray:
+    values = np.empty(positions.size, dtype=object)
+    values[:] = [value] * positions.size
+    return values
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, float) and np.isnan(value):
+        return None
+    return value
+
+
+def _differs(old: np.ndarray, new: np.ndarray) -> np.ndarray:
+    try:
+        return ~np.equal(old, new, dtype=object).astype(bool)
+    except (TypeError, ValueError):
+        # Lists and other containers compare element-wise; fall back to per-value checks
+        return np.fromiter((not (a == b) for a, b in zip(old, new)), dtype=bool, count=len(old))
+
+
+def _priority_values(values: np.ndarray) -> np.ndarray:
+    mapped = [PRIORITY_NAMES.get(v, 3) if isinstance(v, str) else v for v in values]
+    return pd.to_numeric(pd.Series(mapped, dtype=object), errors="coerce").fillna(3).to_numpy()
+
+
+def _not_yet_applied(dm, rule: Dict[str, Any], entity: str, store: ColumnStore) -> np.ndarray:
+    applied = dm._rule_applications.get(str(rule.get("id", rule.get("name", ""))), set())
+    prefix = f"{entity}:"
+    applied_ids = [key[len(prefix):] for key in applied if key.startswith(prefix)]
+    if not applied_ids:
+        return np.ones(store.size, dtype=bool)
+    return ~store.mask_for_ids(applied_ids)
+
+
+def _phase_window(current: Any, allowed: List[int]) -> str:
+    # Same parsing and fallback as DataManager._apply_phase_window_rule
+    phases = current if current is not None else "1"
+    if isinstance(phases, str):
+        try:
+            phases = json.loads(phases) if phases.startswith("[") else [int(phases)]
+        except Exception:
+            phases = [1]
+    filtered = [p for p in phases if p in allowed] or allowed[:1]
+    return json.dumps(filtered)
+
+
+def preview_rule(dm, rule: Dict[str, Any], sample_size: int = 10) -> Dict[str, Any]:
+    """Evaluate a rule against the column stores without touching the live data"""
+    impact = RuleImpact(rule, sample_size)
+    rule_type = rule.get("type")
+    params = rule.get("parameters", {}) or {}
+
+    if rule_type == "priorityRule":
+        text = f"{rule.get('name', '')} {rule.get('description', '')}".lower()
+        store = dm.column_store("client")
+        if ("budget" in text or "urgent" in text) and not isinstance(params.get("condition"), dict):
+            if "budget" in text:
+                budget = pd.to_numeric(store.attribute("budget"), errors="coerce").fillna(0)
+                positions, value = np.flatnonzero((budget > 40000).to_numpy()), 9
+            else:
+                positions, value = np.flatnonzero(store.attribute("urgent").map(bool).to_numpy()), 10
+            old = _values_at(store, "PriorityLevel", positions)
+            impact.add("client", store, positions, "PriorityLevel", old, _filled(positions, value))
+        else:
+            condition = params.get("condition", {})
+            action = params.get("action", {})
+            condition = condition if isinstance(condition, dict) else {}
+            action = action if isinstance(action, dict) else {}
+            entity = condition.get("entity_type") or "client"
+            if entity in ("client", "task"):
+                store = dm.column_store(entity)
+                field = "PriorityLevel" if entity == "client" else "Priority"
+                predicate = compile_condition(condition)
+                positions = np.flatnonzero(predicate(store) & _not_yet_applied(dm, rule, entity, store))
+                old = _values_at(store, field, positions)
+                if entity == "client":
+                    current = _priority_values(old)
+                else:
+                    current = pd.to_numeric(pd.Series(old, dtype=object), errors="coerce").fillna(3).to_numpy()
+                amount = action.get("value", 1)
+                if action.get("type") == "boost_priority":
+                    new = np.minimum(10, current + amount).astype(object)
+                elif action.get("type") == "lower_priority":
+                    new = np.maximum(1, current - amount).astype(object)
+                else:
+                    new = old
+                impact.add(entity, store, positions, field, old, new, estimate_selectivity(store, predicate))
+
+    elif rule_type == "loadLimit":
+        store = dm.column_store("worker")
+        max_load = params.get("max_load_per_phase", 3)
+        groups = params.get("worker_groups", [])
+        in_group = store.column("WorkerGroup").isin(groups).to_numpy() if groups else np.ones(store.size, dtype=bool)
+        current = np.nan_to_num(store.numeric("MaxLoadPerPhase"), nan=999)
+        positions = np.flatnonzero(in_group & (current > max_load))
+        old = _values_at(store, "MaxLoadPerPhase", positions)
+        impact.add("worker", store, positions, "MaxLoadPerPhase", old, _filled(positions, max_load))
+
+    elif rule_type == "coRun":
+        store = dm.column_store("task")
+        group_id = f"corun_{rule.get('id', 'unknown')}"
+        positions = np.flatnonzero(store.mask_for_ids(params.get("task_ids", [])))
+        old = _values_at(store, "CoRunGroup", positions)
+        new = np.empty(positions.size, dtype=object)
+        for k, groups in enumerate(old):
+            groups = groups if isinstance(groups, list) else []
+            new[k] = groups if group_id in groups else groups + [group_id]
+        impact.add("task", store, positions, "CoRunGroup", old, new)
+
+    elif rule_type == "phaseWindow":
+        store = dm.column_store("task")
+        allowed = params.get("allowed_phases", [])
+        positions = np.flatnonzero(store.mask_for_ids([params.get("task_id")]))
+        old = _values_at(store, "PreferredPhases", positions)
+        new = np.array([_phase_window(v, allowed) for v in old], dtype=object)
+        impact.add("task", store, positions, "PreferredPhases", old, new)
+
+    elif rule_type == "slotRestriction":
+        impact.note = "Slot restrictions are enforced at scheduling time and do not modify data"
+
+    elif rule_type == "patternMatch":
+        pattern = params.get("pattern", {})
+        action = params.get("action", {}) or {}
+        predicate = compile_condition(pattern)
+        for entity in ("client", "worker", "task"):
+            store = dm.column_store(entity)
+            if store.size == 0:
+                continue
+            matched = predicate(store)
+            estimate = estimate_selectivity(store, predicate)
+            if action.get("type") == "set_attribute" and action.get("attribute") and action.get("value") is not None:
+                field = action["attribute"]
+                positions = np.flatnonzero(matched)
+                old = _values_at(store, field, positions)
+                impact.add(entity, store, positions, field, old, _filled(positions, action["value"]), estimate)
+            elif action.get("type") == "modify_priority":
+                field = "PriorityLevel" if entity == "client" else "Priority"
+                if not store.has(field):
+                    continue
+                matched &= store.column(field).notna().to_numpy() & _not_yet_applied(dm, rule, entity, store)
+                positions = np.flatnonzero(matched)
+                old = _values_at(store, field, positions)
+                current = pd.to_numeric(pd.Series(old, dtype=object), errors="coerce").fillna(3).to_numpy()
+                new = np.clip(current + action.get("modifier", 0), 1, 5).astype(object)
+                impact.add(entity, store, positions, field, old, new, estimate)
+            else:
+                positions = np.flatnonzero(matched)
+                ids = _values_at(store, store.id_field, positions)
+                impact.add(entity, store, positions, store.id_field, ids, ids, estimate)
+    else:
+        impact.note = f"Unsupported rule type: {rule_type}"
+
+    return impact.to_dict()
+
+
+def preview_rules(dm, rules: List[Dict[str, Any]], sample_size: int = 10) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Preview every rule independently against the current data, plus the plan they would run in"""
+    active = [r for r in rules if r.get("isActive", True)]
+    plan = RulePlan(active)
+    previews = [preview_rule(dm, e.rule, sample_size) for e in (plan.effects[i] for i in plan.order)]
+    return previews, {"order": [plan.effects[i].key for i in plan.order], "conflicts": plan.conflicts}
@@ -0,0 +1,207 @@
+import copy
+import json
+import os
+import time
+import pickle
+import hashlib
+import tempfile
+import threading
+import multiprocessing
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Any, Optional
+
+from corun_groups import CoRunGroups
+from scheduler import SchedulingProblem, GreedyScheduler, normalize_weights
+
+MAX_SCENARIOS = 500
+
+# Rule types the scheduler can honour without rewriting client or task rows
+SIMULATED_RULES = {"phaseWindow", "slotRestriction", "coRun", "loadLimit"}
+
+# Read-only dataset of a pool process, set by _init_dataset and kept while requests use the same one
+_DATASET: Dict[str, Any] = {}
+_DATASET_KEY: Optional[str] = None
+_PROBLEMS: Dict[str, SchedulingProblem] = {}
+
+# One pool per server process, shared by all requests
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _init_dataset(dataset: Dict[str, Any], key: Optional[str] = None):
+    global _DATASET, _DATASET_KEY, _PROBLEMS
+    _DATASET = dataset
+    _DATASET_KEY = key
+    _PROBLEMS = {}
+
+
+def shared_pool() -> ProcessPoolExecutor:
+    """The scenario pool, started on first use with one process per CPU.
+
+    Processes come from forkserver (spawn where that is unavailable):
+    forking the threaded server could copy locks held by other threads
+    and deadlock the child.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+            _pool = ProcessPoolExecutor(max_workers=os.cpu_count() or 1, mp_context=multiprocessing.get_context(method))
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool = None
+
+
+def _scenario_rules(scenario: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [r for r in scenario.get("rules", []) or [] if r.get("isActive", True)]
+
+
+def _problem_for(rules: List[Dict[str, Any]]) -> SchedulingProblem:
+    """Problem for the base data plus a rule variant, built once per process and variant"""
+    key = json.dumps(rules, sort_keys=True, default=str)
+    if key not in _PROBLEMS:
+        workers = _DATASET["workers"]
+        groups = CoRunGroups()
+        for component in _DATASET["corun_components"]:
+            groups.union_all(component)
+        for rule in rules:
+            params = rule.get("parameters", {}) or {}
+            if rule.get("type") == "coRun":
+                groups.union_all(params.get("task_ids", []))
+            elif rule.get("type") == "loadLimit":
+                # Same cap as DataManager._apply_load_limit_rule, on copies of the affected rows
+                max_load = params.get("max_load_per_phase", 3)
+                targets = params.get("worker_groups", [])
+                workers = [
+                    {**w, "MaxLoadPerPhase": max_load}
+                    if (not targets or w.get("WorkerGroup") in targets) and w.get("MaxLoadPerPhase", 999) > max_load
+                    else w
+                    for w in workers
+                ]
+        _PROBLEMS[key] = SchedulingProblem(
+            _DATASET["clients"], workers, _DATASET["tasks"],
+            rules=_DATASET["rules"] + rules,
+            corun_components=groups.components(),
+        )
+    return _PROBLEMS[key]
+
+
+def _kpis(scheduler: GreedyScheduler) -> Dict[str, Any]:
+    problem = scheduler.problem
+    capacity = problem.available * problem.max_load[:, None]
+    requested = sum(len(problem.units[u]["tasks"]) for u in problem.live_units())
+    assigned = sum(len(p) for p in scheduler.placements.values())
+
+    # Priority-weighted fulfilment: served units weighted by their client's PriorityLevel
+    weight = {u: 1 + 4 * problem.client_priority[problem.units[u]["client"]] for u in problem.live_units()}
+    total_weight = sum(weight[u] * len(problem.units[u]["tasks"]) for u in weight)
+    served_weight = sum(weight[u] * len(p) for u, p in scheduler.placements.items())
+
+    # Load balance over workers that have any capacity: spread of their utilisation
+    worker_capacity = capacity.sum(axis=1)
+    has_capacity = worker_capacity > 0
+    utilization = scheduler.load.sum(axis=1)[has_capacity] / worker_capacity[has_capacity]
+    mean = float(utilization.mean()) if utilization.size else 0.0
+
+    phase_capacity = capacity.sum(axis=0)
+    saturation = np.divide(scheduler.load.sum(axis=0), phase_capacity,
+                           out=np.zeros(problem.phase_count), where=phase_capacity > 0)
+    return {
+        "requested": requested,
+        "fulfilled": assigned,
+        "fill_rate": round(assigned / requested, 4) if requested else 1.0,
+        "priority_weighted_fill": round(served_weight / total_weight, 4) if total_weight else 1.0,
+        "clients_served": len({problem.units[u]["client"] for u in scheduler.placements}),
+        "load_balance": {
+            "mean_utilization": round(mean, 4),
+            "max_utilization": round(float(utilization.max()), 4) if utilization.size else 0.0,
+            # Coefficient of variation; lower means load is spread more evenly
+            "cv": round(float(utilization.std()) / mean, 4) if mean > 0 else 0.0,
+        },
+        "phase_saturation": [round(float(s), 4) for s in saturation],
+        "max_phase_saturation": round(float(saturation.max()), 4) if saturation.size else 0.0,
+    }
+
+
+def _evaluate(scenario: Dict[str, Any]) -> Dict[str, Any]:
+    started = time.perf_counter()
+    rules = _scenario_rules(scenario)
+    problem = copy.copy(_problem_for([r for r in rules if r.get("type") in SIMULATED_RULES]))
+    problem.weights = normalize_weights(scenario.get("weights") or _DATASET["priorities"])
+    scheduler = GreedyScheduler(problem)
+    scheduler.run()
+    result = {
+        "name": scenario.get("name"),
+        "weights": problem.weights,
+        "kpis": _kpis(scheduler),
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
+    ignored = [r.get("id", r.get("type")) for r in rules if r.get("type") not in SIMULATED_RULES]
+    if ignored:
+        result["ignored_rules"] = ignored
+    return result
+
+
+def _evaluate_chunk(path: str, key: str, scenarios: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Evaluate scenarios in a pool process, loading the dataset file only when it is not the one already held"""
+    if _DATASET_KEY != key:
+        with open(path, "rb") as f:
+            _init_dataset(pickle.load(f), key)
+    return [_evaluate(s) for s in scenarios]
+
+
+def evaluate_scenarios(dataset: Dict[str, Any], scenarios: List[Dict[str, Any]],
+                       max_workers: Optional[int] = None) -> Dict[str, Any]:
+    """Schedule every scenario (weights and/or rule variant) and report comparable KPIs.
+
+    dataset holds clients, workers, tasks, rules, corun_components and
+    priorities. It is pickled once to a temporary file, which each pool
+    process loads when its content differs from what it already holds,
+    and treated as read-only. Each process caches one SchedulingProblem
+    per rule variant, so weight sweeps only rerun the greedy pass. At most
+    max_workers processes (capped at the CPU count) work on one request.
+    """
+    if not scenarios:
+        raise ValueError("No scenarios provided")
+    if len(scenarios) > MAX_SCENARIOS:
+        raise ValueError(f"At most {MAX_SCENARIOS} scenarios per request")
+    scenarios = [{**s, "name": s.get("name") or f"scenario_{i + 1}"} for i, s in enumerate(scenarios)]
+
+    started = time.perf_counter()
+    cpus = os.cpu_count() or 1
+    workers = max(1, min(int(max_workers or cpus), cpus, len(scenarios)))
+    if workers == 1:
+        _init_dataset(dataset)
+        results = [_evaluate(s) for s in scenarios]
+    else:
+        data = pickle.dumps(dataset, protocol=pickle.HIGHEST_PROTOCOL)
+        key = hashlib.sha256(data).hexdigest()
+        with tempfile.NamedTemporaryFile(prefix="scenarios_", suffix=".pkl", delete=False) as f:
+            f.write(data)
+        try:
+            # One contiguous chunk per process keeps this request within its share of the pool
+            size = -(-len(scenarios) // workers)
+            futures = [shared_pool().submit(_evaluate_chunk, f.name, key, scenarios[i:i + size])
+                       for i in range(0, len(scenarios), size)]
+            results = [result for future in futures for result in future.result()]
+        except BrokenProcessPool:
+            shutdown_pool()  # the next request starts a fresh pool
+            raise
+        finally:
+            os.unlink(f.name)
+
+    ranked = sorted(results, key=lambda r: (-r["kpis"]["priority_weighted_fill"], r["kpis"]["load_balance"]["cv"]))
+    return {
+        "scenarios": results,
+        "best": ranked[0]["name"],
+        "processes": workers,
+        "elapsed_ms": round((time.perf_counter() - started) * 1000, 2),
+    }
@@ -0,0 +1,641 @@
+import heapq
+import time
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+
+from auto_fix import split_list
+from join_view import EligibilityJoin, _unique_rows
+
+DEFAULT_WEIGHTS = {"PriorityLevel": 0.25, "RequestedTaskIDs": 0.25, "Fairness": 0.25, "LoadLimit": 0.25}
+
+WORKER_FIELDS = ("Skills", "AvailableSlots", "MaxLoadPerPhase", "WorkerGroup", "QualificationLevel")
+TASK_FIELDS = ("Duration", "RequiredSkills", "PreferredPhases", "MaxConcurrent")
+CLIENT_FIELDS = ("PriorityLevel", "RequestedTaskIDs")
+
+
+def parse_phase_list(value: Any) -> List[int]:
+    """Phase numbers from "[1,2]", "1-3", "2", a list or an int; anything unparsable is dropped"""
+    if isinstance(value, bool):
+        return []
+    if isinstance(value, (int, float)):
+        return [int(value)] if value == int(value) else []
+    if isinstance(value, str):
+        value = value.strip()
+        try:
+            if value.startswith("["):
+                # Tolerate stray entries such as "[1,2,abc]"
+                return [int(p) for p in (x.strip() for x in value.strip("[]").split(",")) if p.lstrip("-").isdigit()]
+            elif "-" in value:
+                start, end = map(int, value.split("-"))
+                return list(range(start, end + 1))
+            else:
+                return [int(value)] if value else []
+        except Exception:
+            return []
+    if isinstance(value, list):
+        return [int(p) for p in value if isinstance(p, (int, float)) and not isinstance(p, bool) and p == int(p)]
+    return []
+
+
+def _to_int(value: Any, default: int) -> int:
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return default
+
+
+def _snapshot(row: Dict[str, Any], fields: Tuple[str, ...]) -> tuple:
+    values = tuple(map(row.get, fields))
+    if list in map(type, values):
+        # Copy lists so in-place edits to the row still show up as changes
+        values = tuple(list(v) if isinstance(v, list) else v for v in values)
+    return values
+
+
+def normalize_weights(weights: Optional[Dict[str, float]]) -> Dict[str, float]:
+    merged = {k: float(v) for k, v in (weights or {}).items() if k in DEFAULT_WEIGHTS}
+    if not merged:
+        return dict(DEFAULT_WEIGHTS)
+    merged = {k: max(0.0, merged.get(k, 0.0)) for k in DEFAULT_WEIGHTS}
+    total = sum(merged.values())
+    return {k: v / total for k, v in merged.items()} if total > 0 else dict(DEFAULT_WEIGHTS)
+
+
+class SchedulingProblem:
+    """Workers, tasks and client demand compiled into arrays for the schedulers.
+
+    Phases are numbered from 1; phase p is column p - 1 of every per-phase
+    array. A demand unit is one client's requested tasks that must start
+    together: a single task, or the client's requested members of one
+    co-run component. update() patches the arrays in place for rows and
+    rules that changed, so a scheduler can repair instead of starting over.
+    """
+
+    def __init__(self, clients: List[Dict[str, Any]], workers: List[Dict[str, Any]], tasks: List[Dict[str, Any]],
+                 rules: List[Dict[str, Any]] = (), corun_components: List[List[str]] = (),
+                 weights: Optional[Dict[str, float]] = None, join: Optional[EligibilityJoin] = None):
+        self.weights = normalize_weights(weights)
+        self.warnings: List[str] = []
+        # Qualified workers come from the shared eligibility join; pass DataManager.join_view() to reuse it
+        self.eligibility = join if join is not None else EligibilityJoin(clients, workers, tasks)
+        self._eligible = self.eligibility.task_csr
+
+        # --- Workers ---
+        self.worker_pos, worker_rows = _unique_rows(workers, "WorkerID")
+        self.worker_ids: List[Any] = list(self.worker_pos)
+        self._worker_snapshots = [_snapshot(w, WORKER_FIELDS) for w in worker_rows]
+        self._worker_slots = [[p for p in parse_phase_list(w.get("AvailableSlots")) if p >= 1] for w in worker_rows]
+        self._worker_groups = [w.get("WorkerGroup") for w in worker_rows]
+        self.max_load = np.array([max(0, _to_int(w.get("MaxLoadPerPhase"), 1)) for w in worker_rows], dtype=np.int64)
+        self._qualification_raw = np.array([_to_int(w.get("QualificationLevel"), 0) for w in worker_rows], dtype=float)
+        self._normalize_qualification()
+
+        # --- Tasks ---
+        self.task_pos, task_rows = _unique_rows(tasks, "TaskID")
+        self.task_ids: List[Any] = list(self.task_pos)
+        self._task_snapshots = [_snapshot(t, TASK_FIELDS) for t in task_rows]
+        self.duration = np.array([max(1, _to_int(t.get("Duration"), 1)) for t in task_rows], dtype=np.int64)
+        self.max_concurrent = np.array([max(1, _to_int(t.get("MaxConcurrent"), 1)) for t in task_rows], dtype=np.int64)
+        self._preferred = [sorted({p for p in parse_phase_list(t.get("PreferredPhases")) if p >= 1}) for t in task_rows]
+
+        self.phase_count = max(
+            [max(s) for s in self._worker_slots if s]
+            + [max(p) + int(d) - 1 for p, d in zip(self._preferred, self.duration) if p]
+            + [1]
+        )
+        self._slot_rows = np.zeros((len(worker_rows), self.phase_count), dtype=bool)
+        for i in range(len(worker_rows)):
+            self._set_slot_row(i)
+
+        # Tasks sharing the same RequiredSkills share one signature, so the schedulers can cache per skill set
+        self.signatures: List[Tuple[str, ...]] = []
+        self._signature_pos: Dict[Tuple[str, ...], int] = {}
+        self.task_signature = np.zeros(len(task_rows), dtype=np.int64)
+        for i, task in enumerate(task_rows):
+            self.task_signature[i] = self._signature_of(task)
+
+        self._windows = self._phase_windows(rules)
+        self.allowed_starts: List[List[int]] = [[] for _ in task_rows]
+        for i in range(len(task_rows)):
+            self._set_allowed_starts(i)
+
+        self._restrictions = self._slot_restrictions(rules)
+        self.available = self._restricted_availability()
+
+        # --- Demand ---
+        self._component_of = self._components(corun_components)
+        self.client_pos, client_rows = _unique_rows(clients, "ClientID")
+        self.client_ids: List[Any] = list(self.client_pos)
+        self._client_snapshots = [_snapshot(c, CLIENT_FIELDS) for c in client_rows]
+        self.client_priority: List[float] = [0.0] * len(client_rows)
+        self.client_units: List[List[int]] = [[] for _ in client_rows]
+        self.units: List[Dict[str, Any]] = []  # {"client", "tasks", "known", "unknown", "rank", "live"}
+        for pos, client in enumerate(client_rows):
+            self._add_units(pos, client)
+
+    # --- Building blocks shared by __init__ and update() ---
+    def _normalize_qualification(self):
+        raw = self._qualification_raw
+        self.qualification = raw / raw.max() if raw.size and raw.max() > 0 else raw
+
+    def _set_slot_row(self, worker: int):
+        self._slot_rows[worker] = False
+        self._slot_rows[worker, [p - 1 for p in self._worker_slots[worker]]] = True
+
+    def _signature_of(self, task: Dict[str, Any]) -> int:
+        signature = tuple(sorted(set(split_list(task.get("RequiredSkills", "")))))
+        if signature not in self._signature_pos:
+            self._signature_pos[signature] = len(self.signatures)
+            self.signatures.append(signature)
+        return self._signature_pos[signature]
+
+    def _set_allowed_starts(self, task: int):
+        task_id = self.task_ids[task]
+        starts = self._preferred[task] or list(range(1, self.phase_count + 1))
+        if task_id in self._windows:
+            starts = [p for p in starts if p in self._windows[task_id]]
+        self.allowed_starts[task] = [p for p in starts if p + self.duration[task] - 1 <= self.phase_count]
+
+    def _phase_windows(self, rules) -> Dict[Any, set]:
+        windows: Dict[Any, set] = {}
+        for rule in rules or ():
+            if rule.get("type") != "phaseWindow" or not rule.get("isActive", True):
+                continue
+            params = rule.get("parameters", {}) or {}
+            allowed = set(parse_phase_list(params.get("allowed_phases", [])))
+            task_id = params.get("task_id")
+            windows[task_id] = windows[task_id] & allowed if task_id in windows else allowed
+        return windows
+
+    def _slot_restrictions(self, rules) -> List[Tuple[Any, Any, int]]:
+        restrictions = []
+        for rule in rules or ():
+            if rule.get("type") != "slotRestriction" or not rule.get("isActive", True):
+                continue
+            params = rule.get("parameters", {}) or {}
+            min_common = _to_int(params.get("min_common_slots", 1), 1)
+            for group in params.get("target_entities", []) or []:
+                restrictions.append((rule.get("id", ""), group, min_common))
+        return restrictions
+
+    def _restricted_availability(self) -> np.ndarray:
+        # A restricted worker group only works in the phases all its members share
+        self.warnings = []
+        available = self._slot_rows.copy()
+        for rule_id, group, min_common in self._restrictions:
+            members = [i for i, g in enumerate(self._worker_groups) if g == group]
+            if not members:
+                self.warnings.append(f"Slot restriction '{rule_id}': '{group}' is not a worker group, not enforced")
+                continue
+            common = available[members].all(axis=0)
+            if int(common.sum()) < min_common:
+                self.warnings.append(f"Slot restriction '{rule_id}': group '{group}' shares {int(common.sum())} slots, needs {min_common}")
+                continue
+            available[members] &= common
+        return available
+
+    def _components(self, corun_components) -> Dict[Any, str]:
+        component_of = {}
+        for component in corun_components or ():
+            for task_id in component:
+                component_of[task_id] = str(component[0])
+        return component_of
+
+    def _add_units(self, pos: int, client: Dict[str, Any]):
+        level = min(5, max(1, _to_int(client.get("PriorityLevel"), 3)))
+        self.client_priority[pos] = (level - 1) / 4
+        requested = list(dict.fromkeys(split_list(client.get("RequestedTaskIDs", ""))))
+        groups: Dict[Any, List[Any]] = {}
+        first_index: Dict[Any, int] = {}
+        for index, task_id in enumerate(requested):
+            key = self._component_of.get(task_id, task_id)
+            groups.setdefault(key, []).append(task_id)
+            first_index.setdefault(key, index)
+        for key, members in groups.items():
+            self.client_units[pos].append(len(self.units))
+            self.units.append({
+                "client": pos,
+                "tasks": members,
+                "known": [self.task_pos[t] for t in members if t in self.task_pos],
+                "unknown": [t for t in members if t not in self.task_pos],
+                # Earlier requests count as more wanted
+                "rank": 1 - first_index[key] / len(requested),
+                "live": True,
+            })
+
+    def update(self, clients: List[Dict[str, Any]], workers: List[Dict[str, Any]], tasks: List[Dict[str, Any]],
+               rules: List[Dict[str, Any]] = (), corun_components: List[List[str]] = ()) -> Optional[Dict[str, Any]]:
+        """Patch the problem to match the current data; returns what changed, or None if a rebuild is needed.
+
+        Rows are compared by snapshot, so only changed workers, tasks and
+        clients are re-parsed. Added or removed rows, or phases beyond the
+        current horizon, need a full rebuild.
+        """
+        worker_pos, worker_rows = _unique_rows(workers, "WorkerID")
+        task_pos, task_rows = _unique_rows(tasks, "TaskID")
+        client_pos, client_rows = _unique_rows(clients, "ClientID")
+        if list(worker_pos) != self.worker_ids or list(task_pos) != self.task_ids or list(client_pos) != self.client_ids:
+            return None
+
+        worker_snapshots = {}
+        for i, worker in enumerate(worker_rows):
+            snapshot = _snapshot(worker, WORKER_FIELDS)
+            if snapshot != self._worker_snapshots[i]:
+                worker_snapshots[i] = snapshot
+        task_snapshots = {}
+        for i, task in enumerate(task_rows):
+            snapshot = _snapshot(task, TASK_FIELDS)
+            if snapshot != self._task_snapshots[i]:
+                task_snapshots[i] = snapshot
+
+        # Check the horizon before patching anything, so a rebuild starts from a consistent state
+        for i in worker_snapshots:
+            if max(parse_phase_list(worker_rows[i].get("AvailableSlots")) or [0]) > self.phase_count:
+                return None
+        for i in task_snapshots:
+            preferred = parse_phase_list(task_rows[i].get("PreferredPhases"))
+            if preferred and max(preferred) + max(1, _to_int(task_rows[i].get("Duration"), 1)) - 1 > self.phase_count:
+                return None
+
+        self.eligibility.update(clients, workers, tasks)
+        self._eligible = self.eligibility.task_csr
+
+        changed_workers = set()
+        for i, snapshot in worker_snapshots.items():
+            worker = worker_rows[i]
+            self._worker_snapshots[i] = snapshot
+            self._worker_slots[i] = [p for p in parse_phase_list(worker.get("AvailableSlots")) if p >= 1]
+            self._set_slot_row(i)
+            self._worker_groups[i] = worker.get("WorkerGroup")
+            self.max_load[i] = max(0, _to_int(worker.get("MaxLoadPerPhase"), 1))
+            self._qualification_raw[i] = _to_int(worker.get("QualificationLevel"), 0)
+            changed_workers.add(i)
+        if changed_workers:
+            self._normalize_qualification()
+
+        windows = self._phase_windows(rules)
+        changed_tasks = {
+            self.task_pos[t] for t in set(windows) | set(self._windows)
+            if t in self.task_pos and windows.get(t) != self._windows.get(t)
+        }
+        self._windows = windows
+        for i, snapshot in task_snapshots.items():
+            task = task_rows[i]
+            self._task_snapshots[i] = snapshot
+            self.duration[i] = max(1, _to_int(task.get("Duration"), 1))
+            self.max_concurrent[i] = max(1, _to_int(task.get("MaxConcurrent"), 1))
+            self._preferred[i] = sorted({p for p in parse_phase_list(task.get("PreferredPhases")) if p >= 1})
+            self.task_signature[i] = self._signature_of(task)
+            changed_tasks.add(i)
+        for i in changed_tasks:
+            self._set_allowed_starts(i)
+
+        # Slot restrictions depend on whole groups; compare the resulting rows instead of tracking members
+        self._restrictions = self._slot_restrictions(rules)
+        available = self._restricted_availability()
+        changed_workers |= set(np.flatnonzero((available != self.available).any(axis=1)).tolist())
+        self.available = available
+
+        component_of = self._components(corun_components)
+        regrouped = {t for t in set(component_of) | set(self._component_of) if component_of.get(t) != self._component_of.get(t)}
+        self._component_of = component_of
+        changed_clients = set()
+        removed_units, added_units = [], []
+        for i, client in enumerate(client_rows):
+            snapshot = _snapshot(client, CLIENT_FIELDS)
+            if snapshot == self._client_snapshots[i] and not (regrouped and regrouped.intersection(split_list(client.get("RequestedTaskIDs", "")))):
+                continue
+            self._client_snapshots[i] = snapshot
+            for u in self.client_units[i]:
+                self.units[u]["live"] = False
+                removed_units.append(u)
+            self.client_units[i] = []
+            self._add_units(i, client)
+            added_units.extend(self.client_units[i])
+            changed_clients.add(i)
+
+        return {
+            "workers": changed_workers,
+            "tasks": changed_tasks,
+            "clients": changed_clients,
+            "removed_units": removed_units,
+            "added_units": added_units,
+        }
+
+    # --- Queries used by the schedulers ---
+    def qualified(self, task: int) -> np.ndarray:
+        """Worker positions holding every skill the task requires, read from the eligibility join"""
+        indptr, indices = self._eligible
+        return indices[indptr[task]:indptr[task + 1]]
+
+    def live_units(self) -> List[int]:
+        """Indices of current demand units; update() retires a changed client's old units"""
+        return [u for u, unit in enumerate(self.units) if unit["live"]]
+
+    def split_unit(self, unit: Dict[str, Any]) -> Tuple[List[int], List[Any]]:
+        """Task positions of a unit's known tasks, and the requested IDs that do not exist"""
+        return unit["known"], unit["unknown"]
+
+    def common_starts(self, tasks: List[int]) -> List[int]:
+        """Start phases allowed for every task of a unit"""
+        starts = set(self.allowed_starts[tasks[0]])
+        for task in tasks[1:]:
+            starts &= set(self.allowed_starts[task])
+        return sorted(starts)
+
+    def base_score(self, unit: Dict[str, Any]) -> float:
+        w = self.weights
+        return w["PriorityLevel"] * self.client_priority[unit["client"]] + w["RequestedTaskIDs"] * unit["rank"]
+
+
+class Schedule:
+    """Assignments produced by a scheduler, plus what could not be placed and why"""
+
+    def __init__(self, problem: SchedulingProblem, method: str):
+        self.problem = problem
+        self.method = method
+        self.assignments: List[Dict[str, Any]] = []
+        self.unassigned: List[Dict[str, Any]] = []
+        self.elapsed_ms = 0.0
+        self.extra: Dict[str, Any] = {}
+
+    def stats(self) -> Dict[str, Any]:
+        problem = self.problem
+        requested = len(self.assignments) + len(self.unassigned)
+        reasons: Dict[str, int] = {}
+        for entry in self.unassigned:
+            reasons[entry["reason"]] = reasons.get(entry["reason"], 0) + 1
+        capacity = int((problem.available * problem.max_load[:, None]).sum())
+        used = sum(len(a["phases"]) for a in self.assignments)
+        return {
+            "requested": requested,
+            "assigned": len(self.assignments),
+            "unassigned": len(self.unassigned),
+            "fill_rate": round(len(self.assignments) / requested, 4) if requested else 1.0,
+            "unassigned_by_reason": dict(sorted(reasons.items())),
+            "clients_served": len({a["client_id"] for a in self.assignments}),
+            "worker_utilization": round(used / capacity, 4) if capacity else 0.0,
+            "phases": problem.phase_count,
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = {
+            "method": self.method,
+            "weights": self.problem.weights,
+            "assignments": self.assignments,
+            "unassigned": self.unassigned,
+            "stats": self.stats(),
+            "warnings": self.problem.warnings,
+            "elapsed_ms": round(self.elapsed_ms, 2),
+        }
+        result.update(self.extra)
+        return result
+
+
+class GreedyScheduler:
+    """Priority-weighted greedy assignment over a SchedulingProblem.
+
+    Units are taken best-first from a heap. Fairness lowers a client's score
+    as it gets served, and scores only ever drop, so a popped unit whose
+    score is stale is simply re-pushed. Each unit tries its allowed start
+    phases in order and takes the feasible worker with the most spare
+    capacity and qualification, checked for all candidates at once.
+
+    The scheduler keeps its placements, so repair() can re-plan only the
+    units a data or rule change touched.
+    """
+
+    def __init__(self, problem: SchedulingProblem):
+        self.problem = problem
+        self.load = np.zeros_like(problem.available, dtype=np.int64)
+        self.concurrent = np.zeros((len(problem.task_ids), problem.phase_count), dtype=np.int64)
+        # free[w, p]: worker w is available in phase p and below MaxLoadPerPhase
+        self.free = problem.available & (problem.max_load[:, None] > 0)
+        self.served = [0] * len(problem.client_ids)
+        self.placements: Dict[int, List[Tuple[int, int, int]]] = {}  # unit index -> [(task, worker, start)]
+        self.failed: Dict[int, str] = {}  # unit index -> reason
+        self.scores: Dict[int, float] = {}
+        self._by_worker: Dict[int, set] = {}  # worker -> units placed on it
+        self._by_task: Dict[int, set] = {}  # task -> units that placed it
+        self.base: List[float] = []
+        # (signature, start, duration) windows with no free qualified worker; load only grows while
+        # assigning, so these stay exhausted until something is released
+        self._exhausted: set = set()
+        self._refresh()
+
+    def _refresh(self):
+        problem = self.problem
+        self.base.extend(problem.base_score(unit) for unit in problem.units[len(self.base):])
+        # Plain lists for the per-task scalars read in the hot loop
+        self._duration = problem.duration.tolist()
+        self._max_concurrent = problem.max_concurrent.tolist()
+        self._signature = problem.task_signature.tolist()
+
+    def _score(self, index: int) -> float:
+        client = self.problem.units[index]["client"]
+        return self.base[index] + self.problem.weights["Fairness"] / (1 + self.served[client])
+
+    def occupy(self, worker: int, task: int, start: int, sign: int = 1):
+        cols = slice(start - 1, start - 1 + self._duration[task])
+        self.load[worker, cols] += sign
+        self.concurrent[task, cols] += sign
+        self.free[worker, cols] = self.problem.available[worker, cols] & (self.load[worker, cols] < self.problem.max_load[worker])
+
+    def release(self, worker: int, task: int, start: int):
+        """Undo a committed assignment"""
+        self.occupy(worker, task, start, sign=-1)
+        self._exhausted.clear()
+
+    def _pick_worker(self, task: int, start: int, committed: bool = True) -> Tuple[Optional[int], str]:
+        problem = self.problem
+        candidates = problem.qualified(task)
+        if not candidates.size:
+            return None, "no_qualified_worker"
+        duration = self._duration[task]
+        window = (self._signature[task], start, duration)
+        if window in self._exhausted:
+            return None, "no_capacity"
+        cols = slice(start - 1, start - 1 + duration)
+        if self.concurrent[task, cols].max() >= self._max_concurrent[task]:
+            return None, "max_concurrent"
+        if duration == 1:
+            feasible = candidates[self.free[candidates, start - 1]]
+        else:
+            feasible = candidates[self.free[candidates, cols].all(axis=1)]
+        if not feasible.size:
+            # Only trust the result against committed state, not a co-run unit's tentative placements
+            if committed:
+                self._exhausted.add(window)
+            return None, "no_capacity"
+        spare = ((problem.max_load[feasible, None] - self.load[feasible, cols]).min(axis=1)
+                 / np.maximum(problem.max_load[feasible], 1))
+        load_weight = problem.weights["LoadLimit"]
+        score = load_weight * spare + (1 - load_weight) * problem.qualification[feasible]
+        return int(feasible[int(np.argmax(score))]), ""
+
+    def place(self, tasks: List[int]) -> Tuple[Optional[List[Tuple[int, int, int]]], str]:
+        """Assign every task at one common start phase, or nothing; returns [(task, worker, start)] or a reason"""
+        starts = self.problem.common_starts(tasks)
+        if not starts:
+            return None, "no_allowed_phase"
+        reason = "no_capacity"
+        for start in starts:
+            placed = []
+            for task in tasks:
+                worker, reason = self._pick_worker(task, start, committed=not placed)
+                if worker is None:
+                    break
+                self.occupy(worker, task, start)
+                placed.append((task, worker, start))
+            if len(placed) == len(tasks):
+                return placed, ""
+            for task, worker, _ in placed:
+                self.occupy(worker, task, start, sign=-1)
+            if reason == "no_qualified_worker":
+                break
+        return None, reason
+
+    def _assign(self, units: Iterable[int]):
+        problem = self.problem
+        heap = []
+        for index in units:
+            known, _ = problem.split_unit(problem.units[index])
+            if known:
+                heap.append((-self._score(index), index, known))
+        heapq.heapify(heap)
+
+        while heap:
+            neg_score, index, known = heapq.heappop(heap)
+            score = self._score(index)
+            if score < -neg_score - 1e-12:
+                heapq.heappush(heap, (-score, index, known))
+                continue
+            placed, reason = self.place(known)
+            if placed is None:
+                self.failed[index] = reason
+                continue
+            self.failed.pop(index, None)
+            self.served[problem.units[index]["client"]] += 1
+            self.placements[index] = placed
+            self.scores[index] = score
+            for task, worker, _ in placed:
+                self._by_worker.setdefault(worker, set()).add(index)
+                self._by_task.setdefault(task, set()).add(index)
+
+    def run(self) -> Schedule:
+        started = time.perf_counter()
+        self._assign(self.problem.live_units())
+        schedule = self.to_schedule()
+        schedule.elapsed_ms = (time.perf_counter() - started) * 1000
+        return schedule
+
+    def _unplace(self, index: int) -> List[Tuple[int, int, int]]:
+        placed = self.placements.pop(index)
+        for task, worker, start in placed:
+            self.release(worker, task, start)
+            self._by_worker[worker].discard(index)
+            self._by_task[task].discard(index)
+        self.served[self.problem.units[index]["client"]] -= 1
+        self.scores.pop(index, None)
+        return placed
+
+    def _keyed(self, index: int, placed: List[Tuple[int, int, int]]) -> Dict[Tuple[Any, Any], Tuple[Any, tuple]]:
+        problem = self.problem
+        client_id = problem.client_ids[problem.units[index]["client"]]
+        return {
+            (client_id, problem.task_ids[task]): (problem.worker_ids[worker], tuple(range(start, start + self._duration[task])))
+            for task, worker, start in placed
+        }
+
+    def repair(self, changes: Dict[str, Any]) -> Dict[str, Any]:
+        """Re-plan only the neighbourhood of a change reported by SchedulingProblem.update().
+
+        Placements on changed workers, of changed tasks or of retired client
+        units are released and re-queued together with the new units and the
+        failed units a change could now satisfy: those with changed tasks or
+        needing skills that a changed or freed worker has. Returns the
+        assignment delta keyed by (client, task).
+        """
+        problem = self.problem
+        changed_workers, changed_tasks = changes["workers"], changes["tasks"]
+        removed_units = set(changes["removed_units"])
+
+        # Release with the durations the placements were made with, then pick up the new ones
+        before: Dict[Tuple[Any, Any], Tuple[Any, tuple]] = {}
+        freed_workers = set(changed_workers)
+        affected = removed_units.intersection(self.placements)
+        for worker in changed_workers:
+            affected |= self._by_worker.get(worker, set())
+        for task in changed_tasks:
+            affected |= self._by_task.get(task, set())
+        released = sorted(affected)
+        for index in released:
+            before.update(self._keyed(index, self.placements[index]))
+            freed_workers.update(w for _, w, _ in self._unplace(index))
+        self._refresh()
+        if changed_workers:
+            rows = sorted(changed_workers)
+            self.free[rows] = problem.available[rows] & (self.load[rows] < problem.max_load[rows, None])
+        self._exhausted.clear()
+
+        for index in removed_units:
+            self.failed.pop(index, None)
+        freed = np.array(sorted(freed_workers), dtype=np.int64)
+        helped: Dict[int, bool] = {}  # signature -> a freed worker is qualified for it
+
+        def could_help(task: int) -> bool:
+            signature = self._signature[task]
+            if signature not in helped:
+                helped[signature] = bool(freed.size) and bool(np.isin(problem.qualified(task), freed, assume_unique=True).any())
+            return helped[signature]
+
+        retry = [u for u in released if u not in removed_units] + list(changes["added_units"])
+        for index in list(self.failed):
+            known, _ = problem.split_unit(problem.units[index])
+            if any(t in changed_tasks or could_help(t) for t in known):
+                retry.append(index)
+        self._assign(retry)
+
+        after: Dict[Tuple[Any, Any], Tuple[Any, tuple]] = {}
+        for index in retry:
+            if index in self.placements:
+                after.update(self._keyed(index, self.placements[index]))
+
+        def entry(key, value):
+            return {"client_id": key[0], "task_id": key[1], "worker_id": value[0], "phases": list(value[1])}
+
+        return {
+            "added": [entry(k, v) for k, v in after.items() if k not in before],
+            "removed": [entry(k, v) for k, v in before.items() if k not in after],
+            "moved": [
+                {**entry(k, after[k]), "previous_worker_id": before[k][0], "previous_phases": list(before[k][1])}
+                for k in before if k in after and after[k] != before[k]
+            ],
+            "released_units": len(released),
+            "replanned_units": len(retry),
+            "changed": {"workers": len(changed_workers), "tasks": len(changed_tasks), "clients": len(changes["clients"])},
+        }
+
+    def to_schedule(self) -> Schedule:
+        problem = self.problem
+        schedule = Schedule(problem, "greedy")
+        for index, placed in self.placements.items():
+            client_id = problem.client_ids[problem.units[index]["client"]]
+            for task, worker, start in placed:
+                schedule.assignments.append({
+                    "client_id": client_id,
+                    "task_id": problem.task_ids[task],
+                    "worker_id": problem.worker_ids[worker],
+                    "phases": list(range(start, start + self._duration[task])),
+                    "score": round(self.scores[index], 4),
+                })
+        for index in problem.live_units():
+            unit = problem.units[index]
+            client_id = problem.client_ids[unit["client"]]
+            known, unknown = problem.split_unit(unit)
+            for task_id in unknown:
+                schedule.unassigned.append({"client_id": client_id, "task_id": task_id, "reason": "unknown_task"})
+            if index in self.failed:
+                for task in known:
+                    schedule.unassigned.append({"client_id": client_id, "task_id": problem.task_ids[task], "reason": self.failed[index]})
+        return schedule
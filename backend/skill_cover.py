@@ -0,0 +1,126 @@
+import heapq
+from typing import List, Dict, Any, Iterable, Tuple
+
+
+def _popcount(bits: int) -> int:
+    return bin(bits).count("1")
+
+
+def _qualification(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class SkillCover:
+    """Greedy set cover that hands each missing skill to as few workers as possible.
+
+    Skills are bit positions in Python ints. A worker is a candidate for a
+    missing skill when it already holds every other skill of some task that
+    needs it, so extending it makes that task staffable. Workers are picked by
+    uncovered candidate skills, then QualificationLevel, then overlap with
+    the tasks' known skills; skills nobody is a candidate for go to the single
+    best-qualified worker.
+    """
+
+    def __init__(self, workers: List[Dict[str, Any]], worker_skills: Dict[Any, Iterable[str]],
+                 required: Iterable[Iterable[str]], missing: Iterable[str]):
+        self.missing = sorted(set(missing))
+        self.assignments: Dict[Any, List[str]] = {}
+        if not self.missing:
+            return
+
+        skill_bit: Dict[str, int] = {}
+
+        def bits_of(skills: Iterable[str]) -> int:
+            bits = 0
+            for skill in skills:
+                bits |= 1 << skill_bit.setdefault(skill, len(skill_bit))
+            return bits
+
+        missing_bits = bits_of(self.missing)  # missing skills take the low bits, in sorted order
+
+        # Tasks with the same known-skill signature share one candidate mask
+        signatures: Dict[int, int] = {}
+        for skills in required:
+            bits = bits_of(skills)
+            needed = bits & missing_bits
+            if needed:
+                known = bits & ~missing_bits
+                signatures[known] = signatures.get(known, 0) | needed
+
+        # Bucket signatures by their lowest known skill: a worker only needs to check buckets of skills it holds
+        universal = 0
+        buckets: Dict[int, List[Tuple[int, int]]] = {}
+        for known, needed in signatures.items():
+            if known:
+                buckets.setdefault((known & -known).bit_length() - 1, []).append((known, needed))
+            else:
+                universal |= needed
+
+        self._candidates: Dict[Any, Tuple[int, float, int, int]] = {}  # id -> (candidate bits, qualification, overlap, size)
+        self._order: Dict[Any, int] = {}
+        for position, worker in enumerate(workers):
+            worker_id = worker.get("WorkerID")
+            if not worker_id or worker_id in self._order:
+                continue
+            held_skills = set(worker_skills.get(worker_id, ()))
+            held = bits_of(held_skills)
+            candidate, overlap = universal, 0
+            for skill in held_skills:
+                for known, needed in buckets.get(skill_bit[skill], ()):
+                    if known & ~held == 0:
+                        candidate |= needed
+                        overlap += _popcount(known)
+            self._order[worker_id] = position
+            self._candidates[worker_id] = (candidate, _qualification(worker.get("QualificationLevel")), overlap, len(held_skills))
+
+        self._solve(missing_bits)
+
+    def _rank(self, worker_id: Any, gain: int) -> tuple:
+        _, qualification, overlap, size = self._candidates[worker_id]
+        # Fewer existing skills breaks remaining ties to limit bloat; input order keeps it deterministic
+        return (-gain, -qualification, -overlap, size, self._order[worker_id])
+
+    def _solve(self, uncovered: int):
+        # Lazy greedy: gains only shrink, so a popped entry whose gain is still current is the best pick
+        heap = []
+        for worker_id, (candidate, *_rest) in self._candidates.items():
+            gain = _popcount(candidate & uncovered)
+            if gain:
+                heap.append((self._rank(worker_id, gain), worker_id))
+        heapq.heapify(heap)
+
+        while uncovered and heap:
+            rank, worker_id = heapq.heappop(heap)
+            gain = _popcount(self._candidates[worker_id][0] & uncovered)
+            if gain != -rank[0]:
+                if gain:
+                    heapq.heappush(heap, (self._rank(worker_id, gain), worker_id))
+                continue
+            taken = self._candidates[worker_id][0] & uncovered
+            self._assign(worker_id, taken)
+            uncovered &= ~taken
+
+        if uncovered and self._candidates:
+            fallback = min(self._candidates, key=lambda w: self._rank(w, 0))
+            self._assign(fallback, uncovered)
+
+    def _assign(self, worker_id: Any, bits: int):
+        added = self.assignments.setdefault(worker_id, [])
+        for i, skill in enumerate(self.missing):
+            if bits >> i & 1:
+                added.append(skill)
+
+    def uncovered(self) -> List[str]:
+        """Missing skills that could not be placed (only when there are no workers)"""
+        assigned = {s for skills in self.assignments.values() for s in skills}
+        return [s for s in self.missing if s not in assigned]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "missing_skills": self.missing,
+            "extended_workers": {str(w): skills for w, skills in self.assignments.items()},
+            "uncovered": self.uncovered(),
+        }
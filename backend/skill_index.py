@@ -0,0 +1,159 @@
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+
+
+def normalize_skill(skill: Any) -> str:
+    """Case- and whitespace-insensitive form used for matching"""
+    return " ".join(str(skill).split()).casefold()
+
+
+def osa_distance(a: str, b: str) -> int:
+    """Optimal string alignment distance: edits plus adjacent transpositions ("Pyhton" -> "Python" is 1)"""
+    if a == b:
+        return 0
+    if not a:
+        return len(b)
+    if not b:
+        return len(a)
+    prev2: List[int] = []
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+def damerau_levenshtein(a: str, b: str) -> int:
+    """Unrestricted Damerau-Levenshtein distance. Unlike OSA it obeys the triangle inequality, and it is never larger"""
+    if a == b:
+        return 0
+    if not a or not b:
+        return len(a) or len(b)
+    infinity = len(a) + len(b)
+    # Row/column 0 hold the sentinel, row/column 1 the empty-prefix distances
+    rows = [[infinity] * (len(b) + 2), [infinity] + list(range(len(b) + 1))]
+    last_row: Dict[str, int] = {}  # character -> last row of a it appeared in
+    for i in range(1, len(a) + 1):
+        ch = a[i - 1]
+        prev = rows[i]
+        cur = [infinity, i] + [0] * len(b)
+        last_match = 0  # last column of b matching ch
+        for j in range(1, len(b) + 1):
+            k, l = last_row.get(b[j - 1], 0), last_match
+            if ch == b[j - 1]:
+                value = prev[j]
+                last_match = j
+            else:
+                value = min(prev[j], cur[j], prev[j + 1]) + 1
+            if k and l:
+                # Transpose b[l-1] and a[k-1], editing whatever lies between them
+                value = min(value, rows[k][l] + (i - k - 1) + 1 + (j - l - 1))
+            cur[j + 1] = value
+        rows.append(cur)
+        last_row[ch] = i
+    return rows[-1][-1]
+
+
+def default_tolerance(skill: str) -> int:
+    # Short names ("ML", "SQL") only match exactly after normalisation
+    if len(skill) <= 3:
+        return 0
+    if len(skill) <= 7:
+        return 1
+    return 2
+
+
+class _BKNode:
+    __slots__ = ("word", "children")
+
+    def __init__(self, word: str):
+        self.word = word
+        self.children: Dict[int, "_BKNode"] = {}
+
+
+class SkillIndex:
+    """Maps misspelled or variant skill names to the nearest known skill.
+
+    Exact matches go through a normalised-name dict; everything else is a
+    BK-tree search that only visits subtrees whose edge distance lies
+    within the tolerance of the query. The tree is built on
+    Damerau-Levenshtein distance, a metric, so that pruning never skips a
+    match; OSA is not one. Matches are then ranked by OSA distance, which
+    is never smaller, so a search of radius k finds every skill within
+    OSA distance k.
+    """
+
+    def __init__(self, skills: Iterable[str] = ()):
+        self._canonical: Dict[str, str] = {}  # normalised -> original spelling
+        self._root: Optional[_BKNode] = None
+        self._nearest_cache: Dict[Tuple[str, Optional[int]], Optional[str]] = {}  # same typo recurs across rows
+        for skill in skills:
+            self.add(skill)
+
+    def __len__(self) -> int:
+        return len(self._canonical)
+
+    def __contains__(self, skill: Any) -> bool:
+        return normalize_skill(skill) in self._canonical
+
+    def add(self, skill: str):
+        norm = normalize_skill(skill)
+        if not norm or norm in self._canonical:
+            return
+        self._canonical[norm] = str(skill).strip()
+        self._nearest_cache.clear()
+        if self._root is None:
+            self._root = _BKNode(norm)
+            return
+        node = self._root
+        while True:
+            d = damerau_levenshtein(norm, node.word)
+            child = node.children.get(d)
+            if child is None:
+                node.children[d] = _BKNode(norm)
+                return
+            node = child
+
+    def candidates(self, skill: str, max_distance: int) -> List[Tuple[int, str]]:
+        """All known skills within OSA distance max_distance, closest first"""
+        norm = normalize_skill(skill)
+        if self._root is None or not norm:
+            return []
+        found = []
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            d = damerau_levenshtein(norm, node.word)
+            if d <= max_distance:
+                distance = osa_distance(norm, node.word)
+                if distance <= max_distance:
+                    found.append((distance, self._canonical[node.word]))
+            for edge, child in node.children.items():
+                if d - max_distance <= edge <= d + max_distance:
+                    stack.append(child)
+        return sorted(found)
+
+    def nearest(self, skill: str, max_distance: Optional[int] = None) -> Optional[str]:
+        """Closest known skill, or None if nothing is close enough or the best match is ambiguous"""
+        norm = normalize_skill(skill)
+        if norm in self._canonical:
+            return self._canonical[norm]
+        key = (norm, max_distance)
+        if key not in self._nearest_cache:
+            self._nearest_cache[key] = self._search(norm, max_distance)
+        return self._nearest_cache[key]
+
+    def _search(self, norm: str, max_distance: Optional[int]) -> Optional[str]:
+        tolerance = default_tolerance(norm) if max_distance is None else max_distance
+        if tolerance <= 0:
+            return None
+        found = self.candidates(norm, tolerance)
+        if not found:
+            return None
+        if len(found) > 1 and found[0][0] == found[1][0]:
+            return None
+        return found[0][1]
@@ -0,0 +1,64 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from admission import AdmissionRejected
+from backend import DataManager
+
+
+class RerankAgent:
+    """Stands in for the model; only rerank requests reach it"""
+
+    def __init__(self):
+        self.calls = 0
+
+    def chat_completion(self, system_prompt, user_prompt, fingerprint=None):
+        self.calls += 1
+        return "[]"
+
+
+@pytest.fixture
+def busy_server(monkeypatch):
+    """A server whose admission control rejects every request for a slot"""
+    async def reject(session=None):
+        raise AdmissionRejected("busy", 5)
+
+    dm = DataManager()
+    dm.gpt_agent = dm.validator.gpt_agent = RerankAgent()
+    dm.clients = [{"ClientID": f"C{i}", "ClientName": f"Acme branch {i}", "PriorityLevel": 3} for i in range(5)]
+    dm.mark_data_changed()
+    monkeypatch.setattr(main, "global_data_manager", dm)
+    monkeypatch.setattr(main.admission, "acquire", reject)
+    return TestClient(main.app), dm
+
+
+def test_local_search_and_similar_skip_admission(busy_server):
+    client, dm = busy_server
+    response = client.post("/nl_search", data={"query": "acme", "mode": "local"})
+    assert response.status_code == 200 and response.json()["results"]["clients"]
+
+    assert client.get("/similar", params={"entity": "client", "id": "C1"}).status_code == 200
+    assert client.get("/similar", params={"entity": "client", "query": "acme"}).status_code == 200
+    assert client.get("/similar", params={"entity": "client", "id": "C1", "rerank": True}).status_code == 200
+
+    stream = client.post("/nl_search/stream", data={"query": "acme", "mode": "local"})
+    assert stream.status_code == 200 and "event: record" in stream.text
+    assert dm.gpt_agent.calls == 0
+
+
+def test_model_calls_still_need_a_slot(busy_server):
+    client, dm = busy_server
+    assert client.post("/nl_search", data={"query": "acme", "mode": "local", "rerank": True}).status_code == 429
+    assert client.get("/similar", params={"entity": "client", "query": "acme", "rerank": True}).status_code == 429
+    assert client.post("/nl_search/stream", data={"query": "acme", "mode": "planner"}).status_code == 429
+    assert dm.gpt_agent.calls == 0
+    assert client.post("/ai_rule_recommendations", json={}).status_code == 429
+    assert client.post("/ai_rule_recommendations/stream", json={}).status_code == 429
+
+
+def test_recommendations_without_a_model_skip_admission(busy_server):
+    client, dm = busy_server
+    dm.gpt_agent = dm.validator.gpt_agent = None
+    response = client.post("/ai_rule_recommendations", json={})
+    assert response.status_code == 200 and response.json()["rules"] == []
+    assert client.post("/ai_rule_recommendations/stream", json={}).status_code == 200
@@ -0,0 +1,53 @@
+import threading
+
+import llm_cache
+from ai_validation import BatchValidator
+from llm_cache import ResponseCache, bypass_cache
+
+
+class EchoAgent:
+    """Answers every row as valid and records whether each call saw the cache bypass"""
+
+    class settings:
+        max_in_flight = 4
+
+    model_name = "test"
+
+    def __init__(self):
+        self.bypassed = []
+        self.lock = threading.Lock()
+
+    def chat_completion(self, system_prompt, user_prompt):
+        numbers = [line.split("\t")[0] for line in user_prompt.splitlines() if "\t" in line]
+        with self.lock:
+            self.bypassed.append(llm_cache._bypass.get())
+        return "[" + ",".join(f'{{"n": {n}, "valid": true}}' for n in numbers) + "]"
+
+
+def _rows(count):
+    return [{"ClientID": f"C{i}", "ClientName": f"Client {i}", "PriorityLevel": i % 5 + 1} for i in range(count)]
+
+
+def test_batches_inherit_the_callers_cache_bypass():
+    agent = EchoAgent()
+    validator = BatchValidator(agent, cache=ResponseCache(), max_rows=2)
+    with bypass_cache():
+        run = validator.validate(_rows(10))
+    assert run["requests"] == 5
+    assert agent.bypassed == [True] * 5
+
+    agent.bypassed.clear()
+    BatchValidator(agent, cache=ResponseCache(), max_rows=2).validate(_rows(4))
+    assert agent.bypassed == [False] * 2
+
+
+def test_verdicts_come_back_in_row_order_and_are_cached():
+    agent = EchoAgent()
+    cache = ResponseCache()
+    rows = _rows(7)
+    first = BatchValidator(agent, cache=cache, max_rows=3).validate(rows)
+    assert [v["valid"] for v in first["verdicts"]] == [True] * 7
+    assert {v["source"] for v in first["verdicts"]} == {"model"}
+
+    second = BatchValidator(agent, cache=cache, max_rows=3).validate(rows)
+    assert second["requests"] == 0 and second["cached"] == 7
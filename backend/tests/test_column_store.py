@@ -0,0 +1,8 @@
+from column_store import ColumnStore, compile_condition
+
+
+def test_missing_values_never_match():
+    rows = [{"ClientID": "C1", "GroupTag": "alpha"}, {"ClientID": "C2", "GroupTag": None}, {"ClientID": "C3"}]
+    store = ColumnStore(rows, "ClientID")
+    for op, value, first in (("contains", "a", True), ("contains", "n", False), ("!=", "beta", True), (">=", 0, False)):
+        assert compile_condition({"GroupTag": {op: value}})(store).tolist() == [first, False, False], (op, value)
@@ -0,0 +1,35 @@
+from backend import DataManager
+
+
+def _task(task_id):
+    return {"TaskID": task_id, "TaskName": task_id, "Category": "c", "Duration": 1, "RequiredSkills": "a",
+            "PreferredPhases": "[1]", "MaxConcurrent": 1}
+
+
+def _corun(task_ids, active=True):
+    return {"id": "r1", "type": "coRun", "parameters": {"task_ids": task_ids}, "isActive": active}
+
+
+def test_corun_components_follow_edited_and_deactivated_rules():
+    dm = DataManager()
+    dm.tasks = [_task(f"T{i}") for i in range(5)]
+    dm.mark_data_changed()
+
+    dm.apply_rules_to_data([_corun(["T0", "T1"])])
+    assert dm.get_corun_components() == [["T0", "T1"]]
+    dm.apply_rules_to_data([_corun(["T2", "T3"])])
+    assert dm.get_corun_components() == [["T2", "T3"]]
+    dm.apply_rules_to_data([_corun(["T2", "T3"], active=False)])
+    assert dm.get_corun_components() == []
+
+
+def test_corun_components_drop_removed_tasks():
+    dm = DataManager()
+    dm.tasks = [_task(f"T{i}") for i in range(3)]
+    dm.mark_data_changed()
+    dm.apply_rules_to_data([_corun(["T0", "T1", "T2"])])
+    assert dm.get_corun_components() == [["T0", "T1", "T2"]]
+
+    dm.tasks = [t for t in dm.tasks if t["TaskID"] != "T1"]
+    dm.mark_data_changed()
+    assert dm.get_corun_components() == [["T0", "T2"]]
@@ -0,0 +1,79 @@
+import random
+
+from backend import AIDataValidator
+from client_scores import ClientScorer
+from join_view import EligibilityJoin
+from scheduler import SchedulingProblem
+
+SKILLS = ["a", "b", "c", "d"]
+
+
+def _worker(worker_id, skills):
+    return {"WorkerID": worker_id, "WorkerName": worker_id, "Skills": skills, "AvailableSlots": "[1,2]",
+            "MaxLoadPerPhase": 1, "WorkerGroup": "g", "QualificationLevel": 1}
+
+
+def _task(task_id, required, max_concurrent=1):
+    return {"TaskID": task_id, "TaskName": task_id, "Category": "c", "Duration": 1, "RequiredSkills": required,
+            "PreferredPhases": "[1]", "MaxConcurrent": max_concurrent}
+
+
+def _client(client_id, requested):
+    return {"ClientID": client_id, "ClientName": client_id, "PriorityLevel": 3, "RequestedTaskIDs": requested,
+            "GroupTag": "g", "AttributesJSON": "{}"}
+
+
+def _dataset(seed):
+    rng = random.Random(seed)
+    workers = [_worker(f"W{i}", ",".join(rng.sample(SKILLS, rng.randint(0, 3)))) for i in range(8)]
+    tasks = [_task(f"T{i}", ",".join(rng.sample(SKILLS, rng.randint(0, 2))), rng.randint(0, 4)) for i in range(10)]
+    clients = [_client(f"C{i}", ",".join(f"T{rng.randrange(12)}" for _ in range(3))) for i in range(5)]
+    return clients, workers, tasks
+
+
+def _brute_force(workers, task):
+    required = {s.strip() for s in task["RequiredSkills"].split(",") if s.strip()}
+    return [w["WorkerID"] for w in workers if required <= {s.strip() for s in w["Skills"].split(",")}]
+
+
+def test_join_matches_brute_force_after_updates():
+    for seed in range(10):
+        clients, workers, tasks = _dataset(seed)
+        join = EligibilityJoin(clients, workers, tasks)
+        workers[1]["Skills"] = "a,b,c,d"
+        tasks[2]["RequiredSkills"] = "d"
+        join.update(clients, workers, tasks)
+        for task in tasks:
+            assert join.workers_for_task(task["TaskID"]) == _brute_force(workers, task)
+
+
+def test_scheduler_and_scorer_read_the_shared_join():
+    clients, workers, tasks = _dataset(3)
+    join = EligibilityJoin(clients, workers, tasks)
+    problem = SchedulingProblem(clients, workers, tasks, join=join)
+    scorer = ClientScorer(clients, workers, tasks, join=join)
+    assert problem.eligibility is join and scorer.eligibility is join
+
+    workers[0]["Skills"] = "a,b,c,d"
+    problem.update(clients, workers, tasks)
+    for pos, task in enumerate(tasks):
+        assert [problem.worker_ids[w] for w in problem.qualified(pos)] == _brute_force(workers, task)
+
+    scorer.update(clients, workers, tasks)
+    fresh = ClientScorer(clients, workers, tasks)
+    assert scorer.task_capacity.tolist() == fresh.task_capacity.tolist()
+
+
+def test_max_concurrent_keeps_rescan_semantics_for_blank_required_skills():
+    workers = [_worker("W1", "a"), _worker("W2", "a,b")]
+    tasks = [_task("T1", "", 1), _task("T2", "a", 2), _task("T3", "a,,b", 1)]
+    clients = [_client("C1", "T1")]
+    data = clients + workers + tasks
+    validator = AIDataValidator()
+
+    def infeasible(join):
+        return {e.details["task"] for e in validator.validate_data(data, [], join) if e.error_type == "concurrency_infeasible"}
+
+    # A blank RequiredSkills entry is a skill no worker holds, with or without the join
+    assert infeasible(None) == {"T1", "T3"}
+    assert infeasible(EligibilityJoin(clients, workers, tasks)) == {"T1", "T3"}
@@ -0,0 +1,52 @@
+import json
+import random
+
+from json_stream import JSONStream
+
+ROWS = [{"ClientID": "C1", "note": "has [brackets], {braces} and \"quotes\""}, 2, "three, four", None, [5, {"six": 6}],
+        True, -7.5]
+
+ARRAY_OUTPUTS = [
+    json.dumps(ROWS),
+    "Here are the rows:\n```json\n" + json.dumps(ROWS, indent=2) + "\n```\nDone.",
+    "Results [see below]: " + json.dumps(ROWS),
+    "[note: matches are listed] then " + json.dumps(ROWS) + " [end]",
+    "[{broken}] " + json.dumps(ROWS),
+]
+
+
+def _feed_in_chunks(parser, text, rng):
+    values = []
+    pos = 0
+    while pos < len(text):
+        size = rng.randint(1, 8)
+        values.extend(parser.feed(text[pos:pos + size]))
+        pos += size
+    return values
+
+
+def test_array_elements_survive_any_chunking():
+    rng = random.Random(0)
+    for text in ARRAY_OUTPUTS:
+        for _ in range(50):
+            parser = JSONStream("array")
+            assert _feed_in_chunks(parser, text, rng) == ROWS, text
+            assert parser.errors == 0 and parser.done
+
+
+def test_bracketed_prose_is_not_taken_for_the_array():
+    assert JSONStream("array").feed('Results [see below]: [{"a":1}]') == [{"a": 1}]
+
+
+def test_bad_elements_after_the_first_are_counted():
+    parser = JSONStream("array")
+    assert parser.feed('[1, oops, {"a": 2}]') == [1, {"a": 2}]
+    assert parser.errors == 1
+
+
+def test_object_mode_skips_prose_braces():
+    rng = random.Random(1)
+    text = 'Use {field} placeholders. ```json\n{"rule": {"type": "coRun", "tasks": ["T1", "T2"]}}\n``` trailing {}'
+    for _ in range(50):
+        parser = JSONStream("object")
+        assert _feed_in_chunks(parser, text, rng) == [{"rule": {"type": "coRun", "tasks": ["T1", "T2"]}}]
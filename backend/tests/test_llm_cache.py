@@ -0,0 +1,128 @@
+import threading
+import time
+
+import pytest
+
+import llm_cache
+from llm_cache import ResponseCache, SingleFlight, bypass_cache
+
+
+class Clock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(llm_cache.time, "time", clock)
+    return clock
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResponseCache(ttl=60)
+    cache.put("k", "v")
+    clock.now += 60
+    assert cache.get("k") == "v"
+    clock.now += 1
+    assert cache.get("k") is None
+    assert cache.stats["expired"] == 1 and cache.summary()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    cache = ResponseCache(max_entries=2)
+    cache.put("a", "1")
+    cache.put("b", "2")
+    assert cache.get("a") == "1"  # b is now the oldest
+    cache.put("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1" and cache.get("c") == "3"
+    assert cache.stats["evictions"] == 1
+
+
+def test_disk_tier_survives_restart_and_is_trimmed(clock, tmp_path):
+    path = str(tmp_path / "cache" / "llm.sqlite3")
+    cache = ResponseCache(max_entries=1, ttl=60, path=path, max_disk_entries=2)
+    for key in "abc":
+        cache.put(key, key.upper())
+        clock.now += 1
+    assert cache._db.execute("SELECT key FROM responses ORDER BY key").fetchall() == [("b",), ("c",)]
+
+    reopened = ResponseCache(ttl=60, path=path, max_disk_entries=2)
+    assert reopened.get("a") is None
+    assert reopened.get("b") == "B" and reopened.stats["disk_hits"] == 1
+    assert reopened.get("b") == "B" and reopened.stats["hits"] == 1
+
+    # Expired rows are not served and are dropped on the next store
+    clock.now += 60
+    assert ResponseCache(ttl=60, path=path).get("c") is None
+    reopened.put("d", "D")
+    assert reopened._db.execute("SELECT key FROM responses").fetchall() == [("d",)]
+
+
+def test_bypass_skips_lookup_but_refreshes_the_entry(clock):
+    cache = ResponseCache()
+    cache.put("k", "old")
+    with bypass_cache():
+        assert cache.get("k") is None
+        cache.put("k", "new")
+        with bypass_cache(False):
+            assert cache.get("k") == "new"
+    assert cache.get("k") == "new"
+    assert cache.stats["bypassed"] == 1 and cache.stats["misses"] == 0
+
+
+def _run_concurrently(flights, key, fn, callers):
+    """Start a leader, then callers that arrive while it runs; returns each caller's outcome"""
+    started, release = threading.Event(), threading.Event()
+    outcomes = [None] * (callers + 1)
+
+    def leader_fn():
+        started.set()
+        release.wait(5)
+        return fn()
+
+    def call(i, f):
+        try:
+            outcomes[i] = ("ok", flights.do(key, f))
+        except Exception as e:
+            outcomes[i] = ("error", e)
+
+    threads = [threading.Thread(target=call, args=(0, leader_fn))]
+    threads[0].start()
+    started.wait(5)
+    for i in range(1, callers + 1):
+        threads.append(threading.Thread(target=call, args=(i, lambda: pytest.fail("follower ran fn"))))
+        threads[-1].start()
+    while flights.summary()["coalesced"] < callers:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return outcomes
+
+
+def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    outcomes = _run_concurrently(flights, "k", lambda: "answer", callers=3)
+    assert outcomes == [("ok", "answer")] * 4
+    assert flights.summary() == {"calls": 1, "coalesced": 3, "in_flight": 0}
+
+    # Nothing is remembered once the call returns
+    assert flights.do("k", lambda: "again") == "again"
+
+
+def test_leader_error_reaches_every_waiter():
+    flights = SingleFlight()
+    error = RuntimeError("model down")
+
+    def fail():
+        raise error
+
+    outcomes = _run_concurrently(flights, "k", fail, callers=2)
+    assert outcomes == [("error", error)] * 3
+    assert flights.summary()["in_flight"] == 0
+    assert flights.do("k", lambda: "recovered") == "recovered"
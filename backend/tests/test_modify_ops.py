@@ -0,0 +1,126 @@
+import random
+
+from auto_fix import apply_patch
+from backend import DataManager
+from column_store import ColumnStore
+from modify_ops import plan_ops, validate_ops
+
+SKILLS = ["a", "b", "c", "d"]
+# Checks validate_touched leaves to a full validation pass
+DATASET_WIDE = {"duplicate_id", "circular_dependency", "phase_saturation"}
+
+
+def _worker(worker_id, skills):
+    return {"WorkerID": worker_id, "WorkerName": worker_id, "Skills": skills, "AvailableSlots": "[1,2]",
+            "MaxLoadPerPhase": 1, "WorkerGroup": "g", "QualificationLevel": 1}
+
+
+def _task(task_id, required, max_concurrent=1, phases="[1]"):
+    return {"TaskID": task_id, "TaskName": task_id, "Category": "c", "Duration": 1, "RequiredSkills": required,
+            "PreferredPhases": phases, "MaxConcurrent": max_concurrent}
+
+
+def _client(client_id, requested, priority=3):
+    return {"ClientID": client_id, "ClientName": client_id, "PriorityLevel": priority, "RequestedTaskIDs": requested,
+            "GroupTag": "g", "AttributesJSON": "{}"}
+
+
+def _stores(clients, workers, tasks):
+    return {"client": ColumnStore(clients, "ClientID"), "worker": ColumnStore(workers, "WorkerID"),
+            "task": ColumnStore(tasks, "TaskID")}
+
+
+def test_plan_ops_last_assignment_wins_and_skips_no_ops():
+    clients = [_client("C1", "T1", 1), _client("C2", "T1", 5), _client("C3", "T1", 2)]
+    operations = validate_ops([
+        {"entity": "client", "where": [{"field": "PriorityLevel", "op": "<", "value": 3}], "set": {"PriorityLevel": "4"}},
+        {"entity": "client", "where": [{"field": "ClientID", "op": "==", "value": "C3"}], "set": {"PriorityLevel": 5}},
+        {"entity": "client", "where": [], "set": {"GroupTag": "g"}},
+    ])
+    patch, summary = plan_ops(operations, _stores(clients, [], []))
+
+    assert [(op["id"], op["old"], op["value"]) for op in patch] == [("C1", 1, 4), ("C3", 2, 5)]
+    assert [(s["matched"], s["changes"]) for s in summary] == [(2, 2), (1, 1), (3, 0)]
+    assert clients[0]["PriorityLevel"] == 1  # planning never mutates
+
+    result = apply_patch({"clients": clients}, patch)
+    assert result["applied"] == 2
+    assert [c["PriorityLevel"] for c in clients] == [4, 5, 5]
+
+
+def test_validate_ops_rejects_id_edits_and_unknown_fields():
+    for payload in ([{"entity": "task", "where": [], "set": {"TaskID": "T9"}}],
+                    [{"entity": "task", "where": [], "set": {"Colour": "red"}}],
+                    [{"entity": "task", "where": [], "set": {}}]):
+        try:
+            validate_ops(payload)
+        except ValueError:
+            continue
+        raise AssertionError(f"accepted {payload}")
+
+
+def _dataset(rng):
+    workers = [_worker(f"W{i}", ",".join(rng.sample(SKILLS, rng.randint(1, 3)))) for i in range(6)]
+    tasks = [_task(f"T{i}", ",".join(rng.sample(SKILLS, rng.randint(1, 2))), rng.randint(0, 4),
+                   rng.choice(["[1]", "[2]", "[1,2]"])) for i in range(8)]
+    clients = [_client(f"C{i}", ",".join(f"T{rng.randrange(10)}" for _ in range(2))) for i in range(5)]
+    # A row missing a required column, which an edit may fill in
+    del tasks[rng.randrange(len(tasks))]["MaxConcurrent"]
+    return clients, workers, tasks
+
+
+def _random_operation(rng, clients, workers, tasks):
+    entity = rng.choice(["client", "worker", "task"])
+    rows, id_field = {"client": (clients, "ClientID"), "worker": (workers, "WorkerID"), "task": (tasks, "TaskID")}[entity]
+    assignment = {
+        "client": lambda: rng.choice([("PriorityLevel", rng.randint(0, 6)),
+                                      ("RequestedTaskIDs", f"T{rng.randrange(10)},T{rng.randrange(10)}")]),
+        "worker": lambda: rng.choice([("Skills", ",".join(rng.sample(SKILLS, rng.randint(1, 3)))),
+                                      ("MaxLoadPerPhase", rng.randint(0, 4))]),
+        "task": lambda: rng.choice([("RequiredSkills", rng.choice(SKILLS)), ("MaxConcurrent", rng.randint(0, 5)),
+                                    ("PreferredPhases", rng.choice(["[1]", "[2]"]))]),
+    }[entity]()
+    return {"entity": entity, "where": [{"field": id_field, "op": "==", "value": rng.choice(rows)[id_field]}],
+            "set": dict([assignment])}
+
+
+def _findings(errors):
+    return {(e["error_type"], e["message"]) for e in errors}
+
+
+def test_modify_revalidation_reports_what_the_edit_broke():
+    for seed in range(40):
+        rng = random.Random(seed)
+        dm = DataManager()
+        dm.clients, dm.workers, dm.tasks = _dataset(rng)
+        dm.corun_groups.union("T0", "T1")
+        dm.mark_data_changed()
+        before = _findings(e.to_dict() for e in dm.validate_all())
+
+        operations = validate_ops([_random_operation(rng, dm.clients, dm.workers, dm.tasks) for _ in range(3)])
+        result = dm._plan_modify("edit", operations, dry_run=False)
+        after = _findings(e.to_dict() for e in dm.validate_all())
+        reported = _findings(result.get("validation_errors", []))
+
+        assert reported <= after
+        assert {f for f in after - before if f[0] not in DATASET_WIDE} <= reported
+
+
+def test_committing_a_dry_run_patch_revalidates_the_touched_rows():
+    dm = DataManager()
+    dm.clients = [_client("C1", "T1"), _client("C2", "T1")]
+    dm.workers = [_worker("W1", "a")]
+    dm.tasks = [_task("T1", "a")]
+    dm.mark_data_changed()
+    operations = validate_ops([{"entity": "client", "where": [{"field": "ClientID", "op": "==", "value": "C1"}],
+                                "set": {"RequestedTaskIDs": "T1,T9"}}])
+    preview = dm._plan_modify("edit", operations, dry_run=True)
+    assert dm.clients[0]["RequestedTaskIDs"] == "T1"
+
+    result = dm.apply_fix_patch(preview["patch"], base_version=preview["base_version"])
+    assert result["applied"] == 1
+    assert [e["error_type"] for e in result["validation_errors"]] == ["unknown_reference"]
+
+    # Row removals shift what the touched rows are, so only field edits are revalidated
+    removal = dm.apply_fix_patch([{"op": "remove", "path": "/clients/1", "id": "C2"}])
+    assert removal["applied"] == 1 and "validation_errors" not in removal
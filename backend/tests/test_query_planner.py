@@ -0,0 +1,107 @@
+import math
+import random
+
+import pytest
+
+from backend import DataManager
+from column_store import ColumnStore
+from query_planner import MAX_LIMIT, execute_spec, validate_spec
+
+GROUPS = ["alpha", "beta", "gamma", None]
+
+
+def _clients(seed, count=60):
+    rng = random.Random(seed)
+    return [{"ClientID": f"C{i:02d}", "ClientName": f"Client {i}", "GroupTag": rng.choice(GROUPS),
+             "PriorityLevel": rng.choice([1, 2, 3, 4, 5, None, "high"]), "RequestedTaskIDs": "T1",
+             "AttributesJSON": "{}"} for i in range(count)]
+
+
+def _number(value):
+    return value if isinstance(value, (int, float)) and not isinstance(value, bool) else math.nan
+
+
+def _reference(rows, spec):
+    """execute_spec spelled out row by row"""
+    def matches(row, item):
+        value, target = row.get(item["field"]), item["value"]
+        if item["op"] == "==":
+            return value == target
+        if item["op"] == "!=":
+            return value is not None and value != target
+        if item["op"] == "contains":
+            return value is not None and str(target) in str(value)
+        number = _number(value)
+        return not math.isnan(number) and {">=": number >= target, "<=": number <= target,
+                                           ">": number > target, "<": number < target}[item["op"]]
+
+    positions = [i for i, row in enumerate(rows) if all(matches(row, item) for item in spec["filters"])]
+    for item in reversed(spec["sort"]):
+        sign = -1 if item["order"] == "desc" else 1
+        values = [rows[i].get(item["field"]) for i in positions]
+        if all(math.isnan(_number(v)) for v in values):
+            ranks = {v: r for r, v in enumerate(sorted({str(v) for v in values if v is not None}))}
+            key = {i: (v is None, sign * ranks[str(v)] if v is not None else 0) for i, v in zip(positions, values)}
+        else:
+            key = {i: (math.isnan(_number(v)), sign * _number(v) if not math.isnan(_number(v)) else 0)
+                   for i, v in zip(positions, values)}
+        positions.sort(key=key.get)  # stable, like np.lexsort
+    return positions[:spec["limit"]]
+
+
+def test_validate_spec_canonical_form():
+    spec = validate_spec({"entity": "Clients", "filters": [{"field": "PriorityLevel", "op": ">=", "value": "4"},
+                                                           {"field": "GroupTag", "value": "alpha"}],
+                          "sort": ["ClientName", {"field": "PriorityLevel", "order": "DESC"}], "limit": 10 ** 6})
+    assert spec == {"entity": "client",
+                    "filters": [{"field": "PriorityLevel", "op": ">=", "value": 4},
+                                {"field": "GroupTag", "op": "==", "value": "alpha"}],
+                    "sort": [{"field": "ClientName", "order": "asc"}, {"field": "PriorityLevel", "order": "desc"}],
+                    "limit": MAX_LIMIT}
+
+
+@pytest.mark.parametrize("spec", [
+    [],
+    {"entity": "project"},
+    {"entity": "client", "filters": [{"field": "Salary", "op": "==", "value": 1}]},
+    {"entity": "client", "filters": [{"field": "GroupTag", "op": "~", "value": "a"}]},
+    {"entity": "client", "filters": [{"field": "GroupTag", "op": "==", "value": ["a"]}]},
+    {"entity": "client", "sort": [{"field": "GroupTag", "order": "up"}]},
+    {"entity": "client", "limit": "ten"},
+])
+def test_validate_spec_rejects(spec):
+    with pytest.raises(ValueError):
+        validate_spec(spec)
+
+
+def test_execute_spec_matches_row_by_row_evaluation():
+    rng = random.Random(0)
+    for seed in range(30):
+        rows = _clients(seed)
+        store = ColumnStore(rows, "ClientID")
+        filters = [rng.choice([
+            {"field": "PriorityLevel", "op": rng.choice([">=", "<=", ">", "<"]), "value": rng.randint(1, 5)},
+            {"field": "PriorityLevel", "op": rng.choice(["==", "!="]), "value": rng.randint(1, 5)},
+            {"field": "GroupTag", "op": rng.choice(["==", "!="]), "value": rng.choice(GROUPS[:3])},
+            {"field": "GroupTag", "op": "contains", "value": "a"},
+        ]) for _ in range(rng.randint(0, 2))]
+        sort = [{"field": rng.choice(["PriorityLevel", "GroupTag", "ClientID"]), "order": rng.choice(["asc", "desc"])}
+                for _ in range(rng.randint(0, 2))]
+        spec = validate_spec({"entity": "client", "filters": filters, "sort": sort, "limit": rng.randint(1, 70)})
+        assert execute_spec(spec, store).tolist() == _reference(rows, spec), spec
+
+
+def test_spec_results_are_cached_per_data_version():
+    dm = DataManager()
+    dm.clients = _clients(1)
+    dm.mark_data_changed()
+    spec = validate_spec({"entity": "client", "filters": [{"field": "GroupTag", "op": "==", "value": "alpha"}],
+                          "limit": 100})
+    rows, cached = dm._run_spec(spec)
+    assert not cached and rows and all(row["GroupTag"] == "alpha" for row in rows)
+    assert dm._run_spec(spec) == (rows, True)
+
+    dm.clients[0]["GroupTag"] = "alpha"
+    dm.mark_data_changed()
+    fresh, cached = dm._run_spec(spec)
+    assert not cached and fresh[0]["ClientID"] == "C00"
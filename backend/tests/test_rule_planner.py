@@ -0,0 +1,72 @@
+from backend import DataManager
+from rule_planner import RulePlan
+
+
+def _client(client_id, priority, group="std"):
+    return {"ClientID": client_id, "ClientName": client_id, "PriorityLevel": priority, "RequestedTaskIDs": "T1",
+            "GroupTag": group, "AttributesJSON": "{}"}
+
+
+def _boost(rule_id, condition, value=1):
+    return {"id": rule_id, "type": "priorityRule", "isActive": True,
+            "parameters": {"condition": {"entity_type": "client", **condition},
+                           "action": {"type": "boost_priority", "value": value}}}
+
+
+def _manager(*clients):
+    dm = DataManager()
+    dm.clients = list(clients)
+    dm.mark_data_changed()
+    return dm
+
+
+def test_dependent_rule_reruns_after_an_upstream_write():
+    # "a" boosts VIPs (reads GroupTag), "b" tags high-priority clients as VIP (reads PriorityLevel)
+    tag = {"id": "b", "type": "patternMatch", "isActive": True,
+           "parameters": {"pattern": {"PriorityLevel": {">=": 4}},
+                          "action": {"type": "set_attribute", "attribute": "GroupTag", "value": "vip"}}}
+    boost = _boost("a", {"GroupTag": "vip"})
+    plan = RulePlan([tag, boost])
+    assert plan.describe()["edges"] == [["a", "b"], ["b", "a"]] and plan.cycles() == [["a", "b"]]
+
+    dm = _manager(_client("C1", 4), _client("C2", 2))
+    outcome = dm.apply_rules_to_data([tag, boost])
+    runs = {r["rule_id"]: r["runs"] for r in outcome["results"]}
+    # a ran before b tagged C1, then once more because of that write
+    assert runs == {"a": 2, "b": 2} and outcome["converged"]
+    assert [(c["GroupTag"], c["PriorityLevel"]) for c in dm.clients] == [("vip", 5), ("std", 2)]
+
+
+def test_boost_cycle_converges_without_double_applying():
+    first, second = _boost("boost-1", {"GroupTag": "std"}), _boost("boost-2", {"GroupTag": "std"})
+    assert RulePlan([first, second]).cycles() == [["boost-1", "boost-2"]]
+
+    dm = _manager(_client("C1", 1), _client("C2", 2))
+    outcome = dm.apply_rules_to_data([first, second])
+    assert outcome["converged"] and outcome["executions"] <= 4
+    assert [c["PriorityLevel"] for c in dm.clients] == [3, 4]
+
+    dm.apply_rules_to_data([first, second])
+    assert [c["PriorityLevel"] for c in dm.clients] == [3, 4]
+
+
+def test_editing_a_rule_lets_it_apply_again():
+    dm = _manager(_client("C1", 3))
+    dm.apply_rules_to_data([_boost("r", {"GroupTag": "std"}, value=1)])
+    dm.apply_rules_to_data([_boost("r", {"GroupTag": "std"}, value=1)])
+    assert dm.clients[0]["PriorityLevel"] == 4
+
+    dm.apply_rules_to_data([_boost("r", {"GroupTag": "std"}, value=2)])
+    assert dm.clients[0]["PriorityLevel"] == 6
+
+
+def test_rerun_budget_stops_a_rule_that_never_settles():
+    calls = []
+
+    def apply_fn(rule):
+        calls.append(rule["id"])
+        return {"applied": True, "changes_made": 1}
+
+    outcome = RulePlan([_boost("x", {}), _boost("y", {})]).execute(apply_fn, max_runs_per_rule=3)
+    assert not outcome["converged"]
+    assert calls.count("x") == 3 and calls.count("y") == 3
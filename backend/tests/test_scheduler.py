@@ -0,0 +1,130 @@
+import random
+from collections import Counter
+
+import pytest
+
+from milp_scheduler import solver_limits
+from scheduler import GreedyScheduler, SchedulingProblem
+
+SKILLS = ["a", "b", "c", "d"]
+
+
+def _dataset(seed, workers=8, tasks=10, clients=8):
+    rng = random.Random(seed)
+    worker_rows = [{"WorkerID": f"W{i}", "Skills": ",".join(rng.sample(SKILLS, rng.randint(1, 3))),
+                    "AvailableSlots": str(sorted(rng.sample(range(1, 6), rng.randint(1, 4)))),
+                    "MaxLoadPerPhase": rng.randint(0, 2), "QualificationLevel": rng.randint(1, 5),
+                    "WorkerGroup": rng.choice(["g1", "g2"])} for i in range(workers)]
+    task_rows = [{"TaskID": f"T{i}", "RequiredSkills": ",".join(rng.sample(SKILLS, rng.randint(1, 2))),
+                  "Duration": rng.randint(1, 2), "PreferredPhases": rng.choice(["[1,2]", "2-4", "[3]", ""]),
+                  "MaxConcurrent": rng.randint(1, 2)} for i in range(tasks)]
+    client_rows = [{"ClientID": f"C{i}", "PriorityLevel": rng.randint(1, 5),
+                    "RequestedTaskIDs": ",".join(f"T{rng.randrange(tasks + 1)}" for _ in range(rng.randint(1, 4)))}
+                   for i in range(clients)]
+    return client_rows, worker_rows, task_rows
+
+
+def _phases(value):
+    value = str(value).strip("[] ")
+    if "-" in value:
+        low, high = value.split("-")
+        return set(range(int(low), int(high) + 1))
+    return {int(p) for p in value.split(",") if p.strip()}
+
+
+def _skills(value):
+    return {s.strip() for s in value.split(",") if s.strip()}
+
+
+def assert_feasible(schedule, clients, workers, tasks, corun_components=(), windows=None):
+    """Check a schedule against the raw rows, independently of the scheduler's arrays"""
+    workers = {w["WorkerID"]: w for w in workers}
+    tasks = {t["TaskID"]: t for t in tasks}
+    requested = {(c["ClientID"], t) for c in clients for t in _skills(c["RequestedTaskIDs"])}
+    assigned = [(a["client_id"], a["task_id"]) for a in schedule.assignments]
+    unassigned = [(u["client_id"], u["task_id"]) for u in schedule.unassigned]
+    assert len(set(assigned)) == len(assigned)
+    assert set(assigned) | set(unassigned) == requested and not set(assigned) & set(unassigned)
+
+    worker_load, task_load, starts = Counter(), Counter(), {}
+    for a in schedule.assignments:
+        worker, task, phases = workers[a["worker_id"]], tasks[a["task_id"]], a["phases"]
+        assert _skills(task["RequiredSkills"]) <= _skills(worker["Skills"])
+        assert phases == list(range(phases[0], phases[0] + int(task["Duration"])))
+        assert set(phases) <= _phases(worker["AvailableSlots"])
+        preferred = _phases(task["PreferredPhases"])
+        assert not preferred or phases[0] in preferred
+        assert windows is None or a["task_id"] not in windows or phases[0] in windows[a["task_id"]]
+        for phase in phases:
+            worker_load[a["worker_id"], phase] += 1
+            task_load[a["task_id"], phase] += 1
+        starts[a["client_id"], a["task_id"]] = phases[0]
+    assert all(n <= int(workers[w]["MaxLoadPerPhase"]) for (w, _), n in worker_load.items())
+    assert all(n <= int(tasks[t]["MaxConcurrent"]) for (t, _), n in task_load.items())
+
+    # A client's requested members of a co-run component start together, or none of them is placed
+    for component in corun_components:
+        for client in clients:
+            members = [t for t in component if (client["ClientID"], t) in requested and t in tasks]
+            placed = {starts.get((client["ClientID"], t)) for t in members}
+            assert len(placed) <= 1 or (None not in placed and len(placed) == 1)
+
+
+def test_greedy_schedules_are_feasible():
+    for seed in range(25):
+        clients, workers, tasks = _dataset(seed)
+        components = [["T0", "T1"], ["T2", "T3", "T4"]]
+        rules = [{"id": "w", "type": "phaseWindow", "parameters": {"task_id": "T5", "allowed_phases": [2, 3]}}]
+        schedule = GreedyScheduler(SchedulingProblem(clients, workers, tasks, rules, components)).run()
+        assert_feasible(schedule, clients, workers, tasks, components, {"T5": {2, 3}})
+
+
+def test_repaired_schedules_stay_feasible():
+    for seed in range(25):
+        rng = random.Random(seed)
+        clients, workers, tasks = _dataset(seed)
+        components = [["T0", "T1"]]
+        problem = SchedulingProblem(clients, workers, tasks, corun_components=components)
+        scheduler = GreedyScheduler(problem)
+        scheduler.run()
+
+        workers[rng.randrange(len(workers))]["AvailableSlots"] = "[2]"
+        tasks[rng.randrange(len(tasks))]["MaxConcurrent"] = 1
+        clients[rng.randrange(len(clients))]["RequestedTaskIDs"] = "T0,T1,T6"
+        scheduler.repair(problem.update(clients, workers, tasks, [], components))
+        assert_feasible(scheduler.to_schedule(), clients, workers, tasks, components)
+
+
+def test_milp_is_feasible_and_no_worse_than_its_greedy_warm_start():
+    milp_scheduler = pytest.importorskip("milp_scheduler")
+    pytest.importorskip("highspy")
+    for seed in range(8):
+        clients, workers, tasks = _dataset(seed, workers=6, tasks=8, clients=6)
+        components = [["T0", "T1"]]
+        schedule = milp_scheduler.MILPScheduler(SchedulingProblem(clients, workers, tasks, corun_components=components),
+                                                time_limit=5).run()
+        assert_feasible(schedule, clients, workers, tasks, components)
+        solver = schedule.extra["solver"]
+        assert solver["objective"] >= solver["warm_start_objective"] - 1e-6
+
+
+@pytest.mark.parametrize("time_limit, mip_gap", [(1e9, 0.01), (0, 0.01), ("soon", 0.01), (10, 1), (10, -0.1),
+                                                  (float("nan"), 0.01)])
+def test_solver_limits_are_checked_before_solving(time_limit, mip_gap):
+    with pytest.raises(ValueError):
+        solver_limits(time_limit, mip_gap)
+    assert solver_limits("5", "0.05") == (5.0, 0.05)
+
+
+def test_rule_applies_mark_milp_schedules_stale_instead_of_solving():
+    pytest.importorskip("highspy")
+    from backend import DataManager
+    dm = DataManager()
+    dm.clients, dm.workers, dm.tasks = _dataset(0, workers=6, tasks=8, clients=6)
+    dm.mark_data_changed()
+    dm.schedule(method="milp", time_limit=5)
+    solved = dm.last_schedule
+
+    assert dm.reschedule(resolve_exact=False) == {"stale": True, "method": "milp", "data_version": dm.data_version}
+    assert dm.last_schedule is solved
+    assert dm.reschedule()["delta"] == {"full_rebuild": True, "method": "milp"}
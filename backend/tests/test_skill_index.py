@@ -0,0 +1,51 @@
+import random
+
+import pytest
+
+from skill_index import SkillIndex, damerau_levenshtein, osa_distance
+
+
+def random_words(rng, count, alphabet="abc", max_len=5):
+    return list({"".join(rng.choice(alphabet) for _ in range(rng.randint(1, max_len))) for _ in range(count)})
+
+
+def brute_force(words, query, max_distance):
+    return sorted((osa_distance(query, w), w) for w in words if osa_distance(query, w) <= max_distance)
+
+
+def test_candidates_finds_match_pruned_under_osa():
+    words = ["babb", "cbba", "abcc", "aacb", "bbbc", "aaaa", "ccbb", "cbcc", "babc", "bba", "bcca", "cbab"]
+    index = SkillIndex(words)
+    assert (2, "bba") in index.candidates("aab", 2)
+    assert index.candidates("aab", 2) == brute_force(words, "aab", 2)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_candidates_match_brute_force(seed):
+    rng = random.Random(seed)
+    words = random_words(rng, 40)
+    index = SkillIndex(words)
+    for query in random_words(rng, 20):
+        for max_distance in (1, 2, 3):
+            assert index.candidates(query, max_distance) == brute_force(words, query, max_distance)
+
+
+def test_damerau_levenshtein_is_a_metric_below_osa():
+    rng = random.Random(7)
+    words = random_words(rng, 30, max_len=4)
+    for a in words:
+        for b in words:
+            assert damerau_levenshtein(a, b) == damerau_levenshtein(b, a) <= osa_distance(a, b)
+            for c in words[:10]:
+                assert damerau_levenshtein(a, c) <= damerau_levenshtein(a, b) + damerau_levenshtein(b, c)
+    # "ca" -> "ac" -> "abc": a transposition and an insertion, which OSA cannot combine
+    assert damerau_levenshtein("ca", "abc") == 2 < osa_distance("ca", "abc")
+
+
+def test_nearest_resolves_typos_and_rejects_ties():
+    index = SkillIndex(["Python", "Java", "Data Analysis", "ML"])
+    assert index.nearest("pyhton") == "Python"
+    assert index.nearest("data  analysis") == "Data Analysis"
+    assert index.nearest("Jvaa") == "Java"
+    assert index.nearest("MX") is None  # short names only match exactly
+    assert SkillIndex(["abcd", "abce"]).nearest("abcf") is None
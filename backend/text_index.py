@@ -0,0 +1,139 @@
+import re
+import math
+import heapq
+from typing import List, Dict, Any, Optional, Callable, Tuple, Hashable
+
+from skill_index import SkillIndex, default_tolerance
+
+TOKEN = re.compile(r"[a-z0-9]+")
+ID_FIELDS = ("ClientID", "WorkerID", "TaskID")
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN.findall(text.casefold())
+
+
+def row_key(row: Dict[str, Any], position: int) -> Tuple[str, Any]:
+    for field in ID_FIELDS:
+        if row.get(field):
+            return field, row[field]
+    return "row", position
+
+
+class TextIndex:
+    """BM25 full-text index over row text, kept in step with the data row by row.
+
+    Each row is one document keyed by its ID field. sync() re-tokenizes
+    only rows whose text changed and drops rows that disappeared. Query
+    words missing from the vocabulary expand to close spellings through a
+    BK-tree (the same edit tolerance as skill matching), at a discount.
+    """
+
+    def __init__(self, to_text: Callable[[Dict[str, Any]], str], k1: float = 1.5, b: float = 0.75):
+        self.to_text = to_text
+        self.k1 = k1
+        self.b = b
+        self._doc_of: Dict[Hashable, int] = {}
+        self._text: Dict[int, str] = {}
+        self._rows: Dict[int, Dict[str, Any]] = {}
+        self._length: Dict[int, int] = {}
+        self._free: List[int] = []
+        self._next_doc = 0
+        self._postings: Dict[str, Dict[int, int]] = {}  # term -> {doc: term frequency}
+        self._total_length = 0
+        # Words for typo matching; IDs and numbers are left out. Built lazily on the first fuzzy lookup
+        self._vocabulary = SkillIndex()
+        self._unspelled: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self._doc_of)
+
+    def _add(self, key: Hashable, row: Dict[str, Any], text: str):
+        if self._free:
+            doc = self._free.pop()
+        else:
+            doc = self._next_doc
+            self._next_doc += 1
+        self._doc_of[key] = doc
+        self._text[doc] = text
+        self._rows[doc] = row
+        tokens = tokenize(text)
+        self._length[doc] = len(tokens)
+        self._total_length += len(tokens)
+        counts: Dict[str, int] = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for token, tf in counts.items():
+            postings = self._postings.get(token)
+            if postings is None:
+                postings = self._postings[token] = {}
+                if not any(c.isdigit() for c in token):
+                    self._unspelled.append(token)
+            postings[doc] = tf
+
+    def _remove(self, key: Hashable):
+        doc = self._doc_of.pop(key)
+        for token in set(tokenize(self._text.pop(doc))):
+            postings = self._postings.get(token)
+            if postings is not None:
+                postings.pop(doc, None)
+        self._total_length -= self._length.pop(doc)
+        del self._rows[doc]
+        self._free.append(doc)
+
+    def sync(self, rows: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Match the index to rows; returns how many documents were added, updated and removed"""
+        seen = set()
+        added = updated = 0
+        for position, row in enumerate(rows):
+            key = row_key(row, position)
+            if key in seen:
+                continue  # duplicate IDs: first row wins, as everywhere else
+            seen.add(key)
+            text = self.to_text(row)
+            doc = self._doc_of.get(key)
+            if doc is not None:
+                self._rows[doc] = row
+                if self._text[doc] == text:
+                    continue
+                self._remove(key)
+                updated += 1
+            else:
+                added += 1
+            self._add(key, row, text)
+        removed = [key for key in self._doc_of if key not in seen]
+        for key in removed:
+            self._remove(key)
+        return {"added": added, "updated": updated, "removed": len(removed)}
+
+    def _expand(self, term: str) -> List[Tuple[str, float]]:
+        if self._postings.get(term):
+            return [(term, 1.0)]
+        tolerance = default_tolerance(term)
+        if not tolerance:
+            return []
+        for word in self._unspelled:
+            self._vocabulary.add(word)
+        self._unspelled.clear()
+        return [(word, 1.0 / (1 + distance)) for distance, word in self._vocabulary.candidates(term, tolerance)
+                if self._postings.get(word)]
+
+    def search(self, query: str, top_k: int = 10,
+               where: Optional[Callable[[Dict[str, Any]], bool]] = None) -> List[Tuple[float, Dict[str, Any]]]:
+        """(score, row) pairs for the best top_k matches, highest first"""
+        n = len(self._doc_of)
+        if not n:
+            return []
+        average = self._total_length / n
+        scores: Dict[int, float] = {}
+        for term in dict.fromkeys(tokenize(query)):
+            for word, weight in self._expand(term):
+                postings = self._postings[word]
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for doc, tf in postings.items():
+                    norm = tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * self._length[doc] / average))
+                    scores[doc] = scores.get(doc, 0.0) + weight * idf * norm
+        if where is not None:
+            scores = {doc: s for doc, s in scores.items() if where(self._rows[doc])}
+        best = heapq.nlargest(top_k, scores.items(), key=lambda item: (item[1], -item[0]))
+        return [(round(score, 4), self._rows[doc]) for doc, score in best]
@@ -0,0 +1,152 @@
+import math
+import zlib
+import numpy as np
+from typing import List, Dict, Any, Optional, Callable, Tuple
+
+from column_store import ColumnStore
+from text_index import tokenize
+
+# Numeric columns mixed into each entity's vectors next to the text features
+NUMERIC_FIELDS = {
+    "ClientID": ["PriorityLevel"],
+    "WorkerID": ["MaxLoadPerPhase", "QualificationLevel"],
+    "TaskID": ["Duration", "MaxConcurrent"],
+}
+
+
+def _bucket(token: str, dim: int) -> Tuple[int, float]:
+    """Stable hashed feature slot and sign for a token (crc32, so vectors agree across processes)"""
+    h = zlib.crc32(token.encode("utf-8"))
+    return h % dim, 1.0 if (h >> 31) & 1 else -1.0
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.where(norms > 0, norms, 1.0)
+
+
+def _top(scores: np.ndarray, k: int) -> np.ndarray:
+    """Positions of the k highest scores, best first"""
+    if k >= scores.size:
+        return np.argsort(-scores, kind="stable")
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best], kind="stable")]
+
+
+class VectorIndex:
+    """Cosine-similarity index over one entity table, built once per dataset version.
+
+    Each row becomes a hashed TF-IDF vector of its text (signed feature
+    hashing into dim slots, so no vocabulary is kept) with the entity's
+    numeric columns appended as z-scores, scaled by numeric_weight, then
+    L2-normalized. Tables of at least partition_threshold rows are split
+    into about sqrt(n) clusters by a few rounds of spherical k-means;
+    queries then score only the nprobe closest clusters.
+    """
+
+    def __init__(self, store: ColumnStore, to_text: Callable[[Dict[str, Any]], str], dim: int = 256,
+                 numeric_weight: float = 0.5, partition_threshold: int = 50000, nprobe: int = 8):
+        self.store = store
+        self.dim = dim
+        self.nprobe = nprobe
+        self.positions: Dict[Any, int] = {}
+        for i, row_id in enumerate(store.ids().tolist()):
+            self.positions.setdefault(row_id, i)  # duplicate IDs: first row wins
+
+        n = store.size
+        counts = np.zeros((n, dim), dtype=np.float32)
+        buckets: Dict[str, Tuple[int, float]] = {}
+        for i, row in enumerate(store.records):
+            for token in tokenize(to_text(row)):
+                if token not in buckets:
+                    buckets[token] = _bucket(token, dim)
+                slot, sign = buckets[token]
+                counts[i, slot] += sign
+        # Sublinear term frequency keeps a repeated skill from drowning out the rest of the row
+        tf = np.sign(counts) * np.log1p(np.abs(counts))
+        df = np.count_nonzero(counts, axis=0)
+        # Slots present in every row (column names, shared boilerplate) get no weight
+        self.idf = np.log((1 + n) / (1 + df)).astype(np.float32)
+        text = _normalize(tf * self.idf)
+
+        fields = [f for f in NUMERIC_FIELDS.get(store.id_field, []) if store.has(f)]
+        self.numeric_fields = fields
+        if fields:
+            numeric = np.column_stack([store.numeric(f) for f in fields])
+            mean = np.nanmean(numeric, axis=0) if n else np.zeros(len(fields))
+            std = np.nanstd(numeric, axis=0) if n else np.ones(len(fields))
+            z = (numeric - np.nan_to_num(mean)) / np.where(np.nan_to_num(std) > 0, np.nan_to_num(std), 1.0)
+            numeric = np.nan_to_num(z) * (numeric_weight / math.sqrt(len(fields)))
+            self.vectors = _normalize(np.hstack([text, numeric.astype(np.float32)]))
+        else:
+            self.vectors = text
+
+        self.centroids: Optional[np.ndarray] = None
+        self.assignments: Optional[np.ndarray] = None
+        if n >= partition_threshold:
+            self._partition()
+
+    def __len__(self) -> int:
+        return self.store.size
+
+    def _partition(self, rounds: int = 4, sample_size: int = 20000):
+        rng = np.random.default_rng(0)
+        n = self.store.size
+        k = int(math.sqrt(n))
+        sample = self.vectors[rng.choice(n, min(n, sample_size), replace=False)]
+        centroids = sample[rng.choice(len(sample), k, replace=False)]
+        for _ in range(rounds):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            empty = ~sums.any(axis=1)
+            sums[empty] = centroids[empty]
+            centroids = _normalize(sums)
+        self.centroids = centroids
+        self.assignments = np.concatenate([
+            np.argmax(self.vectors[start:start + 65536] @ centroids.T, axis=1)
+            for start in range(0, n, 65536)
+        ]) if n else np.zeros(0, dtype=np.int64)
+
+    def _candidates(self, vector: np.ndarray, top_k: int) -> Optional[np.ndarray]:
+        """Row positions in the closest clusters, or None to scan everything"""
+        if self.centroids is None:
+            return None
+        clusters = _top(self.centroids @ vector, min(self.nprobe, len(self.centroids)))
+        rows = np.nonzero(np.isin(self.assignments, clusters))[0]
+        return rows if rows.size > top_k else None
+
+    def _nearest(self, vector: np.ndarray, top_k: int, exclude: Optional[int] = None) -> List[Tuple[float, int]]:
+        rows = self._candidates(vector, top_k + 1)
+        scores = (self.vectors if rows is None else self.vectors[rows]) @ vector
+        if exclude is not None:
+            if rows is None:
+                scores[exclude] = -np.inf
+            else:
+                scores[rows == exclude] = -np.inf
+        best = _top(scores, top_k)
+        positions = best if rows is None else rows[best]
+        return [(round(float(scores[b]), 4), int(p)) for b, p in zip(best, positions) if scores[b] > 0]
+
+    def embed(self, text: str) -> np.ndarray:
+        """Query vector for free text; the numeric part is left at zero"""
+        vector = np.zeros(self.vectors.shape[1], dtype=np.float32)
+        for token in tokenize(text):
+            slot, sign = _bucket(token, self.dim)
+            vector[slot] += sign
+        vector[:self.dim] = np.sign(vector[:self.dim]) * np.log1p(np.abs(vector[:self.dim])) * self.idf
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def search(self, query: str, top_k: int = 10) -> List[Tuple[float, Dict[str, Any]]]:
+        """(score, row) pairs for the rows closest to free text, highest first"""
+        if not self.store.size:
+            return []
+        return [(score, self.store.records[p]) for score, p in self._nearest(self.embed(query), top_k)]
+
+    def similar(self, row_id: Any, top_k: int = 10) -> Optional[List[Tuple[float, Dict[str, Any]]]]:
+        """(score, row) pairs for the rows closest to row_id, excluding itself; None if the ID is unknown"""
+        position = self.positions.get(row_id)
+        if position is None:
+            return None
+        return [(score, self.store.records[p]) for score, p in self._nearest(self.vectors[position], top_k, position)]
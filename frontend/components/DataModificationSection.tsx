@@ -62,8 +62,10 @@ export default function DataModificationSection({
 
     setIsProcessing(true);
     try {
+      // Dry run: the backend plans the edit as patch operations and applies nothing yet
       const formData = new FormData();
       formData.append("command", modificationInstruction);
+      formData.append("dry_run", "true");
 
       const response = await fetch(getApiUrl('NATURAL_LANGUAGE_MODIFY'), {
         method: "POST",
@@ -74,22 +76,51 @@ export default function DataModificationSection({
 
       if (result.status === "success") {
         setLastModification(result);
+      }
+    } catch (error) {
+      console.error("Modification error:", error);
+    } finally {
+      setIsProcessing(false);
+    }
+  };
+
+  const handleCommitModification = async () => {
+    if (!lastModification?.patch?.length || !data) return;
+
+    setIsProcessing(true);
+    try {
+      // base_version makes the backend skip the patch if the data changed since the preview
+      const response = await fetch(getApiUrl('APPLY_FIX_PATCH'), {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({
+          patch: lastModification.patch,
+          base_version: lastModification.base_version,
+        }),
+      });
+
+      const result = await response.json();
+
+      if (result.status === "success") {
         setModificationHistory((prev) => [
           ...prev,
           {
             id: Date.now(),
-            instruction: modificationInstruction,
+            instruction: lastModification.command,
             timestamp: new Date().toISOString(),
-            changes: result.updated,
-            confidence: 0.9, // Default confidence
+            changes: lastModification.patch,
+            applied: result.applied,
+            // Findings for the edited rows, from the backend's incremental revalidation
+            issues: result.validation_errors || [],
           },
         ]);
+        setLastModification(null);
 
-        if (onDataModified && result.updated) {
+        if (onDataModified && result.data) {
           // Transform the response to match ProcessedData format
           const modifiedData: ProcessedData = {
             ...data,
-            ...result.updated,
+            ...result.data,
             dataQuality: {
               totalRows: data?.dataQuality.totalRows || 0,
               cleanRows: data?.dataQuality.cleanRows || 0,
@@ -142,16 +173,13 @@ export default function DataModificationSection({
     }
   };
 
-  const undoLastModification = () => {
-    if (modificationHistory.length > 0) {
-      const newHistory = [...modificationHistory];
-      newHistory.pop();
-      setModificationHistory(newHistory);
-      setLastModification(null);
-      // In a real implementation, you'd restore the previous data state
-    }
+  const discardModification = () => {
+    setLastModification(null);
   };
 
+  const formatValue = (value: any) =>
+    value === null || value === undefined || value === "" ? "(empty)" : String(value);
+
   const getChangeIcon = (changeType: string) => {
     switch (changeType) {
       case "update":
@@ -309,8 +337,8 @@ export default function DataModificationSection({
                           </>
                         ) : (
                           <>
-                            <Wand2 className="h-4 w-4 mr-2" />
-                            Apply Changes
+                            <Eye className="h-4 w-4 mr-2" />
+                            Preview Changes
                           </>
                         )}
                       </Button>
@@ -346,45 +374,55 @@ export default function DataModificationSection({
                           className="bg-green-100 text-green-700 dark:bg-green-900/30 dark:text-green-300"
                         >
                           <CheckCircle className="h-3 w-3 mr-1" />
-                          Confidence: {lastModification.confidence}%
+                          {lastModification.operations?.length || 0} Operations
                         </Badge>
                         <Badge variant="secondary">
-                          {lastModification.changes?.length || 0} Changes
+                          {lastModification.patch?.length || 0} Changes
                         </Badge>
                       </div>
                       <ScrollArea className="h-[200px] w-full rounded-md border p-4">
-                        {lastModification.changes?.map(
+                        {lastModification.patch?.map(
                           (change: any, index: number) => (
                             <div
                               key={index}
                               className="flex items-center gap-2 py-2"
                             >
-                              {getChangeIcon(change.type)}
+                              {getChangeIcon("update")}
                               <span className="text-sm">
-                                {change.description}
+                                {change.id} · {change.path.split("/").pop()}:{" "}
+                                {formatValue(change.old)} → {formatValue(change.value)}
                               </span>
                             </div>
                           )
                         )}
                       </ScrollArea>
-                      <Button
-                        variant="outline"
-                        onClick={undoLastModification}
-                        size="sm"
-                        className="w-full"
-                      >
-                        <Undo2 className="h-4 w-4 mr-2" />
-                        Undo Last Change
-                      </Button>
+                      <div className="grid grid-cols-2 gap-2">
+                        <Button
+                          onClick={handleCommitModification}
+                          disabled={isProcessing || !lastModification.patch?.length}
+                          size="sm"
+                        >
+                          <Save className="h-4 w-4 mr-2" />
+                          Commit Changes
+                        </Button>
+                        <Button
+                          variant="outline"
+                          onClick={discardModification}
+                          size="sm"
+                        >
+                          <Undo2 className="h-4 w-4 mr-2" />
+                          Discard
+                        </Button>
+                      </div>
                     </div>
                   ) : (
                     <div className="text-center py-8">
                       <Sparkles className="h-12 w-12 mx-auto text-muted-foreground mb-4" />
                       <p className="text-muted-foreground">
-                        No modifications applied yet
+                        No modification to preview yet
                       </p>
                       <p className="text-sm text-muted-foreground mt-2">
-                        Enter your modification instructions and click "Apply
+                        Enter your modification instructions and click "Preview
                         Changes"
                       </p>
                     </div>
@@ -561,9 +599,15 @@ export default function DataModificationSection({
                             {mod.instruction}
                           </p>
                           <div className="flex items-center gap-4 text-xs text-muted-foreground">
-                            <span>Confidence: {mod.confidence}%</span>
+                            <span>Applied: {mod.applied}</span>
                             <span>Changes: {mod.changes?.length || 0}</span>
+                            <span>Issues: {mod.issues?.length || 0}</span>
                           </div>
+                          {mod.issues?.slice(0, 5).map((issue: any, i: number) => (
+                            <p key={i} className="text-xs text-red-600 mt-1">
+                              {issue.message}
+                            </p>
+                          ))}
                         </div>
                       ))}
                     </div>
@@ -15,6 +15,7 @@ export const API_CONFIG = {
     AI_GENERATE_RULE: '/ai_generate_rule',
     APPLY_RULES: '/apply_rules',
     APPLY_CORRECTIONS: '/apply_corrections',
+    APPLY_FIX_PATCH: '/apply_fix_patch',
     SUGGEST_CORRECTIONS: '/suggest_corrections',
     EXPORT_DOWNLOAD: '/export_download',
     DOWNLOAD: '/download',